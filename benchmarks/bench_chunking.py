@@ -0,0 +1,56 @@
+"""Compare the word-window chunker with the streaming token-aware chunker.
+
+Run:
+    python benchmarks/bench_chunking.py [--tokenizer]
+
+By default tokens are approximated by whitespace-separated words so the
+benchmark runs without downloading a model; --tokenizer uses the embedding
+model tokenizer, which is what indexing uses.
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from ctxvault.utils.chuncking import chunking, iter_token_chunks
+
+def make_text(paragraphs: int = 2000)-> str:
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(5000)]
+    return "\n\n".join(
+        " ".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(5, 30))) + "."
+            for _ in range(rng.randint(2, 8))
+        )
+        for _ in range(paragraphs)
+    )
+
+def measure(label: str, run)-> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    words = sum(len(chunk.split()) for chunk in chunks)
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  peak {peak / 1e6:6.1f} MB  {len(chunks):6d} chunks  {words:8d} embedded words")
+
+def main()-> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokenizer", action="store_true", help="count tokens with the embedding model tokenizer")
+    args = parser.parse_args()
+
+    if args.tokenizer:
+        from ctxvault.core.embedding import count_tokens
+    else:
+        count_tokens = lambda texts: [len(text.split()) for text in texts]
+
+    text = make_text()
+    print(f"input: {len(text.split())} words, {len(text) / 1e6:.1f} MB")
+
+    measure("chunking(50, 20)", lambda: chunking(text, chunk_size=50, overlap=20))
+    measure("iter_token_chunks(200, 20)", lambda: list(iter_token_chunks(text, count_tokens=count_tokens, chunk_size=200, overlap=20)))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,59 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from ctxvault.api.routes import ctxvault_router
+from ctxvault.core.warmup import WarmupState
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from ctxvault.core import querying
+    from ctxvault.core.warmup import warm_up
+    from ctxvault.api.executors import QUERY_POOL, run_blocking, shutdown_executors
+    from ctxvault.core.jobs import shutdown_job_manager
+    from ctxvault.core.reranking import shutdown_reranker
+    from ctxvault.utils.config import get_settings
+
+    querying.start_query_batcher()
+
+    settings = get_settings()
+    app.state.warmup = WarmupState()
+    if settings["preload_on_startup"]:
+        # Warm up in the background: "/" answers right away, "/ready" once models and collections are loaded.
+        app.state.warmup_task = asyncio.create_task(
+            run_blocking(QUERY_POOL, warm_up, state=app.state.warmup, vault_names=settings["preload_vaults"])
+        )
+    else:
+        app.state.warmup.finish()
+
+    yield
+    shutdown_job_manager()
+    shutdown_executors()
+    shutdown_reranker()
+    querying.stop_query_batcher()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(ctxvault_router)
 
 @app.get("/")
 def root():
-    return {"message": "Welcome to CtxVault!"}
\ No newline at end of file
+    return {"message": "Welcome to CtxVault!"}
+
+@app.get(
+    "/ready",
+    summary="Readiness probe",
+    description="Return 200 once the embedding models and vault collections have been preloaded, 503 while the server is still warming up."
+)
+def ready():
+    state: WarmupState | None = getattr(app.state, "warmup", None)
+    if state is None or not state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+
+    return {
+        "status": "ready",
+        "models": state.models,
+        "vaults": state.vaults,
+        "errors": state.errors,
+        "warmup_seconds": round(state.finished_at - state.started_at, 3) if state.started_at else 0.0
+    }
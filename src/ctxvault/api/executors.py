@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import asyncio
+import functools
+
+INDEX_POOL = "index"
+QUERY_POOL = "query"
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+
+def get_executor(pool: str)-> ThreadPoolExecutor:
+    executor = _executors.get(pool)
+    if executor is None:
+        from ctxvault.utils.config import get_settings
+        executor = ThreadPoolExecutor(max_workers=get_settings()[f"api_{pool}_threads"], thread_name_prefix=f"ctxvault-{pool}")
+        _executors[pool] = executor
+    return executor
+
+async def run_blocking(pool: str, func: Callable[..., Any], **kwargs)-> Any:
+    """Run a blocking core call on the named thread pool without blocking the event loop.
+
+    Indexing and querying use separate bounded pools, so a bulk index can never
+    take every thread away from latency-sensitive queries.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(pool), functools.partial(func, **kwargs))
+
+def shutdown_executors()-> None:
+    while _executors:
+        _, executor = _executors.popitem()
+        executor.shutdown(wait=True)
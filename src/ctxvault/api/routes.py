@@ -2,12 +2,19 @@ from pathlib import Path
 from ctxvault.api.schemas import *
 from ctxvault.core.exceptions import *
 from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from ctxvault.core import vault
+from ctxvault.core.indexer import IndexProgress
+from ctxvault.core.jobs import get_job_manager
+from ctxvault.api.executors import INDEX_POOL, QUERY_POOL, run_blocking
 
 app = FastAPI()
 
 ctxvault_router = APIRouter(prefix="/ctxvault", tags=["CtxVault"])
 
+MAX_DOCS_PAGE_SIZE = 1000
+STREAM_DOCS_PAGE_SIZE = 500
+
 @ctxvault_router.post(
     "/init",
     summary="Initialize a new vault",
@@ -15,10 +22,32 @@ ctxvault_router = APIRouter(prefix="/ctxvault", tags=["CtxVault"])
 )
 async def init(init_request: InitRequest)-> InitResponse:
     try:
-        vault_path, config_path = vault.init_vault(vault_name=init_request.vault_name, path=init_request.vault_path)
+        vault_path, config_path = await run_blocking(INDEX_POOL, vault.init_vault, 
+                                                     vault_name=init_request.vault_name, 
+                                                     path=init_request.vault_path, 
+                                                     chunking=init_request.chunking.model_dump() if init_request.chunking else None, 
+                                                     embedding=init_request.embedding.model_dump() if init_request.embedding else None)
         return InitResponse(vault_path=vault_path, config_path=config_path)
     except VaultAlreadyExistsError as e:
         raise HTTPException(status_code=400, detail=f"Vault already initialized at {e.existing_path}")
+    except (InvalidChunkingConfigError, InvalidEmbeddingConfigError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@ctxvault_router.put(
+    "/chunking",
+    summary="Update vault chunking",
+    description="Change the chunk strategy, size or overlap of a vault. Files indexed with other settings are re-chunked by the next index run."
+)
+async def chunking(chunking_request: ChunkingRequest)-> ChunkingResponse:
+    try:
+        settings, outdated_files = await run_blocking(INDEX_POOL, vault.set_chunking, 
+                                                      vault_name=chunking_request.vault_name, 
+                                                      chunking=chunking_request.model_dump(exclude={"vault_name"}))
+        return ChunkingResponse(vault_name=chunking_request.vault_name, outdated_files=outdated_files, **settings)
+    except VaultNotFoundError as e:
+        raise HTTPException(status_code=400, detail=f"Vault {chunking_request.vault_name} doesn't exist.")
+    except InvalidChunkingConfigError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @ctxvault_router.put(
     "/index",
@@ -27,23 +56,36 @@ async def init(init_request: InitRequest)-> InitResponse:
 )
 async def index(index_request: IndexRequest):
     try:
-        indexed_files, skipped_files = vault.index_files(vault_name=index_request.vault_name, path=index_request.file_path)
+        progress = IndexProgress()
+        indexed_files, deleted_files, skipped_files = await run_blocking(INDEX_POOL, vault.index_files, vault_name=index_request.vault_name, path=index_request.file_path, progress=progress)
 
-        return IndexResponse(indexed_files=indexed_files, skipped_files=skipped_files)
+        return IndexResponse(indexed_files=indexed_files, deleted_files=deleted_files, skipped_files=skipped_files, files_unchanged=progress.files_unchanged)
     except VaultNotFoundError as e:
         raise HTTPException(status_code=400, detail=f"Vault {index_request.vault_name} doesn't exist.")
 
 @ctxvault_router.post(
     "/query",
     summary="Perform semantic search",
-    description="Run a vector similarity search against indexed vault documents."
+    description="Run a vector similarity search against indexed vault documents. top_k sets the number of matches (1 to 100), max_distance drops weaker ones, "
+                "and include (any of text, metadata, score) limits the returned fields; chunk_id and doc_id are always returned. "
+                "mode \"hybrid\" fuses vector matches with BM25 keyword matches, which helps with identifiers and error codes. "
+                "rerank reorders oversampled candidates with a cross-encoder, within a latency budget.",
+    response_model_exclude_unset=True
 )
 async def query(query_request: QueryRequest)-> QueryResponse:
     try:
         if not query_request.query.strip():
             raise HTTPException(status_code=400, detail="Empty query.")
 
-        result = vault.query(vault_name=query_request.vault_name,text=query_request.query, filters=query_request.filters)
+        result = await run_blocking(QUERY_POOL, vault.query, 
+                                    vault_name=query_request.vault_name, 
+                                    text=query_request.query, 
+                                    filters=query_request.filters, 
+                                    top_k=query_request.top_k, 
+                                    include=query_request.include, 
+                                    max_distance=query_request.max_distance, 
+                                    mode=query_request.mode, 
+                                    rerank=query_request.rerank)
 
         if not result.results:
             raise HTTPException(status_code=404, detail="No results found.")
@@ -51,6 +93,39 @@ async def query(query_request: QueryRequest)-> QueryResponse:
         return QueryResponse(results=result.results)
     except VaultNotFoundError as e:
         raise HTTPException(status_code=400, detail=f"Vault {query_request.vault_name} doesn't exist.")
+    except InvalidQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@ctxvault_router.post(
+    "/query/batch",
+    summary="Perform many semantic searches",
+    description="Run a list of queries, possibly against different vaults and filters, with one embedding call and one vector search per vault. Results are returned in request order; a query without matches gets an empty list.",
+    response_model_exclude_unset=True
+)
+async def query_batch(batch_request: BatchQueryRequest)-> BatchQueryResponse:
+    if not batch_request.queries:
+        raise HTTPException(status_code=400, detail="Empty batch.")
+    if any(not q.query.strip() for q in batch_request.queries):
+        raise HTTPException(status_code=400, detail="Empty query.")
+
+    try:
+        results = await run_blocking(QUERY_POOL, vault.query_batch, 
+                                     queries=[
+                                         {
+                                             "text": q.query, 
+                                             "vault_name": q.vault_name, 
+                                             "filters": q.filters, 
+                                             "top_k": q.top_k, 
+                                             "include": q.include, 
+                                             "max_distance": q.max_distance, 
+                                             "mode": q.mode, 
+                                             "rerank": q.rerank
+                                         } 
+                                         for q in batch_request.queries
+                                     ])
+        return BatchQueryResponse(results=results)
+    except (VaultNotFoundError, InvalidQueryError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @ctxvault_router.delete(
     "/delete",
@@ -59,7 +134,7 @@ async def query(query_request: QueryRequest)-> QueryResponse:
 )
 async def delete(vault_name: str, file_path: str | None = None)-> DeleteResponse:
     try:
-        deleted_files, skipped_files = vault.delete_files(vault_name=vault_name, path=file_path)
+        deleted_files, skipped_files = await run_blocking(INDEX_POOL, vault.delete_files, vault_name=vault_name, path=file_path)
 
         return DeleteResponse(deleted_files=deleted_files, skipped_files=skipped_files)
     except VaultNotFoundError as e:
@@ -72,9 +147,10 @@ async def delete(vault_name: str, file_path: str | None = None)-> DeleteResponse
 )
 async def reindex(reindex_request: ReindexRequest)-> ReindexResponse:
     try:
-        reindexed_files, skipped_files = vault.index_files(vault_name=reindex_request.vault_name, path=reindex_request.file_path)
+        progress = IndexProgress()
+        reindexed_files, deleted_files, skipped_files = await run_blocking(INDEX_POOL, vault.reindex_files, vault_name=reindex_request.vault_name, path=reindex_request.file_path, progress=progress)
 
-        return ReindexResponse(reindexed_files=reindexed_files, skipped_files=skipped_files)
+        return ReindexResponse(reindexed_files=reindexed_files, deleted_files=deleted_files, skipped_files=skipped_files, files_unchanged=progress.files_unchanged)
     except VaultNotFoundError as e:
         raise HTTPException(status_code=400, detail=f"Vault {reindex_request.vault_name} doesn't exist.")
 
@@ -84,20 +160,66 @@ async def reindex(reindex_request: ReindexRequest)-> ReindexResponse:
     description="Return all registered vaults and their paths."
 )
 async def vaults()-> ListVaultsResponse:
-    vaults = vault.list_vaults()
+    vaults = await run_blocking(QUERY_POOL, vault.list_vaults)
     return ListVaultsResponse(vaults=vaults)
     
 @ctxvault_router.get(
     "/docs",
     summary="List vault documents",
-    description="Return all indexed documents in the specified vault."
+    description="Return a page of the indexed documents of the specified vault, read from its catalog. "
+                "prefix keeps the documents whose source path starts with it, absolute or relative to the vault; "
+                "sort is source, indexed_at, chunks_count or size. Pass next_cursor back as cursor, with the same prefix and order, "
+                "for the following page; it is null on the last one. total counts all the matching documents and is only returned on the first page."
 )
-async def docs(vault_name: str)-> ListDocsResponse:
+async def docs(vault_name: str, prefix: str | None = None, sort: str = "source", descending: bool = False, limit: int = vault.DOCS_PAGE_SIZE, offset: int = 0, cursor: str | None = None)-> ListDocsResponse:
+    if limit > MAX_DOCS_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be at most {MAX_DOCS_PAGE_SIZE}.")
+    try:
+        documents, next_cursor = await run_blocking(QUERY_POOL, vault.list_documents_page, 
+                                                    vault_name=vault_name, 
+                                                    prefix=prefix, 
+                                                    sort=sort, 
+                                                    descending=descending, 
+                                                    limit=limit, 
+                                                    offset=offset, 
+                                                    cursor=cursor)
+        total = None
+        if cursor is None and offset == 0:
+            total = await run_blocking(QUERY_POOL, vault.count_documents, vault_name=vault_name, prefix=prefix)
+        return ListDocsResponse(vault_name=vault_name, documents=documents, total=total, next_cursor=next_cursor)
+    except VaultNotFoundError as e:
+        raise HTTPException(status_code=400, detail=f"Vault {vault_name} doesn't exist.")
+    except InvalidQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@ctxvault_router.get(
+    "/docs/stream",
+    summary="Stream vault documents",
+    description="Stream every matching document of the specified vault as newline-delimited JSON, one document per line. "
+                "The catalog is read one page at a time while the response is sent, so the full list is never held in memory.",
+    response_class=StreamingResponse
+)
+async def docs_stream(vault_name: str, prefix: str | None = None, sort: str = "source", descending: bool = False)-> StreamingResponse:
+    def read_page(cursor: str | None):
+        return vault.list_documents_page(vault_name=vault_name, prefix=prefix, sort=sort, descending=descending, limit=STREAM_DOCS_PAGE_SIZE, cursor=cursor)
+
+    # The first page is read before answering, so errors still get a status code.
     try:
-        documents = vault.list_documents(vault_name=vault_name)
-        return ListDocsResponse(vault_name=vault_name, documents=documents)
+        first_page = await run_blocking(QUERY_POOL, read_page, cursor=None)
     except VaultNotFoundError as e:
         raise HTTPException(status_code=400, detail=f"Vault {vault_name} doesn't exist.")
+    except InvalidQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def lines():
+        documents, cursor = first_page
+        while True:
+            yield "".join(document.model_dump_json() + "\n" for document in documents)
+            if cursor is None:
+                return
+            documents, cursor = await run_blocking(QUERY_POOL, read_page, cursor=cursor)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @ctxvault_router.post(
     "/write",
@@ -106,11 +228,12 @@ async def docs(vault_name: str)-> ListDocsResponse:
 )
 async def write(write_request: WriteRequest)-> WriteResponse:
     try:
-        vault.write_file(vault_name=write_request.vault_name,
-                         file_path=write_request.file_path, 
-                         content=write_request.content, 
-                         overwrite=write_request.overwrite, 
-                         agent_metadata=write_request.agent_metadata.model_dump() if write_request.agent_metadata else None)
+        await run_blocking(INDEX_POOL, vault.write_file, 
+                           vault_name=write_request.vault_name,
+                           file_path=write_request.file_path, 
+                           content=write_request.content, 
+                           overwrite=write_request.overwrite, 
+                           agent_metadata=write_request.agent_metadata.model_dump() if write_request.agent_metadata else None)
         
         return WriteResponse(file_path=write_request.file_path)
     except VaultNotFoundError as e:
@@ -120,4 +243,58 @@ async def write(write_request: WriteRequest)-> WriteResponse:
     except FileAlreadyExistError as e:
         raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@ctxvault_router.post(
+    "/jobs",
+    status_code=202,
+    summary="Start a background indexing job",
+    description="Queue an index or reindex run for a vault and return immediately with the job id."
+)
+async def submit_job(job_request: JobRequest)-> JobInfo:
+    try:
+        return get_job_manager().submit(vault_name=job_request.vault_name, kind=job_request.kind, path=job_request.file_path)
+    except VaultNotFoundError as e:
+        raise HTTPException(status_code=400, detail=f"Vault {job_request.vault_name} doesn't exist.")
+    except JobAlreadyActiveError as e:
+        raise HTTPException(status_code=409, detail=f"Vault {job_request.vault_name} already has an active job {e.active_job_id}.")
+
+@ctxvault_router.get(
+    "/jobs",
+    summary="List background jobs",
+    description="Return the active and recently finished background jobs."
+)
+async def jobs()-> ListJobsResponse:
+    return ListJobsResponse(jobs=get_job_manager().list_jobs())
+
+@ctxvault_router.get(
+    "/jobs/{job_id}",
+    summary="Get background job progress",
+    description="Return status, file and chunk counters, throughput and errors of a background job."
+)
+async def job(job_id: str)-> JobInfo:
+    try:
+        return get_job_manager().get(job_id=job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@ctxvault_router.delete(
+    "/jobs/{job_id}",
+    summary="Cancel a background job",
+    description="Stop a queued or running job; documents already stored are kept."
+)
+async def cancel_job(job_id: str)-> JobInfo:
+    try:
+        return get_job_manager().cancel(job_id=job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@ctxvault_router.get(
+    "/stats",
+    summary="Get cache statistics",
+    description="Return the size and the hit, miss and coalesced counters of the query embedding cache of this server."
+)
+async def stats()-> StatsResponse:
+    from ctxvault.core.querying import query_cache_stats
+
+    return StatsResponse(query_cache=query_cache_stats())
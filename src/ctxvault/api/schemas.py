@@ -1,10 +1,24 @@
 from ctxvault.models.documents import DocumentInfo
-from ctxvault.models.query_result import ChunkMatch
-from pydantic import BaseModel
+from ctxvault.models.jobs import JobInfo, JobKind
+from ctxvault.models.query_result import ChunkMatch, QueryResult
+from pydantic import BaseModel, Field, field_validator
+
+MAX_TOP_K = 100
+
+class ChunkingSettings(BaseModel):
+    chunk_strategy: str | None = None
+    chunk_size: int | None = None
+    chunk_overlap: int | None = None
+
+class EmbeddingSettings(BaseModel):
+    embedding_backend: str | None = None
+    embedding_model: str | None = None
 
 class InitRequest(BaseModel):
     vault_name: str
     vault_path: str | None = None
+    chunking: ChunkingSettings | None = None
+    embedding: EmbeddingSettings | None = None
 
 class InitResponse(BaseModel):
     vault_path: str
@@ -16,16 +30,39 @@ class IndexRequest(BaseModel):
 
 class IndexResponse(BaseModel):
     indexed_files: list[str]
+    deleted_files: list[str] = []
     skipped_files: list[str]
+    files_unchanged: int = 0
 
 class QueryRequest(BaseModel):
     vault_name: str
     query: str
     filters: dict | None = None
+    top_k: int = Field(default=5, ge=1, le=MAX_TOP_K)
+    max_distance: float | None = None
+    include: list[str] | None = None
+    mode: str = "vector"
+    rerank: bool = False
 
 class QueryResponse(BaseModel):
     results: list[ChunkMatch]
 
+class BatchQueryRequest(BaseModel):
+    queries: list[QueryRequest] = Field(min_length=1)
+
+    @field_validator("queries")
+    @classmethod
+    def _check_batch_size(cls, queries: list[QueryRequest])-> list[QueryRequest]:
+        from ctxvault.utils.config import get_settings
+
+        max_queries = get_settings()["max_batch_queries"]
+        if len(queries) > max_queries:
+            raise ValueError(f"at most {max_queries} queries are accepted per batch")
+        return queries
+
+class BatchQueryResponse(BaseModel):
+    results: list[QueryResult]
+
 class DeleteResponse(BaseModel):
     deleted_files: list[str]
     skipped_files: list[str]
@@ -36,7 +73,9 @@ class ReindexRequest(BaseModel):
 
 class ReindexResponse(BaseModel):
     reindexed_files: list[str]
+    deleted_files: list[str] = []
     skipped_files: list[str]
+    files_unchanged: int = 0
 
 class ListVaultsResponse(BaseModel):
     vaults: list[str]
@@ -44,6 +83,8 @@ class ListVaultsResponse(BaseModel):
 class ListDocsResponse(BaseModel):
     vault_name: str
     documents: list[DocumentInfo]
+    total: int | None = None
+    next_cursor: str | None = None
 
 class AgentMetadata(BaseModel):
     generated_by: str
@@ -57,4 +98,31 @@ class WriteRequest(BaseModel):
     agent_metadata: AgentMetadata | None = None
 
 class WriteResponse(BaseModel):
-    file_path: str
\ No newline at end of file
+    file_path: str
+
+class JobRequest(BaseModel):
+    vault_name: str
+    kind: JobKind = JobKind.INDEX
+    file_path: str | None = None
+
+class ListJobsResponse(BaseModel):
+    jobs: list[JobInfo]
+
+class ChunkingRequest(ChunkingSettings):
+    vault_name: str
+
+class ChunkingResponse(BaseModel):
+    vault_name: str
+    chunk_strategy: str
+    chunk_size: int
+    chunk_overlap: int
+    outdated_files: int
+
+class QueryCacheStats(BaseModel):
+    size: int
+    hits: int
+    misses: int
+    coalesced: int
+
+class StatsResponse(BaseModel):
+    query_cache: QueryCacheStats
@@ -1,15 +1,25 @@
 from pathlib import Path
 import typer
 from ctxvault.core import vault
-from ctxvault.core.exceptions import PathOutsideVaultError, VaultAlreadyExistsError, VaultNotFoundError
+from ctxvault.core.indexer import IndexProgress
+from ctxvault.core.exceptions import InvalidChunkingConfigError, InvalidEmbeddingConfigError, InvalidQueryError, PathOutsideVaultError, VaultAlreadyExistsError, VaultNotFoundError
 
 app = typer.Typer()
 
 @app.command()
-def init(name: str = typer.Argument("my-vault"), path: str = typer.Option(None, "--path")):
+def init(name: str = typer.Argument("my-vault"), 
+         path: str = typer.Option(None, "--path"), 
+         chunk_strategy: str = typer.Option(None, "--chunk-strategy", help="tokens, words, sentences or markdown."), 
+         chunk_size: int = typer.Option(None, "--chunk-size", help="Chunk size in tokens, words or sentences, depending on the strategy."), 
+         chunk_overlap: int = typer.Option(None, "--chunk-overlap", help="Overlap between consecutive chunks, in the same unit as the size."), 
+         embedding_backend: str = typer.Option(None, "--embedding-backend", help="sentence-transformers, onnx, onnx-int8 or hash."), 
+         embedding_model: str = typer.Option(None, "--embedding-model", help="Model name or Hugging Face repository of the embedding backend.")):
     try:
         typer.echo(f"Initializing Context Vault {name}...")
-        vault_path, config_path = vault.init_vault(vault_name=name, path=path)
+        vault_path, config_path = vault.init_vault(vault_name=name, 
+                                                   path=path, 
+                                                   chunking={"chunk_strategy": chunk_strategy, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap}, 
+                                                   embedding={"embedding_backend": embedding_backend, "embedding_model": embedding_model})
         typer.secho("Context Vault initialized succesfully!", fg=typer.colors.GREEN, bold=True)
         typer.echo(f"Context Vault path: {vault_path}")
         typer.echo(f"Config file path: {config_path}")
@@ -17,27 +27,69 @@ def init(name: str = typer.Argument("my-vault"), path: str = typer.Option(None,
         typer.secho("Warning: Context Vault already initialized in this path!", fg=typer.colors.YELLOW, bold=True)
         typer.echo(f"Error during initialization: {e.existing_path}")
         raise typer.Exit(1)
+    except (InvalidChunkingConfigError, InvalidEmbeddingConfigError) as e:
+        typer.secho(f"Error during initialization: {e}", fg=typer.colors.RED, bold=True)
+        raise typer.Exit(1)
+
+@app.command()
+def chunking(name: str = typer.Argument("my-vault"), 
+             chunk_strategy: str = typer.Option(None, "--strategy", help="tokens, words, sentences or markdown."), 
+             chunk_size: int = typer.Option(None, "--size", help="Chunk size in tokens, words or sentences, depending on the strategy."), 
+             chunk_overlap: int = typer.Option(None, "--overlap", help="Overlap between consecutive chunks, in the same unit as the size.")):
+    try:
+        settings, outdated_files = vault.set_chunking(vault_name=name, 
+                                                      chunking={"chunk_strategy": chunk_strategy, "chunk_size": chunk_size, "chunk_overlap": chunk_overlap})
+
+        typer.secho(f"Chunking of {name}: {settings['chunk_strategy']}, size {settings['chunk_size']}, overlap {settings['chunk_overlap']}", fg=typer.colors.GREEN, bold=True)
+        if outdated_files:
+            typer.secho(f"{outdated_files} files will be re-chunked by the next index.", fg=typer.colors.YELLOW)
+    except Exception as e:
+        typer.secho(f"Error updating chunking: {e}", fg=typer.colors.RED, bold=True)
+        raise typer.Exit(1)
 
 @app.command()
 def index(name: str = typer.Argument("my-vault"), path: str = typer.Option(None, "--path")):
     try:
-        indexed_files, skipped_files = vault.index_files(vault_name=name, path=path)
+        progress = IndexProgress()
+        indexed_files, deleted_files, skipped_files = vault.index_files(vault_name=name, path=path, progress=progress)
 
         for file in indexed_files:
             typer.secho(f"Indexed: {file}", fg=typer.colors.GREEN)
 
+        for file in deleted_files:
+            typer.secho(f"Deleted: {file}", fg=typer.colors.RED)
+
         for file in skipped_files:
             typer.secho(f"Skipped: {file}", fg=typer.colors.YELLOW)
 
         typer.secho(f"\nIndexed: {len(indexed_files)}", fg=typer.colors.GREEN, bold=True)
+        typer.secho(f"Unchanged: {progress.files_unchanged}", bold=True)
+        typer.secho(f"Deleted: {len(deleted_files)}", fg=typer.colors.RED, bold=True)
         typer.secho(f"Skipped: {len(skipped_files)}", fg=typer.colors.YELLOW, bold=True)
     except Exception as e:
         typer.secho(f"Error during indexing: {e}", fg=typer.colors.RED, bold=True)
         raise typer.Exit(1)
     
 @app.command()
-def query(name: str = typer.Argument("my-vault"), text: str = typer.Argument("")):
-    result = vault.query(text=text, vault_name=name)
+def query(name: str = typer.Argument("my-vault"), 
+          text: str = typer.Argument(""), 
+          top_k: int = typer.Option(5, "--top-k", "-k", help="Number of chunks to return."), 
+          max_distance: float = typer.Option(None, "--max-distance", help="Drop chunks farther than this distance from the query."), 
+          include: list[str] = typer.Option(None, "--include", help="Fields to fetch: text, metadata, score (repeatable). Default: all."), 
+          hybrid: bool = typer.Option(False, "--hybrid", help="Fuse vector search with keyword (BM25) matches."), 
+          rerank: bool = typer.Option(False, "--rerank", help="Reorder more candidates with a cross-encoder.")):
+    try:
+        result = vault.query(text=text, 
+                             vault_name=name, 
+                             top_k=top_k, 
+                             include=include or None, 
+                             max_distance=max_distance, 
+                             mode="hybrid" if hybrid else "vector", 
+                             rerank=rerank)
+    except InvalidQueryError as e:
+        typer.secho(f"Error during query: {e}", fg=typer.colors.RED, bold=True)
+        raise typer.Exit(1)
+
     if not result.results:
         typer.secho("No results found.", fg=typer.colors.YELLOW)
         return
@@ -47,14 +99,19 @@ def query(name: str = typer.Argument("my-vault"), text: str = typer.Argument("")
     
     for idx, chunk in enumerate(result.results, 1):
         typer.secho(f"\n[{idx}] ", fg=typer.colors.CYAN, bold=True, nl=False)
-        typer.secho(f"score: {chunk.score:.3f}", fg=typer.colors.MAGENTA)
-        typer.secho(f"    ▸ {chunk.source} ", fg=typer.colors.BLUE, nl=False)
-        typer.echo(f"(chunk {chunk.chunk_index})")
-
-        preview = chunk.text.strip().replace("\n", " ")
-        if len(preview) > 200:
-            preview = preview[:200] + "..."
-        typer.echo(f"    {preview}")
+        if chunk.score is not None:
+            typer.secho(f"score: {chunk.score:.3f}", fg=typer.colors.MAGENTA)
+        else:
+            typer.secho(chunk.chunk_id, fg=typer.colors.MAGENTA)
+        if chunk.source is not None:
+            typer.secho(f"    ▸ {chunk.source} ", fg=typer.colors.BLUE, nl=False)
+            typer.echo(f"(chunk {chunk.chunk_index})" if chunk.page is None else f"(page {chunk.page}, chunk {chunk.chunk_index})")
+
+        if chunk.text is not None:
+            preview = chunk.text.strip().replace("\n", " ")
+            if len(preview) > 200:
+                preview = preview[:200] + "..."
+            typer.echo(f"    {preview}")
     
     typer.echo("\n" + "─" * 80)
 
@@ -78,23 +135,64 @@ def delete(name: str = typer.Argument("my-vault"), path: str = typer.Option(None
 @app.command()
 def reindex(name: str = typer.Argument("my-vault"), path: str = typer.Option(None, "--path")):
     try:
-        reindexed_files, skipped_files = vault.reindex_files(vault_name=name, path=path)
+        progress = IndexProgress()
+        reindexed_files, deleted_files, skipped_files = vault.reindex_files(vault_name=name, path=path, progress=progress)
 
         for file in reindexed_files:
             typer.secho(f"Reindexed: {file}", fg=typer.colors.GREEN)
 
+        for file in deleted_files:
+            typer.secho(f"Deleted: {file}", fg=typer.colors.RED)
+
         for file in skipped_files:
             typer.secho(f"Skipped: {file}", fg=typer.colors.YELLOW)
 
         typer.secho(f"Reindexed: {len(reindexed_files)}", fg=typer.colors.GREEN, bold=True)
+        typer.secho(f"Unchanged: {progress.files_unchanged}", bold=True)
+        typer.secho(f"Deleted: {len(deleted_files)}", fg=typer.colors.RED, bold=True)
         typer.secho(f"Skipped: {len(skipped_files)}", fg=typer.colors.YELLOW, bold=True)
     except Exception as e:
         typer.secho(f"Error during indexing: {e}", fg=typer.colors.RED, bold=True)
         raise typer.Exit(1)
 
 @app.command()
-def sync():
-    typer.echo(f"Synchronizing vault placeholder")
+def sync(name: str = typer.Argument("my-vault"), 
+         debounce: int = typer.Option(1000, "--debounce", help="Milliseconds of quiet time before a batch of changes is indexed."), 
+         poll: bool = typer.Option(False, "--poll", help="Detect changes by polling instead of filesystem events.")):
+    from ctxvault.core import sync as watcher
+
+    try:
+        progress = IndexProgress()
+        indexed_files, deleted_files, skipped_files = vault.index_files(vault_name=name, progress=progress)
+        typer.secho(f"Initial sync: {len(indexed_files)} indexed, {progress.files_unchanged} unchanged, {len(deleted_files)} deleted, {len(skipped_files)} skipped", fg=typer.colors.GREEN, bold=True)
+
+        vault_config = vault.get_vault_config(name)
+        typer.echo(f"Watching {vault_config['vault_path']} for changes (Ctrl+C to stop)...")
+
+        for changed_paths in watcher.watch(vault_path=Path(vault_config["vault_path"]), 
+                                           exclude_dirs=[Path(vault_config["db_path"])], 
+                                           debounce_ms=debounce, 
+                                           force_polling=poll):
+            # A batch that fails, e.g. on a locked file, must not stop the watcher.
+            try:
+                indexed_files, deleted_files, skipped_files = vault.sync_files(vault_name=name, paths=changed_paths)
+            except Exception as e:
+                typer.secho(f"Error syncing {len(changed_paths)} changed paths: {e}", fg=typer.colors.RED)
+                continue
+
+            for file in indexed_files:
+                typer.secho(f"Indexed: {file}", fg=typer.colors.GREEN)
+
+            for file in deleted_files:
+                typer.secho(f"Deleted: {file}", fg=typer.colors.RED)
+
+            for file in skipped_files:
+                typer.secho(f"Skipped: {file}", fg=typer.colors.YELLOW)
+    except KeyboardInterrupt:
+        typer.echo("Sync stopped.")
+    except Exception as e:
+        typer.secho(f"Error during sync: {e}", fg=typer.colors.RED, bold=True)
+        raise typer.Exit(1)
 
 @app.command()
 def vaults():
@@ -105,13 +203,24 @@ def vaults():
         typer.echo(f">{v}")
 
 @app.command()
-def docs(name: str = typer.Argument("my-vault")):
-    documents = vault.list_documents(vault_name=name)
+def docs(name: str = typer.Argument("my-vault"), 
+         prefix: str = typer.Option(None, "--prefix", help="Only documents whose path starts with this, absolute or relative to the vault."), 
+         sort: str = typer.Option("source", "--sort", help="source, indexed_at, chunks_count or size."), 
+         descending: bool = typer.Option(False, "--desc", help="Sort in descending order."), 
+         limit: int = typer.Option(None, "--limit", help="Show at most this many documents.")):
+    from itertools import islice
 
-    typer.secho(f"\nFound {len(documents)} documents\n", fg=typer.colors.GREEN, bold=True)
-
-    for i in range(len(documents)):
-        typer.echo(f"{i+1}. {documents[i].source} ({documents[i].chunks_count} chunks)")
+    try:
+        total = vault.count_documents(vault_name=name, prefix=prefix)
+        # Documents are read from the catalog one page at a time, as they are printed.
+        documents = vault.iter_documents(vault_name=name, prefix=prefix, sort=sort, descending=descending)
+        typer.secho(f"\nFound {total} documents\n", fg=typer.colors.GREEN, bold=True)
+
+        for i, document in enumerate(islice(documents, limit)):
+            typer.echo(f"{i+1}. {document.source} ({document.chunks_count} chunks)")
+    except (VaultNotFoundError, InvalidQueryError) as e:
+        typer.secho(f"Error listing documents: {e}", fg=typer.colors.RED, bold=True)
+        raise typer.Exit(1)
 
 def main():
     app()
@@ -0,0 +1,70 @@
+from concurrent.futures import Future
+from typing import Callable
+import queue
+import threading
+import time
+
+_STOP = object()
+
+class EmbeddingBatcher:
+    """Background micro-batcher for query embeddings.
+
+    Texts submitted from any thread are collected for up to window_ms after the
+    first one arrives, or until max_batch_size texts are waiting, and are then
+    encoded with a single call to embed. Each caller gets its own row back.
+    """
+
+    def __init__(self, embed: Callable[[list[str]], list], window_ms: float, max_batch_size: int):
+        self.window_ms = window_ms
+        self.max_batch_size = max(max_batch_size, 1)
+        self._embed = embed
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ctxvault-query-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str)-> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str):
+        return self.submit(text).result()
+
+    def stop(self)-> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self)-> tuple[list[tuple[str, Future]], bool]:
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.window_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self)-> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if not batch:
+                continue
+            try:
+                vectors = self._embed([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
@@ -1,13 +1,44 @@
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from ctxvault.core import embedding_backends
+from ctxvault.core.embedding_backends import EmbeddingBackend
+from ctxvault.core.identifiers import get_chunk_hash
+from ctxvault.storage.embedding_cache import EmbeddingCache
+from ctxvault.utils import config
 
-MODEL: SentenceTransformer = None
+CACHE: EmbeddingCache = None
 
-def get_model():
-    global MODEL
-    if MODEL is None:
-        MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-    return MODEL
+def get_backend(vault_config: dict | None = None)-> EmbeddingBackend:
+    settings = config.get_embedding(vault_config=vault_config or {})
+    return embedding_backends.get_backend(name=settings["embedding_backend"], model_name=settings["embedding_model"])
 
-def embed_list(chunks: list[str])-> list[list[float]]:
-    embeddings = get_model().encode(sentences=chunks)
-    return embeddings
\ No newline at end of file
+def count_tokens(texts: list[str], vault_config: dict | None = None)-> list[int]:
+    return get_backend(vault_config=vault_config).count_tokens(texts)
+
+def get_cache()-> EmbeddingCache | None:
+    global CACHE
+    if CACHE is None:
+        max_entries = config.get_settings()["embedding_cache_size"]
+        if max_entries <= 0:
+            return None
+        CACHE = EmbeddingCache(path=config.CONFIG_DIR / "embedding_cache.sqlite3", max_entries=max_entries)
+    return CACHE
+
+def embed_list(chunks: list[str], vault_config: dict | None = None, use_cache: bool = True)-> np.ndarray:
+    """Embed chunks, going through the persistent embedding cache unless
+    use_cache is False, as for queries that have their own in-memory cache."""
+    backend = get_backend(vault_config=vault_config)
+    cache = get_cache() if use_cache else None
+    if cache is None:
+        return backend.encode(chunks)
+
+    chunk_hashes = [get_chunk_hash(text=chunk) for chunk in chunks]
+    vectors = cache.get_many(model=backend.model_id, chunk_hashes=chunk_hashes)
+
+    missing = {chunk_hash: chunk for chunk_hash, chunk in zip(chunk_hashes, chunks) if chunk_hash not in vectors}
+    if missing:
+        encoded = backend.encode(list(missing.values()))
+        new_vectors = dict(zip(missing.keys(), np.asarray(encoded, dtype=np.float32)))
+        cache.put_many(model=backend.model_id, vectors=new_vectors)
+        vectors.update(new_vectors)
+
+    return np.stack([vectors[chunk_hash] for chunk_hash in chunk_hashes])
@@ -0,0 +1,219 @@
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import platform
+import re
+import threading
+import numpy as np
+
+DEFAULT_BACKEND = "sentence-transformers"
+
+class EmbeddingBackend(ABC):
+    """A model turning batches of texts into float32 vectors.
+
+    Backends load their model lazily, on the first encode or count_tokens
+    call, so creating one is cheap. model_id identifies the vectors a backend
+    produces and keys the embedding cache and the index manifest.
+    """
+    name: str
+    default_model: str
+
+    def __init__(self, model_name: str | None = None):
+        self.model_name = model_name or self.default_model
+
+    @property
+    def model_id(self)-> str:
+        return f"{self.name}:{self.model_name}"
+
+    @property
+    @abstractmethod
+    def dimension(self)-> int:
+        ...
+
+    @abstractmethod
+    def encode(self, texts: list[str])-> np.ndarray:
+        ...
+
+    @abstractmethod
+    def count_tokens(self, texts: list[str])-> list[int]:
+        ...
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = "sentence-transformers"
+    default_model = "all-MiniLM-L6-v2"
+
+    def __init__(self, model_name: str | None = None):
+        super().__init__(model_name=model_name)
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self)-> str:
+        # Bare model name, as recorded by vaults indexed before backends existed.
+        return self.model_name
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+            return self._model
+
+    @property
+    def dimension(self)-> int:
+        return self._get_model().get_sentence_embedding_dimension()
+
+    def encode(self, texts: list[str])-> np.ndarray:
+        return np.asarray(self._get_model().encode(sentences=texts), dtype=np.float32)
+
+    def count_tokens(self, texts: list[str])-> list[int]:
+        if not texts:
+            return []
+        tokenizer = self._get_model().tokenizer
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+class OnnxBackend(EmbeddingBackend):
+    """Sentence-transformers models exported to ONNX, run with ONNX Runtime on CPU.
+
+    The ONNX graph and tokenizer are downloaded from the model repository on
+    the Hugging Face Hub. Token embeddings are mean pooled over the attention
+    mask and normalized when the model's pipeline does so.
+    """
+    name = "onnx"
+    default_model = "all-MiniLM-L6-v2"
+    model_file = "onnx/model.onnx"
+
+    def __init__(self, model_name: str | None = None):
+        super().__init__(model_name=model_name)
+        self._session = None
+        self._tokenizer = None
+        self._counter = None
+        self._normalize = True
+        self._lock = threading.Lock()
+
+    @property
+    def repo_id(self)-> str:
+        return self.model_name if "/" in self.model_name else f"sentence-transformers/{self.model_name}"
+
+    def _read_json(self, filename: str)-> dict | list | None:
+        from huggingface_hub import hf_hub_download
+        try:
+            with open(hf_hub_download(repo_id=self.repo_id, filename=filename)) as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _load(self)-> None:
+        with self._lock:
+            if self._session is not None:
+                return
+            import onnxruntime
+            from huggingface_hub import hf_hub_download
+            from tokenizers import Tokenizer
+
+            tokenizer_path = hf_hub_download(repo_id=self.repo_id, filename="tokenizer.json")
+            st_config = self._read_json("sentence_bert_config.json") or {}
+            modules = self._read_json("modules.json") or []
+
+            tokenizer = Tokenizer.from_file(tokenizer_path)
+            tokenizer.enable_truncation(max_length=st_config.get("max_seq_length", 512))
+            tokenizer.enable_padding()
+            counter = Tokenizer.from_file(tokenizer_path)
+            counter.no_truncation()
+            counter.no_padding()
+
+            self._normalize = any(module.get("type", "").endswith("Normalize") for module in modules) or not modules
+            self._tokenizer = tokenizer
+            self._counter = counter
+            self._session = onnxruntime.InferenceSession(
+                hf_hub_download(repo_id=self.repo_id, filename=self.model_file),
+                providers=["CPUExecutionProvider"]
+            )
+
+    @property
+    def dimension(self)-> int:
+        self._load()
+        dimension = self._session.get_outputs()[0].shape[-1]
+        return dimension if isinstance(dimension, int) else self.encode([""]).shape[1]
+
+    def encode(self, texts: list[str])-> np.ndarray:
+        self._load()
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        encodings = self._tokenizer.encode_batch(texts)
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        inputs = {i.name: features[i.name] for i in self._session.get_inputs() if i.name in features}
+        token_embeddings = self._session.run(None, inputs)[0]
+
+        mask = features["attention_mask"][..., None].astype(np.float32)
+        vectors = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self._normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors.astype(np.float32)
+
+    def count_tokens(self, texts: list[str])-> list[int]:
+        if not texts:
+            return []
+        self._load()
+        return [len(e.ids) for e in self._counter.encode_batch(texts, add_special_tokens=False)]
+
+class QuantizedOnnxBackend(OnnxBackend):
+    """OnnxBackend running the int8 dynamically quantized export of the model."""
+    name = "onnx-int8"
+
+    @property
+    def model_file(self)-> str:
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            return "onnx/model_qint8_arm64.onnx"
+        return "onnx/model_quint8_avx2.onnx"
+
+class HashBackend(EmbeddingBackend):
+    """Deterministic bag-of-words vectors from hashed tokens.
+
+    Needs no model download and costs almost nothing, which makes it useful
+    for tests and for trying the pipeline out. The model name is the vector
+    dimension. Texts sharing words get close vectors, but there is no
+    semantic understanding.
+    """
+    name = "hash"
+    default_model = "384"
+
+    @property
+    def dimension(self)-> int:
+        return int(self.model_name)
+
+    def encode(self, texts: list[str])-> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+                vectors[row, digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
+
+    def count_tokens(self, texts: list[str])-> list[int]:
+        return [len(text.split()) for text in texts]
+
+BACKENDS: dict[str, type[EmbeddingBackend]] = {
+    backend.name: backend
+    for backend in (SentenceTransformerBackend, OnnxBackend, QuantizedOnnxBackend, HashBackend)
+}
+
+_instances: dict[tuple[str, str], EmbeddingBackend] = {}
+_instances_lock = threading.Lock()
+
+def get_backend(name: str, model_name: str | None = None)-> EmbeddingBackend:
+    """Return the shared instance of a backend, so each model is loaded once per process."""
+    backend_class = BACKENDS[name]
+    key = (name, model_name or backend_class.default_model)
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = backend_class(model_name=key[1])
+        return _instances[key]
@@ -34,4 +34,26 @@ class PathOutsideVaultError(Exception):
 
 class FileAlreadyExistError(Exception):
     """Raised when try to write a file that already exist in the Context Vault without the overwrite flag."""
-    pass
\ No newline at end of file
+    pass
+
+class InvalidChunkingConfigError(Exception):
+    """Raised when a vault chunking configuration is not valid."""
+    pass
+
+class InvalidEmbeddingConfigError(Exception):
+    """Raised when a vault embedding backend or model is not valid."""
+    pass
+
+class InvalidQueryError(Exception):
+    """Raised when the options of a query are not valid."""
+    pass
+
+class JobNotFoundError(Exception):
+    """Raised when trying to operate with a background job that doesn't exist."""
+    pass
+
+class JobAlreadyActiveError(Exception):
+    """Raised when a vault already has a queued or running background job."""
+    def __init__(self, active_job_id: str):
+        self.active_job_id = active_job_id
+        super().__init__(f"Vault already has an active job {active_job_id}")
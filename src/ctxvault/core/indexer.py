@@ -1,21 +1,221 @@
-def index_file(file_path: str, config: dict, agent_metadata: dict | None = None)-> dict:
-    from ctxvault.utils.text_extraction import extract_text
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+import threading
+
+DEFAULT_EMBEDDING_BATCH_SIZE = 256
+
+@dataclass
+class IndexProgress:
+    """Live counters of an indexing run, readable from other threads."""
+    files_total: int = 0
+    files_done: int = 0
+    files_skipped: int = 0
+    files_unchanged: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    errors: list[str] = field(default_factory=list)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def cancelled(self)-> bool:
+        return self.cancel_event.is_set()
+
+    def skip(self, message: str)-> None:
+        self.files_done += 1
+        self.files_skipped += 1
+        self.errors.append(message)
+
+    def unchanged(self)-> None:
+        self.files_done += 1
+        self.files_unchanged += 1
+
+@dataclass
+class _PendingDocument:
+    file_path: str
+    doc_id: str
+    chunks: list[str]
+    chunk_ids: list[str]
+    metadatas: list[dict]
+    embeddings: list = field(default_factory=list)
+    remaining: int = 0
+    error: Exception | None = None
+    failed_pages: list[tuple[int, str]] = field(default_factory=list)
+
+def _prepare_document(file_path: str, text: str | Iterable[tuple[int, str]], file_type: str, config: dict, agent_metadata: dict | None = None)-> _PendingDocument:
+    """Chunk an extracted document. Paged text, (page number, text) pairs, is
+    chunked one page at a time and each chunk records its page; pages that
+    could not be extracted are kept in failed_pages."""
+    from ctxvault.core import embedding
     from ctxvault.core.identifiers import get_doc_id
-    from ctxvault.utils.chuncking import chunking
-    from ctxvault.core.embedding import embed_list
-    from ctxvault.storage.chroma_store import add_document
+    from ctxvault.utils.chuncking import chunk_text
+    from ctxvault.utils.config import get_chunking
     from ctxvault.utils.metadata_builder import build_chunks_metadatas
 
-    text, file_type = extract_text(path=file_path)
     doc_id = get_doc_id(path=file_path)
 
-    chunks = chunking(text, chunk_size=50)
+    count_tokens = lambda texts: embedding.count_tokens(texts, vault_config=config)
+    chunking = get_chunking(vault_config=config)
+    if isinstance(text, str):
+        chunks = list(chunk_text(text, filetype=file_type, count_tokens=count_tokens, **chunking))
+        pages = None
+    else:
+        chunks, pages = [], []
+        for page, page_text in text:
+            page_chunks = list(chunk_text(page_text, filetype=file_type, count_tokens=count_tokens, **chunking))
+            chunks.extend(page_chunks)
+            pages.extend([page] * len(page_chunks))
+
+    chunk_ids, metadatas = build_chunks_metadatas(doc_id=doc_id, chunks=chunks, source=file_path, filetype=file_type, agent_metadata=agent_metadata, pages=pages)
+
+    return _PendingDocument(
+        file_path=file_path,
+        doc_id=doc_id,
+        chunks=chunks,
+        chunk_ids=chunk_ids,
+        metadatas=metadatas,
+        embeddings=[None] * len(chunks),
+        remaining=len(chunks),
+        failed_pages=list(getattr(text, "failed_pages", []))
+    )
+
+def _reuse_embeddings(document: _PendingDocument, config: dict)-> int:
+    """Fill in the vectors of the chunks already stored under the same id,
+    i.e. with the same text, and return how many were reused."""
+    from ctxvault.storage.chroma_store import get_document_embeddings
+
+    stored = get_document_embeddings(doc_id=document.doc_id, config=config)
+    reused = 0
+    for i, chunk_id in enumerate(document.chunk_ids):
+        if document.embeddings[i] is None and chunk_id in stored:
+            document.embeddings[i] = stored[chunk_id]
+            document.remaining -= 1
+            reused += 1
+    return reused
+
+def _enabled(flag: bool | Callable[[str], bool], file_path: str)-> bool:
+    return flag(file_path) if callable(flag) else flag
+
+def _wants_raw_markdown(config: dict)-> bool:
+    from ctxvault.utils.config import get_chunking
+    return get_chunking(vault_config=config)["chunk_strategy"] == "markdown"
+
+def index_file(file_path: str, config: dict, agent_metadata: dict | None = None, reuse_embeddings: bool = False)-> int:
+    """Index one file in place of its previous version, if any. With
+    `reuse_embeddings`, only the chunks whose text changed are embedded."""
+    from ctxvault.utils.text_extraction import extract_text
+    from ctxvault.core.embedding import embed_list
+    from ctxvault.storage.chroma_store import replace_document
+
+    text, file_type = extract_text(path=file_path, raw_markdown=_wants_raw_markdown(config=config), stream_pages=True)
+    document = _prepare_document(file_path=file_path, text=text, file_type=file_type, config=config, agent_metadata=agent_metadata)
+
+    if reuse_embeddings:
+        _reuse_embeddings(document=document, config=config)
+    missing = [i for i, embedding in enumerate(document.embeddings) if embedding is None]
+    if missing:
+        embeddings = embed_list(chunks=[document.chunks[i] for i in missing], vault_config=config)
+        for i, embedding in zip(missing, embeddings):
+            document.embeddings[i] = embedding
+
+    replace_document(doc_id=document.doc_id, ids=document.chunk_ids, embeddings=document.embeddings, metadatas=document.metadatas, chunks=document.chunks, config=config)
+
+    return len(document.chunks)
+
+def index_files(file_paths: Iterable[str], config: dict, batch_size: int = DEFAULT_EMBEDDING_BATCH_SIZE, max_workers: int | None = None, reuse_embeddings: bool | Callable[[str], bool] = False, agent_metadata: dict | None = None, on_indexed: Callable[[str, int], None] | None = None, progress: IndexProgress | None = None)-> tuple[list[str], list[str]]:
+    """Index many files, embedding their chunks together in fixed-size batches.
+
+    Text is extracted in a process pool of `max_workers` processes and streamed
+    into the chunking stage. Chunks from consecutive files are buffered until
+    `batch_size` of them are available, embedded with a single model call and
+    then routed back to their document, which takes the place of its previous
+    chunks as soon as all of its chunks have a vector. With `reuse_embeddings`,
+    which may also be a predicate on the file path, the chunks whose text is
+    already stored keep their vector instead of being embedded again.
+    `on_indexed` is called with the path and chunk count of every stored
+    document. PDF pages that could not be extracted are reported in the skipped
+    list, while the rest of their document is indexed. When `progress` is given it is kept up to date, and
+    setting its cancel event stops the run after the documents already read
+    have been stored.
+    """
+    from ctxvault.utils.text_extraction import extract_texts
+    from ctxvault.core.embedding import embed_list
+    from ctxvault.storage.chroma_store import replace_document
+
+    indexed_files = []
+    skipped_files = []
+    progress = progress or IndexProgress()
+    pending: list[_PendingDocument] = []
+    buffer: list[tuple[_PendingDocument, int]] = []
+
+    def embed_buffer(force: bool)-> None:
+        while len(buffer) >= batch_size or (force and buffer):
+            batch = [(doc, i) for doc, i in buffer[:batch_size] if doc.error is None]
+            del buffer[:batch_size]
+            if not batch:
+                continue
+            try:
+                embeddings = embed_list(chunks=[doc.chunks[i] for doc, i in batch], vault_config=config)
+            except Exception as e:
+                for doc, _ in batch:
+                    doc.error = e
+                continue
+            for (doc, i), embedding in zip(batch, embeddings):
+                doc.embeddings[i] = embedding
+                doc.remaining -= 1
+            progress.chunks_embedded += len(batch)
+
+    def skip(file_path: str, error: Exception)-> None:
+        skipped_files.append(f"{file_path} ({error})")
+        progress.skip(message=skipped_files[-1])
+
+    def store_completed()-> None:
+        still_pending = []
+        for doc in pending:
+            if doc.error is not None:
+                skip(file_path=doc.file_path, error=doc.error)
+            elif doc.remaining == 0:
+                try:
+                    # Always a replace: the document may hold chunks under ids
+                    # it no longer produces, e.g. positional ids from older releases.
+                    replace_document(doc_id=doc.doc_id, ids=doc.chunk_ids, embeddings=doc.embeddings, metadatas=doc.metadatas, chunks=doc.chunks, config=config)
+                    indexed_files.append(doc.file_path)
+                    progress.files_done += 1
+                    if on_indexed:
+                        on_indexed(doc.file_path, len(doc.chunks))
+                except Exception as e:
+                    skip(file_path=doc.file_path, error=e)
+            else:
+                still_pending.append(doc)
+        pending[:] = still_pending
+
+    for file_path, text, file_type, error in extract_texts(paths=file_paths, max_workers=max_workers, raw_markdown=_wants_raw_markdown(config=config)):
+        if progress.cancelled:
+            break
+        try:
+            if error is not None:
+                raise error
+            doc = _prepare_document(file_path=file_path, text=text, file_type=file_type, config=config, agent_metadata=agent_metadata)
+            if _enabled(flag=reuse_embeddings, file_path=file_path):
+                progress.chunks_reused += _reuse_embeddings(document=doc, config=config)
+        except Exception as e:
+            skip(file_path=file_path, error=e)
+            continue
+
+        for page, error in doc.failed_pages:
+            skipped_files.append(f"{file_path} (page {page}: {error})")
+            progress.errors.append(skipped_files[-1])
+
+        pending.append(doc)
+        buffer.extend((doc, i) for i in range(len(doc.chunks)) if doc.embeddings[i] is None)
 
-    embeddings = embed_list(chunks=chunks)
+        if len(buffer) >= batch_size:
+            embed_buffer(force=False)
+            store_completed()
 
-    chunk_ids, metadatas = build_chunks_metadatas(doc_id=doc_id, chunks_size=len(chunks), source=file_path, filetype=file_type, agent_metadata=agent_metadata)
+    embed_buffer(force=True)
+    store_completed()
 
-    add_document(ids=chunk_ids, embeddings=embeddings, metadatas=metadatas, chunks=chunks, config=config)
+    return indexed_files, skipped_files
 
 def delete_file(file_path: str, config: dict)-> None:
     from ctxvault.core.identifiers import get_doc_id
@@ -24,6 +224,5 @@ def delete_file(file_path: str, config: dict)-> None:
     doc_id = get_doc_id(path=file_path)
     delete_document(doc_id=doc_id, config=config)
 
-def reindex_file(file_path: str, config: dict)->None:
-    delete_file(file_path=file_path, config=config)
-    index_file(file_path=file_path, config=config)
\ No newline at end of file
+def reindex_file(file_path: str, config: dict, reuse_embeddings: bool = True)-> int:
+    return index_file(file_path=file_path, config=config, reuse_embeddings=reuse_embeddings)
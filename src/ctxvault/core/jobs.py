@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import threading
+import uuid
+from ctxvault.core.exceptions import JobAlreadyActiveError, JobNotFoundError
+from ctxvault.core.indexer import IndexProgress
+from ctxvault.models.jobs import JobInfo, JobKind, JobStatus
+
+MAX_FINISHED_JOBS = 1000
+ACTIVE_STATUSES = {JobStatus.QUEUED, JobStatus.RUNNING}
+
+class _Job:
+    def __init__(self, vault_name: str, kind: JobKind, path: str | None):
+        self.job_id = uuid.uuid4().hex
+        self.vault_name = vault_name
+        self.kind = kind
+        self.path = path
+        self.status = JobStatus.QUEUED
+        self.progress = IndexProgress()
+        self.deleted_files: list[str] = []
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+
+    def info(self)-> JobInfo:
+        elapsed = ((self.finished_at or datetime.now(timezone.utc)) - self.started_at).total_seconds() if self.started_at else 0
+        return JobInfo(
+            job_id=self.job_id,
+            vault_name=self.vault_name,
+            kind=self.kind,
+            path=self.path,
+            status=self.status,
+            files_total=self.progress.files_total,
+            files_done=self.progress.files_done,
+            files_skipped=self.progress.files_skipped,
+            files_unchanged=self.progress.files_unchanged,
+            chunks_embedded=self.progress.chunks_embedded,
+            chunks_reused=self.progress.chunks_reused,
+            chunks_per_second=self.progress.chunks_embedded / elapsed if elapsed > 0 else 0.0,
+            deleted_files=list(self.deleted_files),
+            errors=list(self.progress.errors),
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at
+        )
+
+class JobManager:
+    """Runs index/reindex jobs on a worker pool, with at most one active job per vault."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ctxvault-job")
+        self._jobs: OrderedDict[str, _Job] = OrderedDict()
+        self._active_by_vault: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, vault_name: str, kind: JobKind, path: str | None = None)-> JobInfo:
+        from ctxvault.utils.config import get_vault_config
+
+        get_vault_config(vault_name)
+
+        with self._lock:
+            active_job_id = self._active_by_vault.get(vault_name)
+            if active_job_id is not None:
+                raise JobAlreadyActiveError(active_job_id=active_job_id)
+
+            job = _Job(vault_name=vault_name, kind=kind, path=path)
+            self._jobs[job.job_id] = job
+            self._active_by_vault[vault_name] = job.job_id
+            self._prune()
+
+        self._executor.submit(self._run, job)
+        return job.info()
+
+    def get(self, job_id: str)-> JobInfo:
+        return self._get(job_id=job_id).info()
+
+    def list_jobs(self)-> list[JobInfo]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.info() for job in jobs]
+
+    def cancel(self, job_id: str)-> JobInfo:
+        job = self._get(job_id=job_id)
+        with self._lock:
+            if job.status in ACTIVE_STATUSES:
+                job.progress.cancel_event.set()
+                if job.status == JobStatus.QUEUED:
+                    self._finish(job=job, status=JobStatus.CANCELLED)
+        return job.info()
+
+    def shutdown(self)-> None:
+        with self._lock:
+            for job in self._jobs.values():
+                job.progress.cancel_event.set()
+        self._executor.shutdown(wait=True)
+
+    def _get(self, job_id: str)-> _Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"Job '{job_id}' does not exist.")
+        return job
+
+    def _run(self, job: _Job)-> None:
+        from ctxvault.core import vault
+
+        with self._lock:
+            if job.status != JobStatus.QUEUED:
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+
+        try:
+            run = vault.index_files if job.kind == JobKind.INDEX else vault.reindex_files
+            _, job.deleted_files, _ = run(vault_name=job.vault_name, path=job.path, progress=job.progress)
+            status = JobStatus.CANCELLED if job.progress.cancelled else JobStatus.COMPLETED
+        except Exception as e:
+            job.progress.errors.append(str(e))
+            status = JobStatus.FAILED
+
+        with self._lock:
+            self._finish(job=job, status=status)
+
+    def _finish(self, job: _Job, status: JobStatus)-> None:
+        job.status = status
+        job.finished_at = datetime.now(timezone.utc)
+        if self._active_by_vault.get(job.vault_name) == job.job_id:
+            del self._active_by_vault[job.vault_name]
+
+    def _prune(self)-> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+_manager: JobManager | None = None
+_manager_lock = threading.Lock()
+
+def get_job_manager()-> JobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            from ctxvault.utils.config import get_settings
+            _manager = JobManager(max_workers=get_settings()["job_workers"])
+        return _manager
+
+def shutdown_job_manager()-> None:
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
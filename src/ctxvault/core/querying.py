@@ -1,38 +1,189 @@
-from ctxvault.core.embedding import embed_list
-from ctxvault.models.documents import DocumentInfo
+import json
+import threading
+from ctxvault.core import embedding
+from ctxvault.core.batching import EmbeddingBatcher
 from ctxvault.storage import chroma_store
+from ctxvault.utils.cache import TTLCache
 
-def build_documents_from_metadatas(metadatas)-> list[DocumentInfo]:
-    acc = {}
+QUERY_RESULT_KEYS = ("ids", "documents", "metadatas", "distances")
+DEFAULT_TOP_K = 5
+QUERY_MODES = ("vector", "hybrid")
+RRF_K = 60
 
-    for row in metadatas:
-        doc_id = row["doc_id"]
+_query_embeddings: TTLCache | None = None
+# One micro-batcher per embedding model while the API server runs; None when batching is off.
+_query_batchers: dict[str, EmbeddingBatcher] | None = None
+_query_batchers_lock = threading.Lock()
 
-        if doc_id not in acc:
-            acc[doc_id] = (
-                row["source"],
-                row["filetype"],
-                1
+def _get_query_embeddings_cache()-> TTLCache:
+    global _query_embeddings
+    if _query_embeddings is None:
+        from ctxvault.utils.config import get_settings
+        settings = get_settings()
+        _query_embeddings = TTLCache(max_size=settings["query_cache_size"], ttl=settings["query_cache_ttl"])
+    return _query_embeddings
+
+def start_query_batcher()-> None:
+    global _query_batchers
+    with _query_batchers_lock:
+        if _query_batchers is None:
+            _query_batchers = {}
+
+def stop_query_batcher()-> None:
+    global _query_batchers
+    with _query_batchers_lock:
+        batchers, _query_batchers = _query_batchers, None
+    for batcher in (batchers or {}).values():
+        batcher.stop()
+
+def _get_query_batcher(model_id: str, config: dict)-> EmbeddingBatcher | None:
+    with _query_batchers_lock:
+        if _query_batchers is None:
+            return None
+        if model_id not in _query_batchers:
+            from ctxvault.utils.config import get_settings
+            settings = get_settings()
+            _query_batchers[model_id] = EmbeddingBatcher(
+                embed=lambda texts: embedding.embed_list(chunks=texts, vault_config=config, use_cache=False),
+                window_ms=settings["query_batch_window_ms"],
+                max_batch_size=settings["query_batch_max_size"]
             )
-        else:
-            source, filetype, count = acc[doc_id]
-            acc[doc_id] = (source, filetype, count + 1)
-
-    return [
-        DocumentInfo(
-            doc_id=doc_id,
-            source=source,
-            filetype=filetype,
-            chunks_count=count
-        )
-        for doc_id, (source, filetype, count) in acc.items()
-    ]
-
-def query(query_txt: str, config: dict, filters: dict | None = None)-> dict:
-    query_embedding = embed_list(chunks=[query_txt])
-    return chroma_store.query(query_embedding=query_embedding, config=config, filters=filters)
-
-def list_documents(config: dict)-> list[DocumentInfo]:
-    metadatas = chroma_store.get_all_metadatas(config=config)
-    return build_documents_from_metadatas(metadatas=metadatas)
-    
\ No newline at end of file
+        return _query_batchers[model_id]
+
+def _embed_uncached_query(query_txt: str, model_id: str, config: dict):
+    batcher = _get_query_batcher(model_id=model_id, config=config)
+    if batcher is None:
+        return embedding.embed_list(chunks=[query_txt], vault_config=config, use_cache=False)
+    return [batcher.embed(query_txt)]
+
+def embed_query(query_txt: str, config: dict | None = None):
+    config = config or {}
+    model_id = embedding.get_backend(vault_config=config).model_id
+    cache = _get_query_embeddings_cache()
+    return cache.get_or_compute(
+        key=(model_id, query_txt),
+        compute=lambda: _embed_uncached_query(query_txt=query_txt, model_id=model_id, config=config)
+    )
+
+def embed_queries(query_txts: list[str], config: dict | None = None)-> list:
+    """Embed many queries for one vault, encoding every uncached text in a single model call."""
+    config = config or {}
+    model_id = embedding.get_backend(vault_config=config).model_id
+
+    def compute_many(keys: list[tuple[str, str]])-> list:
+        vectors = embedding.embed_list(chunks=[query_txt for _, query_txt in keys], vault_config=config, use_cache=False)
+        # Same shape as embed_query entries, so both share the cache.
+        return [vectors[i:i + 1] for i in range(len(keys))]
+
+    cache = _get_query_embeddings_cache()
+    return cache.get_many_or_compute(keys=[(model_id, query_txt) for query_txt in query_txts], compute_many=compute_many)
+
+def query_cache_stats()-> dict:
+    return _get_query_embeddings_cache().stats()
+
+def _candidates(mode: str, top_k: int)-> int:
+    if mode != "hybrid":
+        return top_k
+    from ctxvault.utils.config import get_settings
+    return max(top_k, get_settings()["hybrid_candidates"])
+
+def _fuse_hybrid(query_txt: str, query_embedding, vector_result: dict, config: dict, filters: dict | None, top_k: int, include: list[str] | None)-> dict:
+    """Merge the vector matches of one query with BM25 matches from the lexical
+    index using reciprocal rank fusion, and return the top_k in Chroma's shape.
+
+    Lexical-only matches are fetched from Chroma, which also applies the
+    metadata filters to them; their distance is computed from the stored
+    embedding, so every match keeps a comparable vector distance.
+    """
+    import numpy as np
+
+    include = include if include is not None else ["documents", "metadatas", "distances"]
+    vector_ids = vector_result["ids"][0]
+    with chroma_store.lease_lexical_index(config=config) as lexical:
+        lexical_hits = lexical.search(query_txt=query_txt, limit=len(vector_ids) or top_k)
+
+    fused: dict[str, float] = {}
+    for ranking in (vector_ids, [chunk_id for chunk_id, _ in lexical_hits]):
+        for rank, chunk_id in enumerate(ranking):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    rows = {
+        chunk_id: {key: vector_result[key][0][i] for key in QUERY_RESULT_KEYS[1:] if vector_result.get(key) is not None}
+        for i, chunk_id in enumerate(vector_ids)
+    }
+
+    # Fetch lexical-only matches in fused order until top_k rows are known.
+    ranked = sorted(fused, key=fused.get, reverse=True)
+    missing = [chunk_id for chunk_id in ranked[:top_k] if chunk_id not in rows]
+    while missing:
+        fetch_include = [key for key in include if key != "distances"] + (["embeddings"] if "distances" in include else [])
+        fetched = chroma_store.get_chunks(ids=missing, config=config, filters=filters, include=fetch_include)
+        for i, chunk_id in enumerate(fetched["ids"]):
+            row = {key: fetched[key][i] for key in ("documents", "metadatas") if key in fetch_include}
+            if "distances" in include:
+                difference = np.asarray(fetched["embeddings"][i], dtype=np.float32) - np.asarray(query_embedding, dtype=np.float32)
+                # Chroma collections use squared L2 distance by default.
+                row["distances"] = float(np.dot(difference, difference))
+            rows[chunk_id] = row
+        # Matches excluded by the filters are dropped; look further down the ranking.
+        ranked = [chunk_id for chunk_id in ranked if chunk_id in rows or chunk_id not in missing]
+        missing = [chunk_id for chunk_id in ranked[:top_k] if chunk_id not in rows]
+
+    top = ranked[:top_k]
+    result = {"ids": [top]}
+    for key in QUERY_RESULT_KEYS[1:]:
+        if key in include:
+            result[key] = [[rows[chunk_id][key] for chunk_id in top]]
+    return result
+
+def query(query_txt: str, config: dict, filters: dict | None = None, top_k: int = DEFAULT_TOP_K, include: list[str] | None = None, mode: str = "vector")-> dict:
+    query_embedding = embed_query(query_txt=query_txt, config=config)
+    result = chroma_store.query(query_embeddings=query_embedding, config=config, filters=filters, n_results=_candidates(mode=mode, top_k=top_k), include=include)
+    if mode == "hybrid":
+        return _fuse_hybrid(query_txt=query_txt, query_embedding=query_embedding[0], vector_result=result, config=config, filters=filters, top_k=top_k, include=include)
+    return result
+
+def query_many(queries: list[dict])-> list[dict]:
+    """Run queries given as dicts with text, config and optional filters,
+    top_k, include and mode, possibly against different vaults.
+
+    Queries embedded by the same model are encoded together, and those sharing
+    a vault, filters, top_k, include and mode are sent to Chroma as a single
+    multi-embedding query. Returns one single-query result dict per input, in order.
+    """
+    by_model: dict[str, list[int]] = {}
+    for i, q in enumerate(queries):
+        by_model.setdefault(embedding.get_backend(vault_config=q["config"]).model_id, []).append(i)
+
+    query_embeddings = [None] * len(queries)
+    for indexes in by_model.values():
+        vectors = embed_queries(query_txts=[queries[i]["text"] for i in indexes], config=queries[indexes[0]]["config"])
+        for i, vector in zip(indexes, vectors):
+            query_embeddings[i] = vector[0]
+
+    by_target: dict[tuple, list[int]] = {}
+    for i, q in enumerate(queries):
+        key = (str(q["config"]["db_path"]), json.dumps(q.get("filters"), sort_keys=True), q.get("top_k", DEFAULT_TOP_K), tuple(q.get("include") or ()), q.get("mode", "vector"))
+        by_target.setdefault(key, []).append(i)
+
+    results = [None] * len(queries)
+    for indexes in by_target.values():
+        q = queries[indexes[0]]
+        top_k = q.get("top_k", DEFAULT_TOP_K)
+        mode = q.get("mode", "vector")
+        result = chroma_store.query(query_embeddings=[query_embeddings[i] for i in indexes], 
+                                    config=q["config"], 
+                                    filters=q.get("filters"), 
+                                    n_results=_candidates(mode=mode, top_k=top_k), 
+                                    include=q.get("include"))
+        for position, i in enumerate(indexes):
+            results[i] = {key: [result[key][position]] for key in QUERY_RESULT_KEYS if result.get(key) is not None}
+            if mode == "hybrid":
+                results[i] = _fuse_hybrid(query_txt=queries[i]["text"], 
+                                          query_embedding=query_embeddings[i], 
+                                          vector_result=results[i], 
+                                          config=q["config"], 
+                                          filters=q.get("filters"), 
+                                          top_k=top_k, 
+                                          include=q.get("include"))
+    return results
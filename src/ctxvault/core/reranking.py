@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import logging
+import threading
+from ctxvault.core.identifiers import get_chunk_hash
+from ctxvault.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs with a sentence-transformers cross-encoder on CPU."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, device="cpu")
+            return self._model
+
+    def score(self, query_txt: str, texts: list[str])-> list[float]:
+        if not texts:
+            return []
+        model = self._get_model()
+        return [float(score) for score in model.predict([(query_txt, text) for text in texts], batch_size=len(texts))]
+
+_rerankers: dict[str, CrossEncoderReranker] = {}
+_scores: TTLCache | None = None
+_executor: ThreadPoolExecutor | None = None
+_failed_models: set[str] = set()
+_lock = threading.Lock()
+
+def get_reranker(model_name: str)-> CrossEncoderReranker:
+    with _lock:
+        if model_name not in _rerankers:
+            _rerankers[model_name] = CrossEncoderReranker(model_name=model_name)
+        return _rerankers[model_name]
+
+def _get_scores_cache()-> TTLCache:
+    global _scores
+    with _lock:
+        if _scores is None:
+            from ctxvault.utils.config import get_settings
+            settings = get_settings()
+            _scores = TTLCache(max_size=settings["rerank_cache_size"], ttl=settings["query_cache_ttl"])
+        return _scores
+
+def _get_executor()-> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # One cross-encoder batch at a time: it already uses every core.
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ctxvault-rerank")
+        return _executor
+
+def shutdown_reranker()-> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def score_chunks(query_txt: str, chunk_ids: list[str], texts: list[str], model_name: str)-> list[float]:
+    """Cross-encoder scores of the chunks for a query, higher is better.
+
+    Scores are cached per (model, query hash, chunk id, chunk text hash), so
+    repeated or overlapping queries only score new pairs, all in one batch.
+    """
+    reranker = get_reranker(model_name=model_name)
+    query_hash = get_chunk_hash(text=query_txt)
+    texts_by_key = {
+        (model_name, query_hash, chunk_id, get_chunk_hash(text=text)): text
+        for chunk_id, text in zip(chunk_ids, texts)
+    }
+    return _get_scores_cache().get_many_or_compute(
+        keys=list(texts_by_key),
+        compute_many=lambda keys: reranker.score(query_txt=query_txt, texts=[texts_by_key[key] for key in keys])
+    )
+
+def rerank(query_txt: str, chunk_ids: list[str], texts: list[str], model_name: str, budget_ms: float)-> list[float] | None:
+    """Score the chunks within budget_ms, or return None so the caller keeps the vector order.
+
+    Scoring that overruns the budget is not interrupted: it finishes in the
+    background and fills the score cache, which also hides the model load.
+    Scoring still queued behind another one is cancelled, so that timed out
+    requests do not pile up in front of the next ones. A reranker that fails,
+    for instance a model that cannot be downloaded, is logged once per model
+    and also returns None.
+    """
+    future = _get_executor().submit(score_chunks, query_txt=query_txt, chunk_ids=chunk_ids, texts=texts, model_name=model_name)
+    try:
+        return future.result(timeout=budget_ms / 1000)
+    except TimeoutError:
+        future.cancel()
+        return None
+    except Exception as e:
+        with _lock:
+            first_failure = model_name not in _failed_models
+            _failed_models.add(model_name)
+        if first_failure:
+            logger.warning("Reranking with %s failed, keeping the vector order: %s", model_name, e)
+        return None
@@ -0,0 +1,86 @@
+from pathlib import Path
+from typing import Iterator
+import threading
+import time
+from ctxvault.utils.text_extraction import SUPPORTED_EXT
+
+DEFAULT_DEBOUNCE_MS = 1000
+DEFAULT_POLL_INTERVAL_MS = 1000
+
+def _is_relevant(path: Path, exclude_dirs: list[Path])-> bool:
+    if any(path.is_relative_to(excl) for excl in exclude_dirs):
+        return False
+    # Removed directories have no suffix but still need their files dropped.
+    return path.suffix in SUPPORTED_EXT or not path.exists() or path.is_dir()
+
+def _make_watch_filter(exclude_dirs: list[Path]):
+    import watchfiles
+
+    # On top of watchfiles' defaults, which drop VCS and cache directories and editor swap files.
+    default_filter = watchfiles.DefaultFilter()
+
+    def watch_filter(change, path: str)-> bool:
+        return default_filter(change, path) and _is_relevant(Path(path), exclude_dirs)
+
+    return watch_filter
+
+def _watch_with_watchfiles(vault_path: Path, exclude_dirs: list[Path], debounce_ms: int, stop_event: threading.Event | None)-> Iterator[set[str]]:
+    import watchfiles
+
+    for changes in watchfiles.watch(vault_path, watch_filter=_make_watch_filter(exclude_dirs=exclude_dirs), debounce=debounce_ms, stop_event=stop_event, raise_interrupt=False):
+        yield {path for _, path in changes}
+
+def _snapshot(vault_path: Path, exclude_dirs: list[Path])-> dict[str, tuple[int, int]]:
+    from ctxvault.utils.file_walker import walk_files
+
+    return {
+        str(file): (stat.st_mtime_ns, stat.st_size)
+        for file, stat in walk_files(path=vault_path, exclude_dirs=exclude_dirs, ignore_root=vault_path)
+    }
+
+def _watch_with_polling(vault_path: Path, exclude_dirs: list[Path], debounce_ms: int, poll_interval_ms: int, stop_event: threading.Event | None)-> Iterator[set[str]]:
+    previous = _snapshot(vault_path=vault_path, exclude_dirs=exclude_dirs)
+    pending = set()
+    last_change = 0.0
+    first_change = 0.0
+
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(poll_interval_ms / 1000)
+        current = _snapshot(vault_path=vault_path, exclude_dirs=exclude_dirs)
+        changed = {path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)}
+        previous = current
+
+        now = time.monotonic()
+        if changed:
+            if not pending:
+                first_change = now
+            pending |= changed
+            last_change = now
+
+        # Flush once writes have settled, or after 10 debounce windows of continuous writes.
+        quiet = (now - last_change) * 1000 >= debounce_ms
+        overdue = (now - first_change) * 1000 >= 10 * debounce_ms
+        if pending and (quiet or overdue):
+            yield pending
+            pending = set()
+
+def watch(vault_path: Path, exclude_dirs: list[Path] | None = None, debounce_ms: int = DEFAULT_DEBOUNCE_MS, poll_interval_ms: int = DEFAULT_POLL_INTERVAL_MS, force_polling: bool = False, stop_event: threading.Event | None = None)-> Iterator[set[str]]:
+    """Yield debounced batches of changed file paths under vault_path.
+
+    Uses native filesystem events through watchfiles when it is installed and
+    falls back to polling a cached stat index otherwise. Paths inside
+    exclude_dirs and files with unsupported extensions are ignored.
+    """
+    vault_path = Path(vault_path).absolute()
+    exclude_dirs = [Path(excl).absolute() for excl in exclude_dirs or []]
+
+    if not force_polling:
+        try:
+            import watchfiles  # noqa: F401
+        except ImportError:
+            force_polling = True
+
+    if force_polling:
+        yield from _watch_with_polling(vault_path=vault_path, exclude_dirs=exclude_dirs, debounce_ms=debounce_ms, poll_interval_ms=poll_interval_ms, stop_event=stop_event)
+    else:
+        yield from _watch_with_watchfiles(vault_path=vault_path, exclude_dirs=exclude_dirs, debounce_ms=debounce_ms, stop_event=stop_event)
@@ -1,9 +1,40 @@
+from __future__ import annotations
 from pathlib import Path
-from ctxvault.models.documents import DocumentInfo
-from ctxvault.models.query_result import ChunkMatch, QueryResult
-from ctxvault.utils.config import create_vault, get_vault_config, get_vaults
-from ctxvault.core.exceptions import FileAlreadyExistError, FileOutsideVaultError, FileTypeNotPresentError, PathOutsideVaultError, UnsupportedFileTypeError
+import base64
+import json
+import os
+from typing import TYPE_CHECKING, Iterable, Iterator
+from ctxvault.utils.config import create_vault, get_chunking_signature, get_settings, get_vault_config, get_vaults, update_vault_chunking
+from ctxvault.core.exceptions import FileAlreadyExistError, FileOutsideVaultError, FileTypeNotPresentError, InvalidQueryError, PathOutsideVaultError, UnsupportedFileTypeError
 from ctxvault.utils.text_extraction import SUPPORTED_EXT
+from ctxvault.core.indexer import IndexProgress
+
+if TYPE_CHECKING:
+    # Pydantic models are imported where results are built, to keep CLI startup fast.
+    from ctxvault.models.documents import DocumentInfo
+    from ctxvault.models.query_result import QueryResult
+    from ctxvault.storage.manifest import Manifest, ManifestEntry
+
+# Chroma's database file in db_path: without it nothing was ever indexed in the vault.
+CHROMA_DB_FILE = "chroma.sqlite3"
+
+def _open_manifest(vault_config: dict)-> Manifest:
+    """Open the manifest of a vault. The first time, its catalog is seeded from
+    the chunk metadata in Chroma, for vaults indexed before the manifest existed."""
+    from ctxvault.storage.manifest import Manifest
+
+    manifest = Manifest(db_path=vault_config["db_path"])
+    if not manifest.catalog_seeded:
+        try:
+            documents = {}
+            if (Path(vault_config["db_path"]) / CHROMA_DB_FILE).exists():
+                from ctxvault.storage.chroma_store import get_document_chunk_counts
+                documents = get_document_chunk_counts(config=vault_config)
+            manifest.seed_catalog(documents=documents)
+        except Exception:
+            manifest.close()
+            raise
+    return manifest
 
 def _get_base_path(path: str, vault_path: Path)-> Path:
     if not path:
@@ -14,98 +45,319 @@ def _get_base_path(path: str, vault_path: Path)-> Path:
             raise PathOutsideVaultError(f"The path must be inside the Context Vault.")
     return base_path
 
-def init_vault(vault_name: str, path: str | None = None)-> tuple[str, str]:
+def init_vault(vault_name: str, path: str | None = None, chunking: dict | None = None, embedding: dict | None = None)-> tuple[str, str]:
 
     #TODO: check if a vault already exist in this path
-    vault_path, config_path = create_vault(vault_name=vault_name, vault_path=path)
+    vault_path, config_path = create_vault(vault_name=vault_name, vault_path=path, chunking=chunking, embedding=embedding)
     return str(vault_path), config_path
 
-def iter_files(path: Path, exclude_dirs: list[Path] | None = None):
-    if exclude_dirs is None:
-        exclude_dirs = []
+def set_chunking(vault_name: str, chunking: dict)-> tuple[dict, int]:
+    """Update the chunking settings of a vault. Returns the new settings and the
+    number of indexed files that will be re-chunked by the next index or sync."""
+    from ctxvault.core.embedding import get_backend
 
-    if path.is_file():
-        if not any(path.resolve().is_relative_to(excl) for excl in exclude_dirs):
-            yield path
-        return
+    new_chunking = update_vault_chunking(vault_name=vault_name, chunking=chunking)
+    vault_config = get_vault_config(vault_name)
 
-    for p in path.rglob("*"):
-        if not p.is_file():
-            continue
+    with _open_manifest(vault_config=vault_config) as manifest:
+        outdated = manifest.count_outdated(embedding_model=get_backend(vault_config=vault_config).model_id, chunking=get_chunking_signature(vault_config=vault_config))
 
-        if any(p.resolve().is_relative_to(excl) for excl in exclude_dirs):
-            continue
+    return new_chunking, outdated
 
-        yield p
+def iter_files(path: Path, exclude_dirs: list[Path] | None = None, ignore_root: Path | None = None):
+    """Yield the supported files under path, see walk_files."""
+    from ctxvault.utils.file_walker import walk_files
 
-def index_files(vault_name: str, path: str | None = None)-> tuple[list[str], list[str]]:
-    vault_config = get_vault_config(vault_name)
+    for file, _ in walk_files(path=path, exclude_dirs=exclude_dirs, ignore_root=ignore_root):
+        yield file
+
+def _walk_vault(path: Path, vault_config: dict):
+    from ctxvault.utils.file_walker import walk_files
+
+    return walk_files(path=path, exclude_dirs=[Path(vault_config["db_path"])], ignore_root=vault_config["vault_path"])
+
+def _index_changed_files(vault_config: dict, files: Iterable[tuple[Path, os.stat_result | None]], check_target, progress: IndexProgress | None = None)-> tuple[list[str], list[str]]:
+    from ctxvault.core import indexer
+    from ctxvault.core.embedding import get_backend
+
+    skipped_files = []
+    pending_entries = {}
+    # Stored vectors are only reused when they come from the current model.
+    same_model = set()
+    chunking = get_chunking_signature(vault_config=vault_config)
+    model_id = get_backend(vault_config=vault_config).model_id
+    progress = progress or IndexProgress()
+
+    with _open_manifest(vault_config=vault_config) as manifest:
+        def changed_files():
+            for seen, (file, stat) in enumerate(files, start=1):
+                if progress.cancelled:
+                    return
+                # Only grows past the counted total for files created during the run.
+                progress.files_total = max(progress.files_total, seen)
+                try:
+                    check_target(file_path=file, vault_config=vault_config)
+                    entry = manifest.changed_entry(path=str(file), embedding_model=model_id, chunking=chunking, stat=stat)
+                except Exception as e:
+                    skipped_files.append(f"{str(file)} ({e})")
+                    progress.skip(message=skipped_files[-1])
+                    continue
+
+                if entry is None:
+                    progress.unchanged()
+                    continue
+
+                pending_entries[str(file)] = entry
+                current = manifest.get(path=str(file))
+                if current is not None and current.embedding_model == model_id:
+                    same_model.add(str(file))
+                yield str(file)
+
+        def record(file_path: str, chunks_count: int):
+            manifest.mark_indexed(entry=pending_entries.pop(file_path), chunks_count=chunks_count)
+
+        settings = get_settings()
+        indexed_files, failed_files = indexer.index_files(file_paths=changed_files(), 
+                                                          config=vault_config, 
+                                                          batch_size=settings["embedding_batch_size"], 
+                                                          max_workers=settings["extraction_workers"], 
+                                                          reuse_embeddings=lambda file_path: file_path in same_model, 
+                                                          on_indexed=record, 
+                                                          progress=progress)
+
+    return indexed_files, skipped_files + failed_files
+
+def _count_files(path: Path, vault_config: dict, progress: IndexProgress | None)-> None:
+    """Set files_total up front with a walk that does not read the files."""
+    if progress is not None:
+        progress.files_total = sum(1 for _ in _walk_vault(path=path, vault_config=vault_config))
+
+def _delete_vanished_files(vault_config: dict, base_path: Path)-> list[str]:
+    from ctxvault.core import indexer
 
+    deleted_files = []
+
+    with _open_manifest(vault_config=vault_config) as manifest:
+        for file_path in manifest.paths_under(base_path=base_path):
+            if not Path(file_path).exists():
+                indexer.delete_file(file_path=file_path, config=vault_config)
+                manifest.remove(path=file_path)
+                deleted_files.append(file_path)
+
+    return deleted_files
+
+def index_files(vault_name: str, path: str | None = None, progress: IndexProgress | None = None)-> tuple[list[str], list[str], list[str]]:
+    """Index the new or modified files under path and delete the chunks of
+    the files that no longer exist. Returns the indexed, deleted and skipped files."""
+    vault_config = get_vault_config(vault_name)
     vault_path = Path(vault_config["vault_path"])
-    db_path = Path(vault_config["db_path"])
 
     base_path = _get_base_path(path=path, vault_path=vault_path)
-    
-    indexed_files = []
-    skipped_files = []
 
-    for file in iter_files(path=base_path, exclude_dirs=[db_path]):
-        try:
-            index_file(file_path=file, vault_config=vault_config)
-            indexed_files.append(str(file))
-        except Exception as e:
-            skipped_files.append(f"{str(file)} ({e})")
+    _count_files(path=base_path, vault_config=vault_config, progress=progress)
+    files = _walk_vault(path=base_path, vault_config=vault_config)
+    indexed_files, skipped_files = _index_changed_files(vault_config=vault_config, files=files, check_target=_check_index_target, progress=progress)
+    deleted_files = []
+    if not (progress and progress.cancelled):
+        deleted_files = _delete_vanished_files(vault_config=vault_config, base_path=base_path)
 
-    return indexed_files, skipped_files
+    return indexed_files, deleted_files, skipped_files
 
-def index_file(file_path:Path, vault_config: dict, agent_metadata: dict | None = None)-> None:
-    from ctxvault.core import indexer
+def sync_files(vault_name: str, paths: Iterable[str])-> tuple[list[str], list[str], list[str]]:
+    """Bring the given paths in sync with the vault: index new or modified
+    files and delete the chunks of files or directories that no longer exist."""
+    vault_config = get_vault_config(vault_name)
+
+    existing_files = []
+    deleted_files = []
+    for path in sorted(set(paths)):
+        path = Path(path)
+        if path.exists():
+            existing_files.extend(_walk_vault(path=path, vault_config=vault_config))
+        else:
+            deleted_files.extend(_delete_vanished_files(vault_config=vault_config, base_path=path))
 
+    indexed_files, skipped_files = _index_changed_files(vault_config=vault_config, files=existing_files, check_target=_check_index_target)
+
+    return indexed_files, deleted_files, skipped_files
+
+def _check_index_target(file_path: Path, vault_config: dict)-> None:
     if file_path.suffix not in SUPPORTED_EXT:
         raise UnsupportedFileTypeError("File type not supported.")
 
     if not file_path.resolve().is_relative_to(Path(vault_config["vault_path"])):
         raise FileOutsideVaultError("The file to index is outside the Context Vault.")
 
-    indexer.index_file(file_path=str(file_path), config=vault_config, agent_metadata=agent_metadata)
+def index_file(file_path:Path, vault_config: dict, agent_metadata: dict | None = None)-> None:
+    from ctxvault.core import indexer
+
+    _check_index_target(file_path=file_path, vault_config=vault_config)
+
+    # Taken before the file is read: an edit made while it is indexed makes the next run index it again.
+    entry = _manifest_entry(file_path=file_path, vault_config=vault_config)
+    chunks_count = indexer.index_file(file_path=str(file_path), config=vault_config, agent_metadata=agent_metadata, reuse_embeddings=_has_current_embeddings(file_path=file_path, vault_config=vault_config))
+    _record_in_manifest(entry=entry, vault_config=vault_config, chunks_count=chunks_count)
+
+def _has_current_embeddings(file_path: Path, vault_config: dict)-> bool:
+    from ctxvault.core.embedding import get_backend
+
+    with _open_manifest(vault_config=vault_config) as manifest:
+        current = manifest.get(path=str(file_path))
+    return current is not None and current.embedding_model == get_backend(vault_config=vault_config).model_id
+
+def _manifest_entry(file_path: Path, vault_config: dict)-> ManifestEntry:
+    from ctxvault.core.embedding import get_backend
+    from ctxvault.storage.manifest import new_entry
+
+    return new_entry(path=str(file_path), embedding_model=get_backend(vault_config=vault_config).model_id, chunking=get_chunking_signature(vault_config=vault_config))
+
+def _record_in_manifest(entry: ManifestEntry, vault_config: dict, chunks_count: int)-> None:
+    with _open_manifest(vault_config=vault_config) as manifest:
+        manifest.mark_indexed(entry=entry, chunks_count=chunks_count)
+
+def _remove_from_manifest(file_path: Path, vault_config: dict)-> None:
+    with _open_manifest(vault_config=vault_config) as manifest:
+        manifest.remove(path=str(file_path))
+
+QUERY_INCLUDE = {"text": "documents", "metadata": "metadatas", "score": "distances"}
+
+def _query_options(top_k: int, include: list[str] | None, max_distance: float | None, mode: str = "vector", rerank: bool = False)-> tuple[list[str], list[str]]:
+    """Validate query options; return the projected fields and what Chroma must return for them."""
+    from ctxvault.core.querying import QUERY_MODES
+
+    include = list(QUERY_INCLUDE) if include is None else include
+    if top_k < 1:
+        raise InvalidQueryError("top_k must be at least 1.")
+    if mode not in QUERY_MODES:
+        raise InvalidQueryError(f"Unknown query mode '{mode}', expected one of {', '.join(QUERY_MODES)}.")
+    unknown = [field for field in include if field not in QUERY_INCLUDE]
+    if unknown:
+        raise InvalidQueryError(f"Unknown include fields {', '.join(unknown)}, expected any of {', '.join(QUERY_INCLUDE)}.")
+
+    chroma_include = [QUERY_INCLUDE[field] for field in include]
+    if max_distance is not None and "distances" not in chroma_include:
+        chroma_include.append("distances")
+    if rerank and "documents" not in chroma_include:
+        chroma_include.append("documents")
+    return include, chroma_include
+
+def _candidates_count(top_k: int, rerank: bool)-> int:
+    return top_k * get_settings()["rerank_oversampling"] if rerank else top_k
+
+def _rerank_result(text: str, result_dict: dict, top_k: int)-> tuple[dict, list[float] | None]:
+    """Reorder oversampled candidates by cross-encoder score and keep the top_k.
+    Falls back to the vector order, with no scores, when the latency budget is exceeded."""
+    from ctxvault.core import reranking
+    from ctxvault.core.querying import QUERY_RESULT_KEYS
+
+    settings = get_settings()
+    ids = result_dict["ids"][0]
+    scores = reranking.rerank(query_txt=text, 
+                              chunk_ids=ids, 
+                              texts=result_dict["documents"][0], 
+                              model_name=settings["rerank_model"], 
+                              budget_ms=settings["rerank_budget_ms"]) if ids else None
+
+    order = list(range(len(ids)))
+    if scores is not None:
+        order.sort(key=lambda i: scores[i], reverse=True)
+    order = order[:top_k]
+
+    reranked = {key: [[result_dict[key][0][i] for i in order]] for key in QUERY_RESULT_KEYS if result_dict.get(key) is not None}
+    return reranked, [scores[i] for i in order] if scores is not None else None
+
+def _build_query_result(text: str, result_dict: dict, include: list[str], max_distance: float | None = None, rerank_scores: list[float] | None = None)-> QueryResult:
+    from ctxvault.models.query_result import ChunkMatch, QueryResult
+
+    ids = result_dict["ids"][0]
+    documents = (result_dict.get("documents") or [[None] * len(ids)])[0]
+    metadatas = (result_dict.get("metadatas") or [[{}] * len(ids)])[0]
+    distances = (result_dict.get("distances") or [[None] * len(ids)])[0]
+
+    chunks_match = []
+    for i, (chunk_id, doc, metadata, distance) in enumerate(zip(ids, documents, metadatas, distances)):
+        if max_distance is not None and distance > max_distance:
+            continue
+
+        # Only set the projected fields, so that the API can leave the others out.
+        fields = {"chunk_id": chunk_id, "doc_id": metadata.get("doc_id", chunk_id.split("::")[0])}
+        if "text" in include:
+            fields["text"] = doc
+        if "score" in include:
+            fields["score"] = distance
+            if rerank_scores is not None:
+                fields["rerank_score"] = rerank_scores[i]
+        if "metadata" in include:
+            fields.update(
+                chunk_index=metadata["chunk_index"],
+                source=metadata["source"],
+                page=metadata.get("page"),
+                generated_by=metadata.get("generated_by"),
+                artifact_type=metadata.get("artifact_type"),
+                topic=metadata.get("topic")
+            )
+        chunks_match.append(ChunkMatch(**fields))
+    
+    return QueryResult(query=text, results=chunks_match)
 
-def query(text: str, vault_name: str, filters: dict | None = None)-> QueryResult:
+def query(text: str, vault_name: str, filters: dict | None = None, top_k: int = 5, include: list[str] | None = None, max_distance: float | None = None, mode: str = "vector", rerank: bool = False)-> QueryResult:
+    """Search a vault. mode "vector" ranks chunks by embedding distance only;
+    "hybrid" fuses them with BM25 matches from the lexical index. With rerank,
+    more candidates are fetched and reordered by a cross-encoder."""
     from ctxvault.core import querying
 
+    include, chroma_include = _query_options(top_k=top_k, include=include, max_distance=max_distance, mode=mode, rerank=rerank)
     vault_config = get_vault_config(vault_name)
 
-    result_dict = querying.query(query_txt=text, config=vault_config, filters=filters)
-    documents = result_dict["documents"][0]
-    metadatas = result_dict["metadatas"][0]
-    distances = result_dict["distances"][0]
+    result_dict = querying.query(query_txt=text, config=vault_config, filters=filters, top_k=_candidates_count(top_k=top_k, rerank=rerank), include=chroma_include, mode=mode)
+    rerank_scores = None
+    if rerank:
+        result_dict, rerank_scores = _rerank_result(text=text, result_dict=result_dict, top_k=top_k)
+    return _build_query_result(text=text, result_dict=result_dict, include=include, max_distance=max_distance, rerank_scores=rerank_scores)
 
-    chunks_match = []
-    for doc, metadata, distance in zip(documents, metadatas, distances):
-        chunks_match.append(ChunkMatch(
-            chunk_id=metadata["chunk_id"],
-            chunk_index=metadata["chunk_index"],
-            text=doc,
-            score=distance,
-            doc_id=metadata["doc_id"],
-            source=metadata["source"],
-            generated_by=metadata.get("generated_by"),
-            artifact_type=metadata.get("artifact_type"),
-            topic=metadata.get("topic")
-        ))
-    
-    return QueryResult(query=text, results=chunks_match)
+def query_batch(queries: list[dict])-> list[QueryResult]:
+    """Run several queries, given as dicts with text, vault_name and the
+    optional filters, top_k, include, max_distance, mode and rerank of query, with batched
+    embedding and Chroma calls. Results keep the input order."""
+    from ctxvault.core import querying
+
+    vault_configs = {}
+    options = []
+    for q in queries:
+        options.append(_query_options(top_k=q.get("top_k", 5), include=q.get("include"), max_distance=q.get("max_distance"), mode=q.get("mode", "vector"), rerank=q.get("rerank", False)))
+        if q["vault_name"] not in vault_configs:
+            vault_configs[q["vault_name"]] = get_vault_config(q["vault_name"])
+
+    result_dicts = querying.query_many(queries=[
+        {
+            "text": q["text"], 
+            "config": vault_configs[q["vault_name"]], 
+            "filters": q.get("filters"), 
+            "top_k": _candidates_count(top_k=q.get("top_k", 5), rerank=q.get("rerank", False)), 
+            "include": chroma_include,
+            "mode": q.get("mode", "vector")
+        }
+        for q, (_, chroma_include) in zip(queries, options)
+    ])
+
+    results = []
+    for q, result_dict, (include, _) in zip(queries, result_dicts, options):
+        rerank_scores = None
+        if q.get("rerank", False):
+            result_dict, rerank_scores = _rerank_result(text=q["text"], result_dict=result_dict, top_k=q.get("top_k", 5))
+        results.append(_build_query_result(text=q["text"], result_dict=result_dict, include=include, max_distance=q.get("max_distance"), rerank_scores=rerank_scores))
+    return results
 
 def delete_files(vault_name: str, path: str | None = None)-> tuple[list[str], list[str]]:
     vault_config = get_vault_config(vault_name)
     vault_path=Path(vault_config["vault_path"])
-    db_path = Path(vault_config["db_path"])
 
     base_path = _get_base_path(path=path, vault_path=vault_path)
 
     deleted_files = []
     skipped_files = []
 
-    for file in iter_files(path=base_path, exclude_dirs=[db_path]):
+    for file, _ in _walk_vault(path=base_path, vault_config=vault_config):
         try:
             delete_file(file_path=file, vault_config=vault_config)
             deleted_files.append(str(file))
@@ -126,29 +378,24 @@ def delete_file(file_path: Path, vault_config: dict)-> None:
         raise FileOutsideVaultError("The file to delete is already outside the Context Vault.")
     
     indexer.delete_file(file_path=str(file_path), config=vault_config)
+    _remove_from_manifest(file_path=file_path, vault_config=vault_config)
 
-def reindex_files(vault_name: str, path: str | None = None)-> tuple[list[str], list[str]]:
+def reindex_files(vault_name: str, path: str | None = None, progress: IndexProgress | None = None)-> tuple[list[str], list[str], list[str]]:
     vault_config = get_vault_config(vault_name)
     vault_path=Path(vault_config["vault_path"])
-    db_path = Path(vault_config["db_path"])
 
     base_path = _get_base_path(path=path, vault_path=vault_path)
 
-    reindexed_files = []
-    skipped_files = []
-
-    for file in iter_files(path=base_path, exclude_dirs=[db_path]):
-        try:
-            reindex_file(file_path=file, vault_config=vault_config)
-            reindexed_files.append(str(file))
-        except Exception as e:
-            skipped_files.append(f"{str(file)} ({e})")
+    _count_files(path=base_path, vault_config=vault_config, progress=progress)
+    files = _walk_vault(path=base_path, vault_config=vault_config)
+    reindexed_files, skipped_files = _index_changed_files(vault_config=vault_config, files=files, check_target=_check_reindex_target, progress=progress)
+    deleted_files = []
+    if not (progress and progress.cancelled):
+        deleted_files = _delete_vanished_files(vault_config=vault_config, base_path=base_path)
 
-    return reindexed_files, skipped_files
-
-def reindex_file(file_path: Path, vault_config: dict)-> None:
-    from ctxvault.core import indexer
+    return reindexed_files, deleted_files, skipped_files
 
+def _check_reindex_target(file_path: Path, vault_config: dict)-> None:
     if file_path.suffix not in SUPPORTED_EXT:
         raise UnsupportedFileTypeError("File type not supported.")
     
@@ -157,14 +404,105 @@ def reindex_file(file_path: Path, vault_config: dict)-> None:
     if not file_path.resolve().is_relative_to(vault_path):
         raise FileOutsideVaultError("The file to reindex is outside the Context Vault.")
 
-    indexer.reindex_file(file_path=str(file_path), config=vault_config)
-
-def list_documents(vault_name: str)-> list[DocumentInfo]:
-    from ctxvault.core import querying
+def reindex_file(file_path: Path, vault_config: dict)-> None:
+    from ctxvault.core import indexer
 
+    _check_reindex_target(file_path=file_path, vault_config=vault_config)
+
+    entry = _manifest_entry(file_path=file_path, vault_config=vault_config)
+    chunks_count = indexer.reindex_file(file_path=str(file_path), config=vault_config, reuse_embeddings=_has_current_embeddings(file_path=file_path, vault_config=vault_config))
+    _record_in_manifest(entry=entry, vault_config=vault_config, chunks_count=chunks_count)
+
+DOCS_PAGE_SIZE = 100
+
+def _document_prefix(prefix: str | None, vault_config: dict)-> str | None:
+    if not prefix or Path(prefix).is_absolute():
+        return prefix
+    return os.path.join(vault_config["vault_path"], prefix)
+
+def _list_documents_options(sort: str, limit: int | None, offset: int)-> None:
+    from ctxvault.storage.manifest import DOCUMENT_SORT_KEYS
+
+    if sort not in DOCUMENT_SORT_KEYS:
+        raise InvalidQueryError(f"Unknown sort key '{sort}', expected one of {', '.join(DOCUMENT_SORT_KEYS)}.")
+    if (limit is not None and limit < 1) or offset < 0:
+        raise InvalidQueryError("limit must be at least 1 and offset at least 0.")
+
+def _encode_cursor(key: tuple, sort: str, descending: bool, prefix: str | None)-> str:
+    payload = json.dumps({"key": list(key), "sort": sort, "descending": descending, "prefix": prefix})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_cursor(cursor: str, sort: str, descending: bool, prefix: str | None)-> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        key = tuple(payload["key"])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidQueryError("Invalid cursor.")
+    if (payload.get("sort"), payload.get("descending"), payload.get("prefix")) != (sort, descending, prefix):
+        raise InvalidQueryError("The cursor belongs to a listing with another sort order or prefix.")
+    return key
+
+def list_documents_page(vault_name: str, prefix: str | None = None, sort: str = "source", descending: bool = False, limit: int | None = DOCS_PAGE_SIZE, offset: int = 0, cursor: str | None = None)-> tuple[list[DocumentInfo], str | None]:
+    """List indexed documents from the vault catalog. prefix filters on the
+    source path and may be relative to the vault; sort is one of source,
+    indexed_at, chunks_count or size. Returns the page and the cursor of the
+    next one, to pass back with the same prefix and order, or None at the end."""
+    # Only the manifest is read: listing must not load Chroma or the models.
+    from ctxvault.models.documents import DocumentInfo
+    from ctxvault.storage.manifest import Manifest
+
+    _list_documents_options(sort=sort, limit=limit, offset=offset)
     vault_config = get_vault_config(vault_name)
-
-    return querying.list_documents(config=vault_config)
+    prefix = _document_prefix(prefix=prefix, vault_config=vault_config)
+
+    after = _decode_cursor(cursor=cursor, sort=sort, descending=descending, prefix=prefix) if cursor else None
+    with _open_manifest(vault_config=vault_config) as manifest:
+        # One extra row tells whether there is a next page.
+        entries = manifest.list_documents(prefix=prefix, sort=sort, descending=descending, limit=None if limit is None else limit + 1, offset=offset, after=after)
+
+    next_cursor = None
+    if limit is not None and len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = _encode_cursor(key=Manifest.sort_key(entry=entries[-1], sort=sort), sort=sort, descending=descending, prefix=prefix)
+
+    documents = [
+        DocumentInfo(
+            doc_id=entry.doc_id,
+            source=entry.path,
+            filetype=entry.filetype,
+            chunks_count=entry.chunks_count,
+            content_hash=entry.content_hash,
+            size=entry.size,
+            indexed_at=entry.indexed_at or None
+        )
+        for entry in entries
+    ]
+    return documents, next_cursor
+
+def list_documents(vault_name: str, prefix: str | None = None, sort: str = "source", descending: bool = False, limit: int | None = None, offset: int = 0)-> list[DocumentInfo]:
+    documents, _ = list_documents_page(vault_name=vault_name, prefix=prefix, sort=sort, descending=descending, limit=limit, offset=offset)
+    return documents
+
+def iter_documents(vault_name: str, prefix: str | None = None, sort: str = "source", descending: bool = False, page_size: int = DOCS_PAGE_SIZE)-> Iterator[DocumentInfo]:
+    """Lazily yield every matching document, reading the catalog one page at a time.
+    Options and vault are checked right away, not on the first iteration."""
+    _list_documents_options(sort=sort, limit=page_size, offset=0)
+    get_vault_config(vault_name)
+
+    def pages()-> Iterator[DocumentInfo]:
+        cursor = None
+        while True:
+            documents, cursor = list_documents_page(vault_name=vault_name, prefix=prefix, sort=sort, descending=descending, limit=page_size, cursor=cursor)
+            yield from documents
+            if cursor is None:
+                return
+
+    return pages()
+
+def count_documents(vault_name: str, prefix: str | None = None)-> int:
+    vault_config = get_vault_config(vault_name)
+    with _open_manifest(vault_config=vault_config) as manifest:
+        return manifest.count_documents(prefix=_document_prefix(prefix=prefix, vault_config=vault_config))
 
 def list_vaults()-> list[str]:
     return get_vaults()
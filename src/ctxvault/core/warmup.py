@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+import threading
+import time
+
+WARMUP_TEXT = "ctxvault warm-up"
+
+@dataclass
+class WarmupState:
+    """Progress of the startup warm-up, shared with the readiness endpoint."""
+    ready: bool = False
+    started_at: float | None = None
+    finished_at: float | None = None
+    models: list[str] = field(default_factory=list)
+    vaults: list[str] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    done_event: threading.Event = field(default_factory=threading.Event)
+
+    def finish(self)-> None:
+        self.finished_at = time.time()
+        self.ready = True
+        self.done_event.set()
+
+def warm_up(state: WarmupState, vault_names: list[str] | None = None)-> WarmupState:
+    """Load the embedding model of each vault, run one encode through it and
+    open its Chroma collection, so the first query pays none of these costs.
+
+    With vault_names None every configured vault is warmed, up to the
+    max_open_vaults collections the pool keeps open. A vault that fails is
+    recorded in state.errors and does not stop the others.
+    """
+    from ctxvault.core.embedding import get_backend
+    from ctxvault.storage import chroma_store
+    from ctxvault.utils.config import get_settings, get_vault_config, get_vaults
+
+    state.started_at = time.time()
+    try:
+        names = get_vaults() if vault_names is None else vault_names
+        names = names[:get_settings()["max_open_vaults"]]
+
+        for vault_name in names:
+            try:
+                vault_config = get_vault_config(vault_name)
+                backend = get_backend(vault_config=vault_config)
+                if backend.model_id not in state.models:
+                    # Bypass the embedding cache: the point is to load the model and run it once.
+                    backend.encode([WARMUP_TEXT])
+                    state.models.append(backend.model_id)
+                chroma_store.open_collection(config=vault_config)
+                state.vaults.append(vault_name)
+            except Exception as e:
+                state.errors.append(f"{vault_name} ({e})")
+    except Exception as e:
+        state.errors.append(str(e))
+    finally:
+        state.finish()
+
+    return state
@@ -1,7 +1,11 @@
+from datetime import datetime
 from pydantic import BaseModel
 
 class DocumentInfo(BaseModel):
     doc_id: str
     source: str
     chunks_count: int
-    filetype: str
\ No newline at end of file
+    filetype: str
+    content_hash: str | None = None
+    size: int | None = None
+    indexed_at: datetime | None = None
\ No newline at end of file
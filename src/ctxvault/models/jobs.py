@@ -0,0 +1,33 @@
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel
+
+class JobKind(str, Enum):
+    INDEX = "index"
+    REINDEX = "reindex"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class JobInfo(BaseModel):
+    job_id: str
+    vault_name: str
+    kind: JobKind
+    path: str | None = None
+    status: JobStatus
+    files_total: int
+    files_done: int
+    files_skipped: int
+    files_unchanged: int
+    chunks_embedded: int
+    chunks_reused: int
+    chunks_per_second: float
+    deleted_files: list[str] = []
+    errors: list[str]
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -2,11 +2,13 @@ from pydantic import BaseModel
 
 class ChunkMatch(BaseModel):
     chunk_id: str
-    chunk_index: int
-    text: str
-    score: float
     doc_id: str
-    source: str
+    chunk_index: int | None = None
+    text: str | None = None
+    score: float | None = None
+    rerank_score: float | None = None
+    source: str | None = None
+    page: int | None = None
     generated_by: str | None = None
     artifact_type: str | None = None
     topic: str | None = None
@@ -1,41 +1,229 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
 from chromadb import PersistentClient
+from ctxvault.storage.lexical_index import LexicalIndex
 
-_chroma_client = None
-_collection = None
-
-def get_collection(config: dict):
-    global _chroma_client, _collection
-    if _collection is None:
-        path = config["db_path"]
-        _chroma_client = PersistentClient(path=path)
-        _collection = _chroma_client.get_or_create_collection("ctxvault")
-    return _collection
-
-def add_document(ids: list[str], embeddings: list[list[float]], metadatas: list[dict], chunks: list[str], config: dict):
-    collection = get_collection(config=config)
-    collection.upsert(
-        ids=ids, 
-        embeddings=embeddings, 
-        metadatas=metadatas, 
-        documents=chunks
-    )
-
-def query(query_embedding: list[float], config: dict, n_results: int = 5, filters: dict | None = None)-> dict:
-    collection = get_collection(config=config)
-    results = collection.query(
-        query_embeddings=query_embedding,
-        n_results=n_results,
-        where=filters
-    )
-    return results
+COLLECTION_NAME = "ctxvault"
+DEFAULT_MAX_OPEN_VAULTS = 16
+
+class _PoolEntry:
+    def __init__(self, client, collection):
+        self.client = client
+        self.collection = collection
+        self.lexical: LexicalIndex | None = None
+        self.leases = 0
+        self.evicted = False
+
+class CollectionPool:
+    """LRU pool of Chroma clients and collections keyed by vault db_path.
+
+    Collections and lexical indexes are only handed out as leases. An entry
+    evicted while leased leaves the pool at once but is closed when its last
+    lease is released, so a query or upsert in progress is never cut off.
+    Filling a lexical index from the collection only holds a lock of its
+    vault, not the pool lock.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_OPEN_VAULTS):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._lexical_locks: dict[str, threading.Lock] = {}
+
+    def _get_entry(self, db_path: str)-> _PoolEntry:
+        entry = self._entries.get(db_path)
+        if entry is not None:
+            self._entries.move_to_end(db_path)
+            return entry
+
+        client = PersistentClient(path=db_path)
+        entry = _PoolEntry(client=client, collection=client.get_or_create_collection(COLLECTION_NAME))
+        self._entries[db_path] = entry
+        self._evict()
+        return entry
+
+    def open(self, db_path: str)-> None:
+        with self._lock:
+            self._get_entry(db_path)
+
+    @contextmanager
+    def _lease_entry(self, db_path: str):
+        with self._lock:
+            entry = self._get_entry(db_path)
+            entry.leases += 1
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                if entry.evicted and entry.leases == 0:
+                    _close_entry(entry)
+
+    @contextmanager
+    def lease(self, db_path: str):
+        with self._lease_entry(db_path) as entry:
+            yield entry.collection
+
+    @contextmanager
+    def lease_lexical(self, db_path: str):
+        with self._lease_entry(db_path) as entry:
+            yield self._get_lexical(entry=entry, db_path=db_path)
+
+    def _get_lexical(self, entry: _PoolEntry, db_path: str)-> LexicalIndex:
+        if entry.lexical is not None:
+            return entry.lexical
+        with self._lock:
+            lexical_lock = self._lexical_locks.setdefault(db_path, threading.Lock())
+
+        with lexical_lock:
+            if entry.lexical is None:
+                lexical = LexicalIndex(db_path=db_path)
+                try:
+                    if not lexical.backfilled:
+                        _backfill_lexical(collection=entry.collection, lexical=lexical)
+                except BaseException:
+                    lexical.close()
+                    raise
+                entry.lexical = lexical
+            return entry.lexical
+
+    def resize(self, max_size: int)-> None:
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def close(self, db_path: str | None = None)-> None:
+        with self._lock:
+            if db_path is None:
+                while self._entries:
+                    _, entry = self._entries.popitem(last=False)
+                    _retire_entry(entry)
+                return
+
+            entry = self._entries.pop(db_path, None)
+            if entry is not None:
+                _retire_entry(entry)
+
+    def open_paths(self)-> list[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def _evict(self)-> None:
+        while len(self._entries) > max(self.max_size, 1):
+            _, entry = self._entries.popitem(last=False)
+            _retire_entry(entry)
+
+def _retire_entry(entry: _PoolEntry)-> None:
+    entry.evicted = True
+    if entry.leases == 0:
+        _close_entry(entry)
+
+def _close_entry(entry: _PoolEntry)-> None:
+    if entry.lexical is not None:
+        entry.lexical.close()
+    # Client.close() only exists on recent chromadb releases.
+    close = getattr(entry.client, "close", None)
+    if callable(close):
+        close()
+
+def _backfill_lexical(collection, lexical: LexicalIndex, page_size: int = 1000)-> None:
+    """Fill a lexical index from the chunks of a vault indexed before it existed.
+    Adding a chunk again replaces it, so an interrupted backfill is just rerun."""
+    total = collection.count()
+    offset = 0
+    while offset < total:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        lexical.add(chunk_ids=page["ids"], doc_ids=[metadata["doc_id"] for metadata in page["metadatas"]], chunks=page["documents"])
+        offset += len(page["ids"])
+    lexical.mark_backfilled()
+
+def get_document_chunk_counts(config: dict, page_size: int = 1000)-> dict[str, int]:
+    """Count the chunks of every source in a vault, reading the metadata page by page."""
+    counts = {}
+    with lease_collection(config=config) as collection:
+        total = collection.count()
+        offset = 0
+        while offset < total:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            for metadata in page["metadatas"]:
+                counts[metadata["source"]] = counts.get(metadata["source"], 0) + 1
+            offset += len(page["ids"])
+    return counts
+
+_pool = CollectionPool()
+
+def _db_path(config: dict)-> str:
+    db_path = str(config["db_path"])
+    if db_path not in _pool.open_paths():
+        from ctxvault.utils.config import get_settings
+        _pool.resize(get_settings()["max_open_vaults"])
+    return db_path
+
+def open_collection(config: dict)-> None:
+    _pool.open(_db_path(config=config))
+
+def lease_collection(config: dict):
+    return _pool.lease(_db_path(config=config))
+
+def lease_lexical_index(config: dict):
+    return _pool.lease_lexical(_db_path(config=config))
+
+def query(query_embeddings: list[list[float]], config: dict, n_results: int = 5, filters: dict | None = None, include: list[str] | None = None)-> dict:
+    with lease_collection(config=config) as collection:
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=filters,
+            include=include if include is not None else ["documents", "metadatas", "distances"]
+        )
 
 def delete_document(doc_id: str, config: dict):
-    collection = get_collection(config=config)
-    collection.delete(
-        where={"doc_id": doc_id}
-    )
-
-def get_all_metadatas(config: dict):
-    collection = get_collection(config=config)
-    results = collection.get(include=["metadatas"])
-    return results["metadatas"]
\ No newline at end of file
+    with lease_collection(config=config) as collection:
+        collection.delete(
+            where={"doc_id": doc_id}
+        )
+    with lease_lexical_index(config=config) as lexical:
+        lexical.delete_document(doc_id=doc_id)
+
+def get_document_embeddings(doc_id: str, config: dict)-> dict[str, list[float]]:
+    """Map the chunk ids stored for a document to their embeddings."""
+    with lease_collection(config=config) as collection:
+        result = collection.get(where={"doc_id": doc_id}, include=["embeddings"])
+    embeddings = result.get("embeddings")
+    if embeddings is None:
+        return {}
+    return {
+        chunk_id: embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+        for chunk_id, embedding in zip(result["ids"], embeddings)
+    }
+
+def replace_document(doc_id: str, ids: list[str], embeddings: list[list[float]], metadatas: list[dict], chunks: list[str], config: dict):
+    """Replace the chunks of a document with a new set, touching only what changed.
+
+    Chroma has no transactions: the new chunks are upserted first and only
+    then are the vanished ones deleted, so queries never find the document
+    missing. The lexical index swaps the whole document in one transaction.
+    """
+    with lease_collection(config=config) as collection:
+        previous_ids = collection.get(where={"doc_id": doc_id}, include=[])["ids"]
+        if ids:
+            collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                documents=chunks
+            )
+        vanished = list(set(previous_ids) - set(ids))
+        if vanished:
+            collection.delete(ids=vanished)
+    with lease_lexical_index(config=config) as lexical:
+        lexical.replace_document(doc_id=doc_id, chunk_ids=ids, chunks=chunks)
+
+def get_chunks(ids: list[str], config: dict, filters: dict | None = None, include: list[str] | None = None)-> dict:
+    with lease_collection(config=config) as collection:
+        return collection.get(ids=ids, where=filters, include=include if include is not None else ["documents", "metadatas"])
@@ -0,0 +1,111 @@
+from pathlib import Path
+import sqlite3
+import threading
+import time
+import numpy as np
+
+# Hits whose last_used update is deferred before they are written in one batch.
+TOUCH_BATCH_SIZE = 512
+
+class EmbeddingCache:
+    """Persistent cache of chunk embeddings keyed by (model name, sha256 of the chunk text).
+
+    Vectors are stored as float32 blobs in a SQLite database in WAL mode, so
+    several API worker processes can read it concurrently while one writes.
+    When the cache grows past max_entries the least recently used rows are
+    evicted. Reads do not write: the last_used time of hits is kept in memory
+    and written in batches, at the latest with the next put. The row count is
+    tracked as rows are added and only recounted when it reaches max_entries.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, chunk_hash)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Upper bound of the row count: replaced rows and other writers are only seen on recount.
+        self._rows = self._count()
+        self._touched: dict[tuple[str, str], float] = {}
+
+    def close(self)-> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    def _count(self)-> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _flush_touched(self)-> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND chunk_hash = ?",
+                [(last_used, model, chunk_hash) for (model, chunk_hash), last_used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def get_many(self, model: str, chunk_hashes: list[str])-> dict[str, np.ndarray]:
+        found = {}
+        unique_hashes = list(dict.fromkeys(chunk_hashes))
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM embeddings WHERE model = ? AND chunk_hash IN ({placeholders})",
+                    (model, *batch)
+                )
+                for chunk_hash, vector in rows:
+                    found[chunk_hash] = np.frombuffer(vector, dtype=np.float32)
+
+            now = time.time()
+            self._touched.update(((model, chunk_hash), now) for chunk_hash in found)
+            if len(self._touched) >= TOUCH_BATCH_SIZE:
+                self._flush_touched()
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, np.ndarray])-> None:
+        if not vectors or self.max_entries <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                [(model, chunk_hash, np.asarray(vector, dtype=np.float32).tobytes(), now) for chunk_hash, vector in vectors.items()]
+            )
+            self._rows += len(vectors)
+            if self._rows > self.max_entries:
+                self._flush_touched()
+                self._evict()
+            self._conn.commit()
+
+    def __len__(self)-> int:
+        with self._lock:
+            return self._count()
+
+    def _evict(self)-> None:
+        """Trim the cache to 90% of max_entries once it is over, so that the
+        following puts do not have to count the rows again."""
+        count = self._count()
+        if count > self.max_entries:
+            target = self.max_entries - self.max_entries // 10
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - target,)
+            )
+            count = target
+        self._rows = count
@@ -0,0 +1,107 @@
+from pathlib import Path
+import re
+import sqlite3
+import threading
+
+LEXICAL_INDEX_FILENAME = "ctxvault_lexical.sqlite3"
+TERM = re.compile(r"\w+")
+
+class LexicalIndex:
+    """BM25 full-text index of the chunks of one vault.
+
+    It is an SQLite FTS5 table stored in the vault db_path next to the Chroma
+    database, updated on every chunk upsert and delete, so it never has to be
+    rebuilt at startup. Underscores are token characters, so identifiers such
+    as ERR_CONN_RESET or parse_config are matched as a whole.
+    """
+
+    def __init__(self, db_path: str | Path):
+        path = Path(db_path) / LEXICAL_INDEX_FILENAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE,
+                doc_id TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_doc_id ON chunks (doc_id)")
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunks_text USING fts5(text, tokenize=\"unicode61 tokenchars '_'\")")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    @property
+    def backfilled(self)-> bool:
+        """Whether the chunks stored before the index existed have all been added,
+        recorded only once the backfill completed so that an interrupted one is redone."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM meta WHERE key = 'backfilled'").fetchone() is not None
+
+    def mark_backfilled(self)-> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+            self._conn.commit()
+
+    def close(self)-> None:
+        with self._lock:
+            self._conn.close()
+
+    def _delete_rows(self, rowids: list[int])-> None:
+        self._conn.executemany("DELETE FROM chunks_text WHERE rowid = ?", [(rowid,) for rowid in rowids])
+        self._conn.executemany("DELETE FROM chunks WHERE rowid = ?", [(rowid,) for rowid in rowids])
+
+    def _insert_rows(self, chunk_ids: list[str], doc_ids: list[str], chunks: list[str])-> None:
+        for chunk_id, doc_id, text in zip(chunk_ids, doc_ids, chunks):
+            rowid = self._conn.execute("INSERT INTO chunks (chunk_id, doc_id) VALUES (?, ?)", (chunk_id, doc_id)).lastrowid
+            self._conn.execute("INSERT INTO chunks_text (rowid, text) VALUES (?, ?)", (rowid, text))
+
+    def add(self, chunk_ids: list[str], doc_ids: list[str], chunks: list[str])-> None:
+        with self._lock:
+            rowids = []
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rowids.extend(row[0] for row in self._conn.execute(f"SELECT rowid FROM chunks WHERE chunk_id IN ({placeholders})", batch))
+            self._delete_rows(rowids=rowids)
+            self._insert_rows(chunk_ids=chunk_ids, doc_ids=doc_ids, chunks=chunks)
+            self._conn.commit()
+
+    def replace_document(self, doc_id: str, chunk_ids: list[str], chunks: list[str])-> None:
+        """Swap all the chunks of a document in one transaction, so searches
+        see either the old or the new version of it."""
+        with self._lock:
+            rowids = [row[0] for row in self._conn.execute("SELECT rowid FROM chunks WHERE doc_id = ?", (doc_id,))]
+            self._delete_rows(rowids=rowids)
+            self._insert_rows(chunk_ids=chunk_ids, doc_ids=[doc_id] * len(chunk_ids), chunks=chunks)
+            self._conn.commit()
+
+    def delete_document(self, doc_id: str)-> None:
+        with self._lock:
+            rowids = [row[0] for row in self._conn.execute("SELECT rowid FROM chunks WHERE doc_id = ?", (doc_id,))]
+            self._delete_rows(rowids=rowids)
+            self._conn.commit()
+
+    def search(self, query_txt: str, limit: int)-> list[tuple[str, float]]:
+        """Return up to limit (chunk_id, bm25) pairs matching any query term, best first.
+
+        FTS5 bm25 scores are negative: the lower, the better the match.
+        """
+        terms = list(dict.fromkeys(term.lower() for term in TERM.findall(query_txt)))
+        if not terms:
+            return []
+
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            return self._conn.execute(
+                """SELECT chunks.chunk_id, bm25(chunks_text) AS score
+                FROM chunks_text JOIN chunks ON chunks.rowid = chunks_text.rowid
+                WHERE chunks_text MATCH ? ORDER BY score LIMIT ?""",
+                (match, limit)
+            ).fetchall()
+
+    def __len__(self)-> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
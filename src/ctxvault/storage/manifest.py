@@ -0,0 +1,209 @@
+from dataclasses import dataclass, replace
+from pathlib import Path
+import os
+import sqlite3
+import time
+from ctxvault.core.identifiers import get_content_hash, get_doc_id
+
+MANIFEST_FILE = "ctxvault_manifest.sqlite3"
+DOCUMENT_SORT_KEYS = ("source", "indexed_at", "chunks_count", "size")
+COLUMNS = "path, size, mtime_ns, content_hash, chunks_count, embedding_model, chunking, doc_id, filetype, indexed_at"
+
+@dataclass
+class ManifestEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    chunks_count: int = 0
+    embedding_model: str = ""
+    chunking: str = ""
+    doc_id: str = ""
+    filetype: str = ""
+    indexed_at: float = 0.0
+
+    def __post_init__(self):
+        self.doc_id = self.doc_id or get_doc_id(path=self.path)
+        self.filetype = self.filetype or Path(self.path).suffix
+
+def new_entry(path: str, embedding_model: str, chunking: str, stat: os.stat_result | None = None, content_hash: str | None = None)-> ManifestEntry:
+    """Entry for the current state of a file, from stat when the caller already has it."""
+    stat = stat or os.stat(path)
+    return ManifestEntry(
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=content_hash or get_content_hash(path=path),
+        embedding_model=embedding_model,
+        chunking=chunking
+    )
+
+class Manifest:
+    """Per-vault record of the indexed state of every file, stored in db_path.
+
+    It doubles as the document catalog of the vault: listing documents reads
+    this table instead of the metadata of every chunk in Chroma.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self._conn = sqlite3.connect(Path(db_path) / MANIFEST_FILE)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunks_count INTEGER NOT NULL,
+                embedding_model TEXT NOT NULL,
+                chunking TEXT NOT NULL DEFAULT '',
+                doc_id TEXT NOT NULL DEFAULT '',
+                filetype TEXT NOT NULL DEFAULT '',
+                indexed_at REAL NOT NULL DEFAULT 0
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+        for column, definition in (("chunking", "TEXT NOT NULL DEFAULT ''"), ("doc_id", "TEXT NOT NULL DEFAULT ''"), ("filetype", "TEXT NOT NULL DEFAULT ''"), ("indexed_at", "REAL NOT NULL DEFAULT 0")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE files ADD COLUMN {column} {definition}")
+        # Manifests written before the catalog columns existed.
+        missing = [row[0] for row in self._conn.execute("SELECT path FROM files WHERE doc_id = ''")]
+        self._conn.executemany("UPDATE files SET doc_id = ?, filetype = ? WHERE path = ?", [(get_doc_id(path=path), Path(path).suffix, path) for path in missing])
+        for column in ("indexed_at", "chunks_count", "size"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS files_{column} ON files ({column}, path)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self)-> None:
+        self._conn.close()
+
+    def get(self, path: str)-> ManifestEntry | None:
+        row = self._conn.execute(f"SELECT {COLUMNS} FROM files WHERE path = ?", (path,)).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def upsert(self, entry: ManifestEntry)-> None:
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO files ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry.path, entry.size, entry.mtime_ns, entry.content_hash, entry.chunks_count, entry.embedding_model, entry.chunking, entry.doc_id, entry.filetype, entry.indexed_at)
+        )
+        self._conn.commit()
+
+    def mark_indexed(self, entry: ManifestEntry, chunks_count: int)-> None:
+        self.upsert(replace(entry, chunks_count=chunks_count, indexed_at=time.time()))
+
+    @property
+    def catalog_seeded(self)-> bool:
+        return self._conn.execute("SELECT 1 FROM meta WHERE key = 'catalog_seeded'").fetchone() is not None
+
+    def seed_catalog(self, documents: dict[str, int])-> None:
+        """Add the documents of a vault indexed before its manifest existed, as
+        source path -> chunk count, and mark the catalog as seeded, in one
+        transaction. They have no content hash or embedding model, so the next
+        index run re-embeds them."""
+        entries = []
+        for path, chunks_count in documents.items():
+            try:
+                stat = os.stat(path)
+                size, mtime_ns = stat.st_size, stat.st_mtime_ns
+            except OSError:
+                size, mtime_ns = 0, 0
+            entries.append(ManifestEntry(path=path, size=size, mtime_ns=mtime_ns, content_hash="", chunks_count=chunks_count))
+        self._conn.executemany(
+            f"INSERT OR IGNORE INTO files ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(entry.path, entry.size, entry.mtime_ns, entry.content_hash, entry.chunks_count, entry.embedding_model, entry.chunking, entry.doc_id, entry.filetype, entry.indexed_at) for entry in entries]
+        )
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('catalog_seeded', '1')")
+        self._conn.commit()
+
+    def remove(self, path: str)-> None:
+        self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self._conn.commit()
+
+    @staticmethod
+    def _prefix_filter(prefix: str | None)-> tuple[list[str], list]:
+        if not prefix:
+            return [], []
+        # A range on the primary key instead of LIKE, which would not use the index.
+        return ["path >= ?", "path < ?"], [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+
+    def list_documents(self, prefix: str | None = None, sort: str = "source", descending: bool = False, limit: int | None = None, offset: int = 0, after: tuple | None = None)-> list[ManifestEntry]:
+        """Return a page of indexed files whose path starts with prefix, ordered
+        by one of DOCUMENT_SORT_KEYS and then by path.
+
+        after is the sort key of the last entry of the previous page, as
+        returned by sort_key: the page then starts right after it by seeking
+        the index, so deep pages cost the same as the first one.
+        """
+        if sort not in DOCUMENT_SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}'.")
+        column = "path" if sort == "source" else sort
+        direction = "DESC" if descending else "ASC"
+        order = f"{column} {direction}" if column == "path" else f"{column} {direction}, path {direction}"
+
+        conditions, params = self._prefix_filter(prefix=prefix)
+        if after is not None:
+            comparison = "<" if descending else ">"
+            if column == "path":
+                conditions.append(f"path {comparison} ?")
+                params.append(after[-1])
+            else:
+                conditions.append(f"({column}, path) {comparison} (?, ?)")
+                params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        rows = self._conn.execute(
+            f"SELECT {COLUMNS} FROM files {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset)
+        )
+        return [ManifestEntry(*row) for row in rows]
+
+    @staticmethod
+    def sort_key(entry: ManifestEntry, sort: str)-> tuple:
+        return (entry.path,) if sort == "source" else (getattr(entry, sort), entry.path)
+
+    def count_documents(self, prefix: str | None = None)-> int:
+        conditions, params = self._prefix_filter(prefix=prefix)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._conn.execute(f"SELECT COUNT(*) FROM files {where}", params).fetchone()[0]
+
+    def paths_under(self, base_path: str | Path)-> list[str]:
+        base = str(base_path).rstrip(os.sep)
+        rows = self._conn.execute(
+            "SELECT path FROM files WHERE path = ? OR (path >= ? AND path < ?)",
+            (base, base + os.sep, base + chr(ord(os.sep) + 1))
+        )
+        return [row[0] for row in rows]
+
+    def changed_entry(self, path: str, embedding_model: str, chunking: str, stat: os.stat_result | None = None)-> ManifestEntry | None:
+        """Return a fresh entry if the file must be (re)indexed, None if it is up to date.
+
+        Size and mtime are checked first, from stat when the caller already has
+        it; the content is hashed only when they differ, so a touched but
+        identical file is not re-embedded. A file indexed with another
+        embedding model or chunking is always out of date.
+        """
+        stat = stat or os.stat(path)
+        current = self.get(path)
+        same_settings = current is not None and current.embedding_model == embedding_model and current.chunking == chunking
+
+        if same_settings and current.size == stat.st_size and current.mtime_ns == stat.st_mtime_ns:
+            return None
+
+        content_hash = get_content_hash(path=path)
+
+        if same_settings and current.content_hash == content_hash:
+            self.upsert(replace(current, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+            return None
+
+        return new_entry(path=path, embedding_model=embedding_model, chunking=chunking, stat=stat, content_hash=content_hash)
+
+    def count_outdated(self, embedding_model: str, chunking: str)-> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM files WHERE embedding_model != ? OR chunking != ?",
+            (embedding_model, chunking)
+        ).fetchone()[0]
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+import threading
+import time
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL and single-flight computation.
+
+    Concurrent get_or_compute calls for the same missing key share a single
+    call to compute: the first caller runs it, the others wait for its result.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_fresh(self, key: Hashable)-> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        return False, None
+
+    def _claim(self, key: Hashable)-> tuple[Future, bool]:
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return future, False
+        self.misses += 1
+        future = Future()
+        self._in_flight[key] = future
+        return future, True
+
+    def _put(self, key: Hashable, value: Any)-> None:
+        del self._in_flight[key]
+        if self.max_size > 0:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any])-> Any:
+        with self._lock:
+            found, value = self._get_fresh(key)
+            if found:
+                return value
+            future, owner = self._claim(key)
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._put(key, value)
+        future.set_result(value)
+        return value
+
+    def get_many_or_compute(self, keys: list[Hashable], compute_many: Callable[[list[Hashable]], list[Any]])-> list[Any]:
+        """Batch get_or_compute: the missing keys not already being computed
+        elsewhere are computed together with one compute_many call, which gets
+        them in order and returns their values in the same order."""
+        results = {}
+        owned: dict[Hashable, Future] = {}
+        waiting: dict[Hashable, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                found, value = self._get_fresh(key)
+                if found:
+                    results[key] = value
+                    continue
+                future, owner = self._claim(key)
+                (owned if owner else waiting)[key] = future
+
+        if owned:
+            try:
+                values = compute_many(list(owned))
+            except BaseException as e:
+                with self._lock:
+                    for key in owned:
+                        del self._in_flight[key]
+                for future in owned.values():
+                    future.set_exception(e)
+                raise
+
+            with self._lock:
+                for key, value in zip(owned, values):
+                    self._put(key, value)
+            for (key, future), value in zip(owned.items(), values):
+                future.set_result(value)
+                results[key] = value
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return [results[key] for key in keys]
+
+    def clear(self)-> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self)-> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
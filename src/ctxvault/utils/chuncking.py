@@ -1,8 +1,110 @@
+import re
+from collections import deque
+from typing import Callable, Iterator
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+WHITESPACE = re.compile(r"\s+")
+MARKDOWN_HEADING = re.compile(r"^#{1,6}[ \t]+\S", re.MULTILINE)
 
 def chunking(text:str, chunk_size: int = 50, overlap: int = 20)->list[str]:
     text_splitted = text.split(" ")
     chunks = [
-        " ".join(text_splitted[i:i+chunk_size]) 
+        " ".join(text_splitted[i:i+chunk_size])
         for i in range(0, len(text_splitted), chunk_size - overlap)
     ]
-    return chunks
\ No newline at end of file
+    return chunks
+
+def _iter_pieces(text: str, separator: re.Pattern)-> Iterator[str]:
+    start = 0
+    for match in separator.finditer(text):
+        piece = text[start:match.start()].strip()
+        if piece:
+            yield piece
+        start = match.end()
+    piece = text[start:].strip()
+    if piece:
+        yield piece
+
+def _iter_units(text: str, count_tokens: Callable[[list[str]], list[int]], chunk_size: int)-> Iterator[tuple[str, int, bool]]:
+    """Yield (text, tokens, ends_paragraph) sentence units, splitting sentences longer than chunk_size on whitespace."""
+    for paragraph in _iter_pieces(text, PARAGRAPH_BREAK):
+        sentences = list(_iter_pieces(paragraph, SENTENCE_END))
+        for i, (sentence, tokens) in enumerate(zip(sentences, count_tokens(sentences))):
+            last = i == len(sentences) - 1
+            if tokens <= chunk_size:
+                yield " ".join(sentence.split()), tokens, last
+                continue
+            words = WHITESPACE.split(sentence)
+            for j, (word, word_tokens) in enumerate(zip(words, count_tokens(words))):
+                yield word, word_tokens, last and j == len(words) - 1
+
+def iter_token_chunks(text: str, count_tokens: Callable[[list[str]], list[int]], chunk_size: int = 200, overlap: int = 20)-> Iterator[str]:
+    """Lazily split text into chunks of at most chunk_size model tokens.
+
+    Chunks are built from whole sentences and never cross a paragraph break
+    unless both paragraphs fit together; only sentences longer than a chunk
+    are cut, on whitespace. Consecutive chunks share up to overlap tokens of
+    trailing sentences. count_tokens maps a batch of strings to their token
+    counts, normally with the embedding model tokenizer.
+    """
+    window: deque[tuple[str, int, bool]] = deque()
+    window_tokens = 0
+    emitted = True
+
+    def render()-> str:
+        return "".join(unit + ("\n\n" if ends_paragraph else " ") for unit, _, ends_paragraph in window).strip()
+
+    for unit in _iter_units(text, count_tokens=count_tokens, chunk_size=chunk_size):
+        if window and window_tokens + unit[1] > chunk_size:
+            if not emitted:
+                yield render()
+            while window and (window_tokens > overlap or window_tokens + unit[1] > chunk_size):
+                window_tokens -= window.popleft()[1]
+        window.append(unit)
+        window_tokens += unit[1]
+        emitted = False
+
+    if not emitted:
+        yield render()
+
+def iter_sentence_chunks(text: str, chunk_size: int = 5, overlap: int = 1)-> Iterator[str]:
+    """Lazily group whole sentences, chunk_size per chunk, sharing overlap sentences."""
+    window: deque[str] = deque()
+    fresh = 0
+
+    for paragraph in _iter_pieces(text, PARAGRAPH_BREAK):
+        for sentence in _iter_pieces(paragraph, SENTENCE_END):
+            window.append(" ".join(sentence.split()))
+            fresh += 1
+            if len(window) == chunk_size:
+                yield " ".join(window)
+                while len(window) > overlap:
+                    window.popleft()
+                fresh = 0
+
+    if fresh:
+        yield " ".join(window)
+
+def iter_markdown_chunks(markdown_text: str, count_tokens: Callable[[list[str]], list[int]], chunk_size: int = 200, overlap: int = 20)-> Iterator[str]:
+    """Split raw markdown at headings, then token-chunk each section on its own,
+    so no chunk spans two sections."""
+    from ctxvault.utils.text_extraction import markdown_to_text
+
+    starts = [match.start() for match in MARKDOWN_HEADING.finditer(markdown_text)]
+    bounds = zip([0] + starts, starts + [len(markdown_text)])
+    for start, end in bounds:
+        section = markdown_to_text(markdown_text[start:end])
+        if section:
+            yield from iter_token_chunks(section, count_tokens=count_tokens, chunk_size=chunk_size, overlap=overlap)
+
+def chunk_text(text: str, filetype: str, chunk_strategy: str, chunk_size: int, chunk_overlap: int, count_tokens: Callable[[list[str]], list[int]])-> Iterator[str]:
+    """Dispatch to the chunker of a vault strategy. Sizes are in words for
+    "words", sentences for "sentences" and model tokens otherwise."""
+    if chunk_strategy == "words":
+        return iter(chunking(text, chunk_size=chunk_size, overlap=chunk_overlap))
+    if chunk_strategy == "sentences":
+        return iter_sentence_chunks(text, chunk_size=chunk_size, overlap=chunk_overlap)
+    if chunk_strategy == "markdown" and filetype == ".md":
+        return iter_markdown_chunks(text, count_tokens=count_tokens, chunk_size=chunk_size, overlap=chunk_overlap)
+    return iter_token_chunks(text, count_tokens=count_tokens, chunk_size=chunk_size, overlap=chunk_overlap)
@@ -1,46 +1,235 @@
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+import copy
 import json
-from ctxvault.core.exceptions import VaultAlreadyExistsError, VaultNotFoundError, VaultNotInitializedError
+import os
+import tempfile
+import threading
+import time
+from ctxvault.core.exceptions import InvalidChunkingConfigError, InvalidEmbeddingConfigError, VaultAlreadyExistsError, VaultNotFoundError, VaultNotInitializedError
+
+if TYPE_CHECKING:
+    from filelock import FileLock
 
 CONFIG_DIR = Path.home() / ".ctxvault"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 VAULTS_DIR = CONFIG_DIR / "vaults"
+# How long a cached config is trusted before the file is checked for changes again.
+CONFIG_CHECK_INTERVAL = 1.0
+
+DEFAULT_SETTINGS = {
+    "max_open_vaults": 16,
+    "embedding_batch_size": 256,
+    "extraction_workers": None,
+    "embedding_cache_size": 500000,
+    "query_cache_size": 1024,
+    "query_cache_ttl": 300,
+    "query_batch_window_ms": 5,
+    "query_batch_max_size": 32,
+    "max_batch_queries": 100,
+    "api_index_threads": 2,
+    "api_query_threads": 8,
+    "job_workers": 2,
+    "preload_on_startup": True,
+    "preload_vaults": None,
+    "hybrid_candidates": 50,
+    "rerank_model": "cross-encoder/ms-marco-MiniLM-L-6-v2",
+    "rerank_oversampling": 4,
+    "rerank_budget_ms": 300,
+    "rerank_cache_size": 10000
+}
+
+CHUNK_STRATEGIES = ("tokens", "words", "sentences", "markdown")
+
+DEFAULT_CHUNKING = {
+    "chunk_strategy": "tokens",
+    "chunk_size": 200,
+    "chunk_overlap": 20
+}
+
+# Size and overlap are in the unit of the strategy; words are kept well under
+# the 256-token window of the default model.
+STRATEGY_CHUNKING = {
+    "tokens": {"chunk_size": 200, "chunk_overlap": 20},
+    "words": {"chunk_size": 150, "chunk_overlap": 20},
+    "sentences": {"chunk_size": 5, "chunk_overlap": 1},
+    "markdown": {"chunk_size": 200, "chunk_overlap": 20}
+}
+
+DEFAULT_EMBEDDING = {
+    "embedding_backend": "sentence-transformers",
+    "embedding_model": None
+}
+
+_cache_lock = threading.Lock()
+_write_lock = threading.RLock()
+_file_locks: dict[Path, "FileLock"] = {}
+# (config path, (inode, mtime, size) of the file read, parsed config, monotonic time of the last check)
+_cached_config: tuple[Path, tuple, dict, float] | None = None
+
+def _file_signature(stat: os.stat_result) -> tuple:
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+@contextmanager
+def _config_file_lock() -> Iterator[None]:
+    """Serialize config writes across threads and processes. Reentrant."""
+    from filelock import FileLock
+
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    with _write_lock:
+        # One FileLock per path: separate instances in a process would block each other.
+        lock_path = CONFIG_FILE.with_name(CONFIG_FILE.name + ".lock")
+        file_lock = _file_locks.setdefault(lock_path, FileLock(str(lock_path)))
+        with file_lock:
+            yield
 
-def _load_global_config() -> dict:
-    if not CONFIG_FILE.exists():
-        CONFIG_DIR.mkdir(exist_ok=True)
-        VAULTS_DIR.mkdir(exist_ok=True)
-        CONFIG_FILE.write_text(json.dumps({"vaults": {}}))
-    return json.loads(CONFIG_FILE.read_text())
+def _read_config_file(path: Path) -> tuple[tuple, dict]:
+    with open(path, encoding="utf-8") as f:
+        return _file_signature(os.fstat(f.fileno())), json.load(f)
+
+def _load_global_config(max_age: float | None = None) -> dict:
+    """Return the parsed global config, shared between callers: do not modify it.
+
+    The file is only checked again, with a stat, when the cached copy is older
+    than max_age seconds (CONFIG_CHECK_INTERVAL by default), and only re-read
+    when its inode, mtime or size changed, i.e. another process saved it.
+    """
+    global _cached_config
+    path = CONFIG_FILE
+    max_age = CONFIG_CHECK_INTERVAL if max_age is None else max_age
+    now = time.monotonic()
+
+    with _cache_lock:
+        if _cached_config is not None and _cached_config[0] == path:
+            _, signature, data, checked_at = _cached_config
+            if now - checked_at < max_age:
+                return data
+            try:
+                if _file_signature(path.stat()) == signature:
+                    _cached_config = (path, signature, data, now)
+                    return data
+            except FileNotFoundError:
+                pass
+
+    if not path.exists():
+        with _config_file_lock():
+            if not path.exists():
+                VAULTS_DIR.mkdir(parents=True, exist_ok=True)
+                _save_global_config(data={"vaults": {}})
+
+    signature, data = _read_config_file(path=path)
+    with _cache_lock:
+        _cached_config = (path, signature, data, now)
+    return data
 
 def _save_global_config(data: dict) -> None:
-    CONFIG_FILE.write_text(json.dumps(data))
+    """Atomically replace the config file. Callers hold _config_file_lock."""
+    global _cached_config
+    path = CONFIG_FILE
+    try:
+        previous_mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        previous_mtime = 0
 
-def create_vault(vault_name: str, vault_path: str) -> tuple[str, str]:
-    config = _load_global_config()
-    vaults_config = config.get("vaults")
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # File timestamps are as coarse as a clock tick and inodes get reused: make
+        # every save bump the mtime, so a cached (inode, mtime, size) never matches a newer file.
+        mtime = max(time.time_ns(), previous_mtime + 1)
+        os.utime(tmp_path, ns=(mtime, mtime))
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    with _cache_lock:
+        _cached_config = (path, _file_signature(path.stat()), data, time.monotonic())
+
+@contextmanager
+def _edit_global_config() -> Iterator[dict]:
+    """Read-modify-write the global config: yield a private copy of the
+    current file content, saved back unless the block raises."""
+    with _config_file_lock():
+        config = copy.deepcopy(_load_global_config(max_age=0))
+        yield config
+        _save_global_config(data=config)
+
+def _validate_chunking(chunking: dict, current: dict | None = None) -> dict:
+    """Complete and check chunking settings. Size and overlap not given come
+    from current when it has the same strategy, else from the strategy defaults."""
+    given = {key: value for key, value in chunking.items() if value is not None}
+    current = current or DEFAULT_CHUNKING
+    strategy = given.get("chunk_strategy", current["chunk_strategy"])
 
-    if (not vaults_config is None) and (not vaults_config.get(vault_name) is None):
-        raise VaultAlreadyExistsError(f"Vault '{vault_name}' already exists.")
+    if strategy not in CHUNK_STRATEGIES:
+        raise InvalidChunkingConfigError(f"Unknown chunk strategy '{strategy}', expected one of {', '.join(CHUNK_STRATEGIES)}.")
+    base = current if current["chunk_strategy"] == strategy else STRATEGY_CHUNKING[strategy]
+    chunking = {**base, **given, "chunk_strategy": strategy}
 
-    if not vault_path:
-        vault_path = Path(VAULTS_DIR / vault_name).resolve()
-    else:
-        #TODO: Validate path
-        vault_path = Path(vault_path)
+    if chunking["chunk_size"] < 1:
+        raise InvalidChunkingConfigError("Chunk size must be at least 1.")
+    if not 0 <= chunking["chunk_overlap"] < chunking["chunk_size"]:
+        raise InvalidChunkingConfigError("Chunk overlap must be at least 0 and smaller than the chunk size.")
 
-    db_path = vault_path / "chroma"
-    print("vault_path:" + str(vault_path))
-    print("db_path:" + str(db_path))
-    vault_path.mkdir(parents=True, exist_ok=True)
-    db_path.mkdir(parents=True, exist_ok=True)    
+    return {key: chunking[key] for key in DEFAULT_CHUNKING}
 
-    config["vaults"][vault_name] = {
-        "vault_path": vault_path.as_posix(),
-        "db_path": db_path.as_posix()
-    }
+def get_chunking(vault_config: dict) -> dict:
+    return {key: vault_config.get(key, default) for key, default in DEFAULT_CHUNKING.items()}
 
-    _save_global_config(data=config)
+def get_chunking_signature(vault_config: dict) -> str:
+    chunking = get_chunking(vault_config=vault_config)
+    return f"{chunking['chunk_strategy']}:{chunking['chunk_size']}:{chunking['chunk_overlap']}"
+
+def _validate_embedding(embedding: dict) -> dict:
+    from ctxvault.core.embedding_backends import BACKENDS, HashBackend
+
+    embedding = {**DEFAULT_EMBEDDING, **{key: value for key, value in embedding.items() if value is not None}}
+
+    backend = BACKENDS.get(embedding["embedding_backend"])
+    if backend is None:
+        raise InvalidEmbeddingConfigError(f"Unknown embedding backend '{embedding['embedding_backend']}', expected one of {', '.join(BACKENDS)}.")
+    embedding["embedding_model"] = embedding["embedding_model"] or backend.default_model
+    if backend is HashBackend and not str(embedding["embedding_model"]).isdigit():
+        raise InvalidEmbeddingConfigError("The model of the hash backend is its vector dimension.")
+
+    return {key: embedding[key] for key in DEFAULT_EMBEDDING}
+
+def get_embedding(vault_config: dict) -> dict:
+    return {key: vault_config.get(key, default) for key, default in DEFAULT_EMBEDDING.items()}
+
+def create_vault(vault_name: str, vault_path: str, chunking: dict | None = None, embedding: dict | None = None) -> tuple[str, str]:
+    chunking = _validate_chunking(chunking=chunking or {})
+    embedding = _validate_embedding(embedding=embedding or {})
+
+    with _edit_global_config() as config:
+        vaults_config = config.get("vaults")
+
+        if (not vaults_config is None) and (not vaults_config.get(vault_name) is None):
+            raise VaultAlreadyExistsError(f"Vault '{vault_name}' already exists.")
+
+        if not vault_path:
+            vault_path = Path(VAULTS_DIR / vault_name).resolve()
+        else:
+            #TODO: Validate path
+            vault_path = Path(vault_path)
+
+        db_path = vault_path / "chroma"
+        print("vault_path:" + str(vault_path))
+        print("db_path:" + str(db_path))
+        vault_path.mkdir(parents=True, exist_ok=True)
+        db_path.mkdir(parents=True, exist_ok=True)    
+
+        config.setdefault("vaults", {})[vault_name] = {
+            "vault_path": vault_path.as_posix(),
+            "db_path": db_path.as_posix(),
+            **chunking,
+            **embedding
+        }
 
     return str(vault_path), str(CONFIG_FILE)
 
@@ -49,8 +238,25 @@ def get_vaults() -> list[str]:
     return list(config.get("vaults", {}).keys())
 
 def get_vault_config(vault_name: str) -> dict:
-    config = _load_global_config()
-    vault_config = config.get("vaults").get(vault_name)
+    vault_config = _load_global_config().get("vaults").get(vault_name)
+    if vault_config is None:
+        # It may have just been created by another process.
+        vault_config = _load_global_config(max_age=0).get("vaults").get(vault_name)
     if vault_config is None:
         raise VaultNotFoundError(f"Vault '{vault_name}' does not exist.")
-    return vault_config
\ No newline at end of file
+    return dict(vault_config)
+
+def update_vault_chunking(vault_name: str, chunking: dict) -> dict:
+    with _edit_global_config() as config:
+        vault_config = config.get("vaults").get(vault_name)
+        if vault_config is None:
+            raise VaultNotFoundError(f"Vault '{vault_name}' does not exist.")
+
+        chunking = _validate_chunking(chunking=chunking, current=get_chunking(vault_config=vault_config))
+        vault_config.update(chunking)
+
+    return chunking
+
+def get_settings() -> dict:
+    config = _load_global_config()
+    return {**DEFAULT_SETTINGS, **config.get("settings", {})}
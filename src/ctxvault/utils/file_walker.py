@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Collection, Iterator
+import os
+import stat as stat_module
+from ctxvault.utils.text_extraction import SUPPORTED_EXT
+
+IGNORE_FILE = ".ctxvaultignore"
+
+@dataclass(frozen=True)
+class _IgnoreRule:
+    pattern: str
+    negate: bool
+    dir_only: bool
+    anchored: bool
+    # Key of the directory holding the ignore file, "" or ending with "/".
+    base: str
+
+    def matches(self, key: str, name: str, is_dir: bool)-> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.anchored:
+            return fnmatchcase(key[len(self.base):], self.pattern)
+        return fnmatchcase(name, self.pattern)
+
+def _read_ignore_file(path: str, base: str)-> list[_IgnoreRule]:
+    """Parse a .ctxvaultignore: gitignore-like lines of fnmatch patterns.
+
+    A pattern without "/" matches names at any depth, one with "/" is relative
+    to the directory of the ignore file, a trailing "/" only matches
+    directories and a leading "!" re-includes what an earlier line ignored.
+    """
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
+
+    rules = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        line = line[1:] if negate else line
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line:
+            rules.append(_IgnoreRule(pattern=line.lstrip("/"), negate=negate, dir_only=dir_only, anchored="/" in line, base=base))
+    return rules
+
+def _is_ignored(rules: list[_IgnoreRule], key: str, name: str, is_dir: bool)-> bool:
+    ignored = False
+    for rule in rules:
+        if rule.matches(key=key, name=name, is_dir=is_dir):
+            ignored = not rule.negate
+    return ignored
+
+def _rules_above(abs_path: str, ignore_root: str)-> tuple[str, list[_IgnoreRule]] | None:
+    """Return the key of abs_path below ignore_root and the rules of the ignore
+    files above it, or None when it lies in a hidden or ignored directory."""
+    parts = Path(os.path.relpath(abs_path, ignore_root)).parts if abs_path != ignore_root else ()
+    rules = []
+    directory = ignore_root
+    for depth, part in enumerate(parts):
+        rules = rules + _read_ignore_file(os.path.join(directory, IGNORE_FILE), base="".join(f"{p}/" for p in parts[:depth]))
+        directory = os.path.join(directory, part)
+        is_dir = depth < len(parts) - 1 or os.path.isdir(directory)
+        if (is_dir and part.startswith(".")) or _is_ignored(rules=rules, key="/".join(parts[:depth + 1]), name=part, is_dir=is_dir):
+            return None
+    return "".join(f"{p}/" for p in parts), rules
+
+def walk_files(path: str | Path, exclude_dirs: list[Path] | None = None, extensions: Collection[str] | None = SUPPORTED_EXT, ignore_root: str | Path | None = None)-> Iterator[tuple[Path, os.stat_result]]:
+    """Yield (path, stat) for the files under path, with the stat of the walk.
+
+    Built on os.scandir: excluded, hidden (dot) and ignored directories are
+    pruned before being read, and files are filtered by extension before
+    being stat'ed. Ignore files are read in every walked directory and, with
+    ignore_root, in its ancestors down from ignore_root. A file given as path
+    is yielded whatever its extension, unless it is excluded or ignored.
+    Yielded paths are joined to path as given, relative or not.
+    """
+    path = Path(path)
+    excluded = {os.path.abspath(excl) for excl in exclude_dirs or []} | {os.path.realpath(excl) for excl in exclude_dirs or []}
+    abs_path = os.path.abspath(path)
+    if any(abs_path == excl or abs_path.startswith(excl + os.sep) for excl in excluded):
+        return
+
+    # Keys are the "/"-separated paths that ignore patterns are matched against,
+    # relative to ignore_root when the walk is below it, else to the walk root.
+    root_key, rules = "", []
+    if ignore_root is not None:
+        ignore_root = os.path.abspath(ignore_root)
+        if abs_path == ignore_root or abs_path.startswith(ignore_root + os.sep):
+            above = _rules_above(abs_path=abs_path, ignore_root=ignore_root)
+            if above is None:
+                return
+            root_key, rules = above
+
+    if path.is_file():
+        try:
+            yield path, path.stat()
+        except OSError:
+            pass
+        return
+
+    stack = [(str(path), root_key, rules)]
+    while stack:
+        dir_path, dir_key, rules = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        if any(entry.name == IGNORE_FILE for entry in entries):
+            rules = rules + _read_ignore_file(os.path.join(dir_path, IGNORE_FILE), base=dir_key)
+
+        subdirs = []
+        for entry in entries:
+            key = dir_key + entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_dir:
+                if entry.name.startswith(".") or os.path.abspath(entry.path) in excluded or _is_ignored(rules=rules, key=key, name=entry.name, is_dir=True):
+                    continue
+                subdirs.append((entry.path, key + "/", rules))
+                continue
+
+            if extensions is not None and os.path.splitext(entry.name)[1] not in extensions:
+                continue
+            if rules and _is_ignored(rules=rules, key=key, name=entry.name, is_dir=False):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if stat_module.S_ISREG(stat.st_mode):
+                yield Path(entry.path), stat
+
+        stack.extend(reversed(subdirs))
@@ -1,11 +1,13 @@
 from ctxvault.core.identifiers import get_chunk_id
 
-def build_chunks_metadatas(doc_id: str, chunks_size: int, source: str, filetype: str, agent_metadata: dict | None = None)-> tuple[list[str], list[dict]]:
+def build_chunks_metadatas(doc_id: str, chunks: list[str], source: str, filetype: str, agent_metadata: dict | None = None, pages: list[int] | None = None)-> tuple[list[str], list[dict]]:
     chunk_ids = []
     metadatas = []
+    occurrences = {}
 
-    for i in range(chunks_size):
-        chunk_id = f"{doc_id}::{get_chunk_id(i)}"
+    for i, chunk in enumerate(chunks):
+        occurrences[chunk] = occurrences.get(chunk, -1) + 1
+        chunk_id = f"{doc_id}::{get_chunk_id(text=chunk, occurrence=occurrences[chunk])}"
         chunk_ids.append(chunk_id)
         metadatas.append(
             {
@@ -15,6 +17,8 @@ def build_chunks_metadatas(doc_id: str, chunks_size: int, source: str, filetype:
                 "source": source,
                 "filetype": filetype,
             })
+        if pages is not None:
+            metadatas[-1]["page"] = pages[i]
         if agent_metadata:
             metadatas[-1].update(agent_metadata)
     
@@ -1,12 +1,15 @@
-from pypdf import PdfReader
-from docx import Document
-import markdown
-from strip_tags import strip_tags
 from pathlib import Path, PurePosixPath
 from ctxvault.core.exceptions import UnsupportedFileTypeError, ExtractionError
+from collections import deque
+from itertools import chain, islice
+from typing import Iterable, Iterator
 import hashlib
+import os
 
 SUPPORTED_EXT = {'.txt', '.md', '.pdf', '.docx'}
+# PDFs from this size on are read page by page in the indexing process instead
+# of being extracted whole in a worker and sent back in one piece.
+STREAM_PDF_MIN_SIZE = 4 * 1024 * 1024
 
 def _extract_from_txt(path: str)->str:
     try:
@@ -16,23 +19,68 @@ def _extract_from_txt(path: str)->str:
     except Exception as e:
         raise ExtractionError(f"Failed to extract .txt {path}: {e}")
 
-def _extract_from_md(path: str)->str:
+def markdown_to_text(md: str)->str:
+    import markdown
+    from strip_tags import strip_tags
+    return strip_tags(input=markdown.markdown(md)).strip()
+
+def _extract_from_md(path: str, raw: bool = False)->str:
     try:
         with open(file=path, mode='r', encoding='utf-8') as f:
-            md_content = markdown.markdown(f.read())
-        return strip_tags(input=md_content).strip()
+            md_content = f.read()
+        return md_content if raw else markdown_to_text(md=md_content)
     except Exception as e:
         raise ExtractionError(f"Failed to extract .md {path}: {e}")
 
-def _extract_from_pdf(path: str)->str:
+def iter_pdf_pages(path: str, failed_pages: list[tuple[int, str]] | None = None)-> Iterator[tuple[int, str]]:
+    """Lazily yield (page number, text) for the non-empty pages of a PDF, from 1.
+
+    A page that fails to extract is skipped so the rest of the document is kept,
+    and added to failed_pages as (page number, error message). ExtractionError
+    is raised only if the file cannot be opened or no page can be read.
+    """
+    from pypdf import PdfReader
     try:
         reader = PdfReader(stream=path)
-        pdf_content = ''.join([(p.extract_text() or '').strip() for p in reader.pages])
-        return pdf_content
+        pages_count = len(reader.pages)
     except Exception as e:
         raise ExtractionError(f"Failed to extract .pdf {path}: {e}")
 
+    failed = 0
+    error = None
+    for page_number in range(1, pages_count + 1):
+        try:
+            page_content = (reader.pages[page_number - 1].extract_text() or '').strip()
+        except Exception as e:
+            failed += 1
+            error = e
+            if failed_pages is not None:
+                failed_pages.append((page_number, str(e)))
+            continue
+        if page_content:
+            yield page_number, page_content
+
+    if pages_count and failed == pages_count:
+        raise ExtractionError(f"Failed to extract .pdf {path}: {error}")
+
+class PdfPages:
+    """The (page number, text) pairs of a PDF, read lazily or up front, and the
+    pages that failed, complete once the pages have been iterated."""
+
+    def __init__(self, pages: Iterable[tuple[int, str]], failed_pages: list[tuple[int, str]]):
+        self._pages = pages
+        self.failed_pages = failed_pages
+
+    def __iter__(self)-> Iterator[tuple[int, str]]:
+        return iter(self._pages)
+
+def _extract_from_pdf(path: str, stream_pages: bool = False)-> PdfPages:
+    failed_pages = []
+    pages = iter_pdf_pages(path=path, failed_pages=failed_pages)
+    return PdfPages(pages=pages if stream_pages else list(pages), failed_pages=failed_pages)
+
 def _extract_from_docx(path: str)->str:
+    from docx import Document
     try:
         f = open(file=path, mode='rb')
         document = Document(f)
@@ -42,7 +90,9 @@ def _extract_from_docx(path: str)->str:
     except Exception as e:
         raise ExtractionError(f"Failed to extract .docx {path}: {e}")
 
-def extract_text(path: str)-> tuple[str, str]:
+def extract_text(path: str, raw_markdown: bool = False, stream_pages: bool = False)-> tuple[str | PdfPages, str]:
+    """Return (text, filetype). PDF text is returned as PdfPages, which reads
+    one page at a time with stream_pages."""
     suffix = PurePosixPath(path).suffix
 
     if suffix not in SUPPORTED_EXT:
@@ -51,8 +101,62 @@ def extract_text(path: str)-> tuple[str, str]:
     if suffix == '.txt':
         return _extract_from_txt(path=path), suffix
     elif suffix == '.md':
-        return _extract_from_md(path=path), suffix
+        return _extract_from_md(path=path, raw=raw_markdown), suffix
     elif suffix == '.pdf':
-        return _extract_from_pdf(path=path), suffix
+        return _extract_from_pdf(path=path, stream_pages=stream_pages), suffix
     elif suffix == '.docx':
-        return _extract_from_docx(path=path), suffix
\ No newline at end of file
+        return _extract_from_docx(path=path), suffix
+
+def _is_large_pdf(path: str)-> bool:
+    try:
+        return PurePosixPath(path).suffix == '.pdf' and os.path.getsize(path) >= STREAM_PDF_MIN_SIZE
+    except OSError:
+        return False
+
+def extract_texts(paths: Iterable[str], max_workers: int | None = None, raw_markdown: bool = False)-> Iterator[tuple[str, str | None, str | None, Exception | None]]:
+    """Yield (path, text, filetype, error) for each path, in input order, with
+    text as returned by extract_text.
+
+    Extraction runs in a process pool so that PDF/DOCX parsing is not bound by
+    the GIL of the indexing process. At most 2 * max_workers files are in
+    flight, so the input can be an arbitrarily long generator. PDFs of at
+    least STREAM_PDF_MIN_SIZE bytes are streamed page by page in process
+    instead, so that a large one is never held in memory whole.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    paths = iter(paths)
+    head = list(islice(paths, 2))
+    paths = chain(head, paths)
+
+    # Not worth starting worker processes for a single file. In process, PDF
+    # pages are streamed into the consumer instead of being read up front.
+    if max_workers <= 1 or len(head) < 2:
+        for path in paths:
+            try:
+                text, filetype = extract_text(path=path, raw_markdown=raw_markdown, stream_pages=True)
+                yield path, text, filetype, None
+            except Exception as e:
+                yield path, None, None, e
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    # Not fork: this runs in threads of the API server next to Chroma and torch
+    # threads, and a forked child can deadlock on a lock one of them held.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        in_flight = deque()
+
+        def drain(limit: int):
+            while len(in_flight) > limit:
+                path, future = in_flight.popleft()
+                try:
+                    text, filetype = future.result() if future is not None else extract_text(path=path, raw_markdown=raw_markdown, stream_pages=True)
+                    yield path, text, filetype, None
+                except Exception as e:
+                    yield path, None, None, e
+
+        for path in paths:
+            in_flight.append((path, None if _is_large_pdf(path=path) else executor.submit(extract_text, path, raw_markdown)))
+            yield from drain(limit=2 * max_workers)
+
+        yield from drain(limit=0)
@@ -1,4 +1,5 @@
 from ctxvault.utils.config import create_vault
+from ctxvault.storage.chroma_store import CollectionPool
 import pytest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -7,14 +8,20 @@ from unittest.mock import MagicMock, patch
 def mock_chroma(monkeypatch):
     monkeypatch.setattr(
         "ctxvault.core.embedding.embed_list",
-        lambda chunks: [[0.1] * 384] * len(chunks),
+        lambda chunks, vault_config=None, use_cache=True: [[0.1] * 384] * len(chunks),
+    )
+    monkeypatch.setattr(
+        "ctxvault.core.embedding.count_tokens",
+        lambda texts, vault_config=None: [len(text.split()) for text in texts],
     )
 
     mock_collection = MagicMock()
     mock_collection.add = MagicMock()
     mock_collection.delete = MagicMock()
+    mock_collection.count = MagicMock(return_value=0)
     mock_collection.query = MagicMock(
         return_value={
+            "ids": [["1"]],
             "documents": [["mock_doc"]],
             "metadatas": [[{
                 "chunk_id": "1",
@@ -27,6 +34,7 @@ def mock_chroma(monkeypatch):
     )
     mock_collection.get = MagicMock(
         return_value={
+            "ids": ["1"],
             "metadatas": [{
                 "doc_id": "1",
                 "source": "mock_doc",
@@ -42,7 +50,9 @@ def mock_chroma(monkeypatch):
         "ctxvault.storage.chroma_store.PersistentClient",
         lambda path: mock_client,
     )
-    monkeypatch.setattr("ctxvault.storage.chroma_store._collection", None)
+    monkeypatch.setattr("ctxvault.storage.chroma_store._pool", CollectionPool())
+    monkeypatch.setattr("ctxvault.core.querying._query_embeddings", None)
+    monkeypatch.setattr("ctxvault.core.reranking._scores", None)
 
 @pytest.fixture
 def mock_global_config(tmp_path, monkeypatch):
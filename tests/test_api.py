@@ -46,6 +46,19 @@ class TestIndexEndpoint:
         assert isinstance(data["indexed_files"], list)
         assert isinstance(data["skipped_files"], list)
 
+    def test_index_reports_unchanged_files_as_a_count(self, mock_vault_config, temp_docs):
+        client.put("/ctxvault/index", json={"vault_name": "test_vault", "file_path": str(temp_docs)})
+        data = client.put("/ctxvault/index", json={"vault_name": "test_vault", "file_path": str(temp_docs)}).json()
+
+        assert (data["indexed_files"], data["skipped_files"], data["files_unchanged"]) == ([], [], 2)
+
+    def test_index_reports_deleted_files(self, mock_vault_config, temp_docs):
+        client.put("/ctxvault/index", json={"vault_name": "test_vault", "file_path": str(temp_docs)})
+        (temp_docs / "file2.txt").unlink()
+        data = client.put("/ctxvault/index", json={"vault_name": "test_vault", "file_path": str(temp_docs)}).json()
+
+        assert data["deleted_files"] == [str(temp_docs / "file2.txt")]
+
     def test_index_missing_file_path(self, mock_vault_config):
         response = client.put(
             "/ctxvault/index",
@@ -83,7 +96,7 @@ class TestQueryEndpoint:
 
         mock_result = MagicMock()
         mock_result.results = []
-        monkeypatch.setattr(vault, "query", lambda vault_name, text, filters=None: mock_result)
+        monkeypatch.setattr(vault, "query", lambda vault_name, text, filters=None, **options: mock_result)
 
         response = client.post(
             "/ctxvault/query",
@@ -92,6 +105,93 @@ class TestQueryEndpoint:
         assert response.status_code == 404
         assert "No results found" in response.json()["detail"]
 
+    def test_query_rejects_out_of_range_top_k(self, mock_vault_config):
+        for top_k in (0, 10**9):
+            response = client.post("/ctxvault/query", json={"vault_name": "test_vault", "query": "test query", "top_k": top_k})
+            assert response.status_code == 422
+
+    def test_query_projection_top_k_and_max_distance(self, mock_vault_config):
+        from ctxvault.storage import chroma_store
+        from ctxvault.utils.config import get_vault_config
+
+        with chroma_store.lease_collection(config=get_vault_config("test_vault")) as collection:
+            pass
+        collection.query.return_value = {
+            "ids": [["a::0", "b::0"]],
+            "distances": [[0.2, 0.9]]
+        }
+
+        response = client.post(
+            "/ctxvault/query",
+            json={"vault_name": "test_vault", "query": "test query", "top_k": 2, "max_distance": 0.5, "include": ["score"]}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"chunk_id": "a::0", "doc_id": "a", "score": 0.2}]
+        assert collection.query.call_args.kwargs["n_results"] == 2
+        assert collection.query.call_args.kwargs["include"] == ["distances"]
+
+    def test_query_invalid_include(self, mock_vault_config):
+        response = client.post(
+            "/ctxvault/query",
+            json={"vault_name": "test_vault", "query": "test query", "include": ["embeddings"]}
+        )
+        assert response.status_code == 400
+        assert "Unknown include fields" in response.json()["detail"]
+
+    def test_query_batch_embeds_once_and_queries_each_vault_once(self, mock_vault_config, monkeypatch):
+        from ctxvault.utils.config import create_vault
+
+        create_vault("other_vault", "")
+
+        embedded = []
+        def fake_embed(chunks, vault_config=None, use_cache=True):
+            embedded.append(list(chunks))
+            return [[float(i)] * 384 for i in range(len(chunks))]
+        monkeypatch.setattr("ctxvault.core.embedding.embed_list", fake_embed)
+
+        searches = []
+        def fake_query(query_embeddings, config, filters=None, n_results=5, include=None):
+            searches.append((Path(config["db_path"]).parent.name, len(query_embeddings)))
+            return {
+                "ids": [[str(i)] for i in range(len(query_embeddings))],
+                "documents": [[f"doc {len(searches)}.{i}"] for i in range(len(query_embeddings))],
+                "metadatas": [[{"chunk_id": str(i), "chunk_index": 0, "doc_id": "1", "source": "mock_doc"}] for i in range(len(query_embeddings))],
+                "distances": [[0.5] for _ in query_embeddings]
+            }
+        monkeypatch.setattr("ctxvault.storage.chroma_store.query", fake_query)
+
+        response = client.post(
+            "/ctxvault/query/batch",
+            json={"queries": [
+                {"vault_name": "test_vault", "query": "first"},
+                {"vault_name": "other_vault", "query": "second"},
+                {"vault_name": "test_vault", "query": "third"}
+            ]}
+        )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["query"] for r in results] == ["first", "second", "third"]
+        assert [r["results"][0]["text"] for r in results] == ["doc 1.0", "doc 2.0", "doc 1.1"]
+        assert embedded == [["first", "second", "third"]]
+        assert sorted(searches) == [("other_vault", 1), ("test_vault", 2)]
+
+    def test_query_batch_rejects_empty_and_oversized_batches(self, mock_vault_config):
+        from ctxvault.utils.config import DEFAULT_SETTINGS
+
+        query = {"vault_name": "test_vault", "query": "test query"}
+        for size in (0, DEFAULT_SETTINGS["max_batch_queries"] + 1):
+            response = client.post("/ctxvault/query/batch", json={"queries": [query] * size})
+            assert response.status_code == 422
+
+    def test_query_batch_unknown_vault(self, mock_vault_config):
+        response = client.post(
+            "/ctxvault/query/batch",
+            json={"queries": [{"vault_name": "missing", "query": "first"}]}
+        )
+        assert response.status_code == 400
+
 
 class TestDeleteEndpoint:
     def test_delete_success(self, mock_vault_config, temp_docs):
@@ -152,6 +252,37 @@ class TestListDocsEndpoint:
         assert "documents" in data
         assert isinstance(data["documents"], list)
 
+    def test_list_docs_pages_from_catalog(self, mock_vault_config, temp_docs):
+        client.put("/ctxvault/index", json={"vault_name": "test_vault", "file_path": str(temp_docs)})
+
+        response = client.get("/ctxvault/docs", params={"vault_name": "test_vault", "sort": "source", "descending": True, "limit": 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert [Path(doc["source"]).name for doc in data["documents"]] == ["file2.txt"]
+        assert data["documents"][0]["chunks_count"] == 1
+
+        response = client.get("/ctxvault/docs", params={"vault_name": "test_vault", "sort": "name"})
+        assert response.status_code == 400
+
+        response = client.get("/ctxvault/docs", params={"vault_name": "test_vault", "sort": "source", "descending": True, "limit": 1, "cursor": data["next_cursor"]})
+        data = response.json()
+        assert [Path(doc["source"]).name for doc in data["documents"]] == ["file1.txt"]
+        assert data["next_cursor"] is None
+        assert data["total"] is None
+
+    def test_list_docs_stream_ndjson(self, mock_vault_config, temp_docs):
+        import json
+        client.put("/ctxvault/index", json={"vault_name": "test_vault", "file_path": str(temp_docs)})
+
+        response = client.get("/ctxvault/docs/stream", params={"vault_name": "test_vault"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert [Path(json.loads(line)["source"]).name for line in response.text.splitlines()] == ["file1.txt", "file2.txt"]
+
+        response = client.get("/ctxvault/docs/stream", params={"vault_name": "missing"})
+        assert response.status_code == 400
+
 
 class TestWriteEndpoint:
     def test_write_success(self, mock_vault_config):
@@ -170,4 +301,118 @@ class TestWriteEndpoint:
         data = response.json()
         assert data["file_path"] == str(file_path)
         assert file_path.exists()
-        assert file_path.read_text(encoding="utf-8") == content
\ No newline at end of file
+        assert file_path.read_text(encoding="utf-8") == content
+
+class TestBlockingCallsOffloaded:
+    def test_query_runs_on_query_pool(self, mock_vault_config, monkeypatch):
+        import threading
+        from ctxvault.core import vault
+
+        threads = []
+        real_query = vault.query
+        def recording_query(**kwargs):
+            threads.append(threading.current_thread().name)
+            return real_query(**kwargs)
+        monkeypatch.setattr(vault, "query", recording_query)
+
+        response = client.post(
+            "/ctxvault/query",
+            json={"vault_name": "test_vault", "query": "test query"}
+        )
+        assert response.status_code == 200
+        assert threads[0].startswith("ctxvault-query")
+
+    def test_index_runs_on_index_pool(self, mock_vault_config, temp_docs, monkeypatch):
+        import threading
+        from ctxvault.core import vault
+
+        threads = []
+        monkeypatch.setattr(vault, "index_files", lambda vault_name, path, progress=None: threads.append(threading.current_thread().name) or ([], [], []))
+
+        response = client.put(
+            "/ctxvault/index",
+            json={"vault_name": "test_vault", "file_path": str(temp_docs)}
+        )
+        assert response.status_code == 200
+        assert threads[0].startswith("ctxvault-index")
+
+
+class TestJobsEndpoint:
+    def _wait_for(self, job_id):
+        import time
+        for _ in range(200):
+            data = client.get(f"/ctxvault/jobs/{job_id}").json()
+            if data["status"] not in ("queued", "running"):
+                return data
+            time.sleep(0.05)
+        raise AssertionError("job did not finish")
+
+    def test_index_job_reports_progress(self, mock_vault_config, temp_docs):
+        response = client.post(
+            "/ctxvault/jobs",
+            json={"vault_name": "test_vault", "file_path": str(temp_docs)}
+        )
+        assert response.status_code == 202
+        data = self._wait_for(response.json()["job_id"])
+
+        assert data["status"] == "completed"
+        assert data["kind"] == "index"
+        assert data["files_total"] == 2
+        assert data["files_done"] == 2
+        assert data["chunks_embedded"] == 2
+        assert data["deleted_files"] == []
+
+    def test_one_active_job_per_vault(self, mock_vault_config, monkeypatch):
+        import threading
+        from ctxvault.core import vault
+
+        release = threading.Event()
+        def blocking_index(vault_name, path, progress):
+            while not release.is_set() and not progress.cancelled:
+                release.wait(timeout=0.01)
+            return [], [], []
+        monkeypatch.setattr(vault, "index_files", blocking_index)
+
+        first = client.post("/ctxvault/jobs", json={"vault_name": "test_vault"}).json()
+        second = client.post("/ctxvault/jobs", json={"vault_name": "test_vault"})
+        assert second.status_code == 409
+
+        cancelled = client.delete(f"/ctxvault/jobs/{first['job_id']}")
+        assert cancelled.status_code == 200
+        assert self._wait_for(first["job_id"])["status"] == "cancelled"
+
+    def test_unknown_job(self):
+        response = client.get("/ctxvault/jobs/missing")
+        assert response.status_code == 404
+
+
+class TestStatsEndpoint:
+    def test_stats_count_query_cache_hits(self, mock_vault_config):
+        for _ in range(2):
+            client.post("/ctxvault/query", json={"vault_name": "test_vault", "query": "test query"})
+
+        response = client.get("/ctxvault/stats")
+        assert response.status_code == 200
+        assert response.json()["query_cache"] == {"size": 1, "hits": 1, "misses": 1, "coalesced": 0}
+
+
+class TestReadiness:
+    def test_ready_after_warm_up(self, mock_global_config):
+        import time
+        from ctxvault.utils.config import create_vault
+
+        create_vault("hashed_vault", "", embedding={"embedding_backend": "hash"})
+
+        with TestClient(app) as started:
+            for _ in range(200):
+                response = started.get("/ready")
+                if response.status_code == 200:
+                    break
+                time.sleep(0.05)
+            assert started.get("/").status_code == 200
+
+        data = response.json()
+        assert response.status_code == 200
+        assert data["models"] == ["hash:384"]
+        assert data["vaults"] == ["hashed_vault"]
+        assert data["errors"] == []
@@ -35,6 +35,20 @@ def test_cli_query(mock_vault_config):
     assert "mock_doc" in result.stdout
 
 
+def test_cli_query_with_top_k(mock_vault_config):
+    from ctxvault.storage import chroma_store
+    from ctxvault.utils.config import get_vault_config
+
+    result = runner.invoke(
+        app,
+        ["query", "test_vault", "test query", "--top-k", "3", "--include", "text"],
+    )
+    assert result.exit_code == 0
+    assert "mock_doc" in result.stdout
+    with chroma_store.lease_collection(config=get_vault_config("test_vault")) as collection:
+        assert collection.query.call_args.kwargs["n_results"] == 3
+
+
 @pytest.mark.usefixtures("mock_chroma", "temp_docs")
 def test_cli_delete(mock_vault_config, temp_docs):
     result = runner.invoke(
@@ -68,3 +82,84 @@ def test_cli_docs(mock_vault_config):
     result = runner.invoke(app, ["docs", "test_vault"])
     assert result.exit_code == 0
     assert "Found" in result.stdout
+
+def test_cli_docs_limit(mock_vault_config, temp_docs):
+    runner.invoke(app, ["index", "test_vault"])
+    result = runner.invoke(app, ["docs", "test_vault", "--sort", "source", "--desc", "--limit", "1"])
+    assert result.exit_code == 0
+    assert "Found 2 documents" in result.stdout
+    assert "file2.txt" in result.stdout and "file1.txt" not in result.stdout
+
+    result = runner.invoke(app, ["docs", "test_vault", "--sort", "name"])
+    assert result.exit_code == 1
+
+
+def test_cli_sync_keeps_watching_after_a_failed_batch(mock_vault_config, monkeypatch):
+    from ctxvault.core import sync, vault
+
+    monkeypatch.setattr(sync, "watch", lambda **kwargs: iter([{"locked.pdf"}, {"note.md"}]))
+    def sync_files(vault_name, paths):
+        if "locked.pdf" in paths:
+            raise PermissionError("locked.pdf is locked")
+        return list(paths), [], []
+    monkeypatch.setattr(vault, "sync_files", sync_files)
+
+    result = runner.invoke(app, ["sync", "test_vault"])
+
+    assert result.exit_code == 0
+    assert "locked.pdf is locked" in result.stdout
+    assert "Indexed: note.md" in result.stdout
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "chromadb", "onnxruntime", "pypdf", "docx", "markdown", "strip_tags", "pydantic")
+
+def _import_times(code: str, home: str | None = None)-> dict[str, int]:
+    import os
+    import subprocess
+    import sys
+
+    env = {**os.environ, "HOME": home} if home else None
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True, env=env)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, module = line.split("|")
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_startup_defers_heavy_imports():
+    times = _import_times("from ctxvault.cli.app import app")
+
+    assert not [module for module in times if module.split(".")[0] in HEAVY_MODULES]
+    # Generous budget in microseconds: about 0.15s on a laptop, the heavy imports alone add several seconds.
+    assert times["ctxvault.cli.app"] < 1_000_000
+
+
+def test_cli_vaults_does_not_load_models(tmp_path):
+    times = _import_times(
+        "from typer.testing import CliRunner\n"
+        "from ctxvault.cli.app import app\n"
+        "assert CliRunner().invoke(app, ['vaults']).exit_code == 0\n",
+        home=str(tmp_path)
+    )
+
+    assert not [module for module in times if module.split(".")[0] in HEAVY_MODULES]
+
+
+def test_cli_docs_does_not_load_chroma_or_models(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    init = "from typer.testing import CliRunner\nfrom ctxvault.cli.app import app\nassert CliRunner().invoke(app, ['init', 'notes']).exit_code == 0\n"
+    subprocess.run([sys.executable, "-c", init], check=True, capture_output=True, env={**os.environ, "HOME": str(tmp_path)})
+
+    times = _import_times(
+        "from typer.testing import CliRunner\n"
+        "from ctxvault.cli.app import app\n"
+        "assert CliRunner().invoke(app, ['docs', 'notes']).exit_code == 0\n",
+        home=str(tmp_path)
+    )
+
+    # Documents are listed from the manifest only; pydantic is needed for the results.
+    assert not [module for module in times if module.split(".")[0] in HEAVY_MODULES + ("numpy",) and module.split(".")[0] != "pydantic"]
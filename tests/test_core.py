@@ -1,6 +1,7 @@
 from pathlib import Path
 import pytest
 from ctxvault.core import vault
+from ctxvault.core.embedding import embed_list as real_embed_list
 
 def test_init_vault_creates_dirs(mock_vault_not_initialized):
     vault_path, config_path = vault.init_vault(
@@ -36,7 +37,7 @@ def test_query_returns_result(mock_vault_config):
 @pytest.mark.usefixtures("mock_vault_config")
 def test_index_files_returns_lists(mock_vault_config, temp_docs):
     vault_name = "test_vault"
-    indexed, skipped = vault.index_files(vault_name=vault_name, path=str(temp_docs))
+    indexed, _, skipped = vault.index_files(vault_name=vault_name, path=str(temp_docs))
     assert isinstance(indexed, list)
     assert isinstance(skipped, list)
 
@@ -84,4 +85,961 @@ def test_list_vaults_returns_list(mock_global_config):
 
 def test_list_vaults_contains_created_vault(mock_vault_config):
     result = vault.list_vaults()
-    assert "test_vault" in result
\ No newline at end of file
+    assert "test_vault" in result
+
+def test_collection_pool_keys_by_db_path(monkeypatch):
+    from unittest.mock import MagicMock
+    from ctxvault.storage import chroma_store
+
+    clients = {}
+    def make_client(path):
+        clients[path] = MagicMock()
+        return clients[path]
+    monkeypatch.setattr("ctxvault.storage.chroma_store.PersistentClient", make_client)
+
+    pool = chroma_store.CollectionPool(max_size=2)
+    with pool.lease("/vaults/a/chroma") as first, pool.lease("/vaults/a/chroma") as again, pool.lease("/vaults/b/chroma") as other:
+        assert again is first and other is not first
+    assert len(clients) == 2
+
+
+def test_collection_pool_evicts_least_recently_used(monkeypatch):
+    from unittest.mock import MagicMock
+    from ctxvault.storage import chroma_store
+
+    clients = {}
+    def make_client(path):
+        clients[path] = MagicMock()
+        return clients[path]
+    monkeypatch.setattr("ctxvault.storage.chroma_store.PersistentClient", make_client)
+
+    pool = chroma_store.CollectionPool(max_size=2)
+    for path in ("a", "b", "a", "c"):
+        pool.open(path)
+
+    assert pool.open_paths() == ["a", "c"]
+    clients["b"].close.assert_called_once()
+    clients["a"].close.assert_not_called()
+
+
+def test_collection_pool_closes_evicted_vaults_once_released(tmp_path, monkeypatch):
+    from unittest.mock import MagicMock
+    from ctxvault.storage import chroma_store
+
+    clients = {}
+    def make_client(path):
+        clients[path] = MagicMock()
+        clients[path].get_or_create_collection.return_value.count.return_value = 0
+        return clients[path]
+    monkeypatch.setattr("ctxvault.storage.chroma_store.PersistentClient", make_client)
+
+    vault_a, vault_b = str(tmp_path / "a"), str(tmp_path / "b")
+    pool = chroma_store.CollectionPool(max_size=1)
+    with pool.lease(vault_a) as collection, pool.lease_lexical(vault_a) as lexical:
+        pool.open(vault_b)
+        assert pool.open_paths() == [vault_b]
+        # Still usable: the evicted vault stays open while it is leased.
+        clients[vault_a].close.assert_not_called()
+        collection.query(query_embeddings=[[0.0]])
+        lexical.add(chunk_ids=["a::0"], doc_ids=["a"], chunks=["still open"])
+    clients[vault_a].close.assert_called_once()
+    with pytest.raises(Exception):
+        lexical.search(query_txt="still", limit=1)
+    pool.close()
+
+
+def test_indexer_batches_chunks_across_files(tmp_path, monkeypatch):
+    from ctxvault.core import indexer
+
+    files = []
+    for i in range(3):
+        file = tmp_path / f"file{i}.txt"
+        file.write_text(f"Content of file {i}")
+        files.append(str(file))
+
+    batches = []
+    def fake_embed(chunks, vault_config=None):
+        batches.append(list(chunks))
+        return [[0.1] * 384] * len(chunks)
+    monkeypatch.setattr("ctxvault.core.embedding.embed_list", fake_embed)
+
+    stored = []
+    monkeypatch.setattr("ctxvault.storage.chroma_store.replace_document", lambda doc_id, ids, embeddings, metadatas, chunks, config: stored.append(metadatas[0]["source"]))
+
+    indexed, skipped = indexer.index_files(file_paths=files + [str(tmp_path / "missing.txt")], config={}, batch_size=2)
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert sorted(indexed) == sorted(files) == sorted(stored)
+    assert len(skipped) == 1 and "missing.txt" in skipped[0]
+
+
+def test_extract_texts_in_process_pool_keeps_order_and_errors(tmp_path):
+    from ctxvault.utils.text_extraction import extract_texts
+
+    paths = []
+    for i in range(5):
+        file = tmp_path / f"file{i}.txt"
+        file.write_text(f"Content of file {i}")
+        paths.append(str(file))
+    paths.insert(2, str(tmp_path / "missing.txt"))
+
+    results = list(extract_texts(paths=paths, max_workers=2))
+
+    assert [path for path, _, _, _ in results] == paths
+    assert results[0][1:] == ("Content of file 0", ".txt", None)
+    assert results[2][1] is None and results[2][3] is not None
+
+
+def test_index_files_skips_unchanged_files(mock_vault_config, temp_docs):
+    from ctxvault.core.indexer import IndexProgress
+
+    indexed, _, skipped = vault.index_files(vault_name="test_vault", path=str(temp_docs))
+    assert len(indexed) == 2
+
+    (temp_docs / "file1.txt").write_text("Content of file 1, edited")
+    progress = IndexProgress()
+    indexed, _, skipped = vault.index_files(vault_name="test_vault", path=str(temp_docs), progress=progress)
+
+    assert indexed == [str(temp_docs / "file1.txt")]
+    assert skipped == []
+    assert (progress.files_unchanged, progress.files_skipped, progress.files_done) == (1, 0, 2)
+
+
+def test_index_files_counts_the_total_up_front(mock_vault_config, temp_docs, monkeypatch):
+    from ctxvault.core import indexer
+    from ctxvault.core.indexer import IndexProgress
+
+    totals = []
+    index_files = indexer.index_files
+    def record_total(file_paths, progress=None, **kwargs):
+        def files():
+            for file_path in file_paths:
+                totals.append(progress.files_total)
+                yield file_path
+        return index_files(file_paths=files(), progress=progress, **kwargs)
+    monkeypatch.setattr(indexer, "index_files", record_total)
+
+    progress = IndexProgress()
+    vault.index_files(vault_name="test_vault", path=str(temp_docs), progress=progress)
+
+    assert totals == [2, 2]
+    assert progress.files_total == progress.files_done == 2
+
+
+def test_edit_during_indexing_is_indexed_again(mock_vault_config, temp_docs, monkeypatch):
+    import os
+    from ctxvault.core import indexer
+
+    file = temp_docs / "file1.txt"
+    index_file = indexer.index_file
+    def index_then_edit(file_path, config, **kwargs):
+        chunks_count = index_file(file_path=file_path, config=config, **kwargs)
+        file.write_text("Edited while it was being indexed")
+        os.utime(file, ns=(file.stat().st_atime_ns, file.stat().st_mtime_ns + 10**9))
+        return chunks_count
+    monkeypatch.setattr(indexer, "index_file", index_then_edit)
+
+    vault.index_file(file_path=file, vault_config=vault.get_vault_config("test_vault"))
+    indexed, _, _ = vault.index_files(vault_name="test_vault", path=str(file))
+
+    assert indexed == [str(file)]
+
+def test_index_files_deletes_vanished_files(mock_vault_config, temp_docs, monkeypatch):
+    vault.index_files(vault_name="test_vault", path=str(temp_docs))
+    (temp_docs / "file2.txt").unlink()
+
+    deleted = []
+    monkeypatch.setattr("ctxvault.core.indexer.delete_file", lambda file_path, config: deleted.append(file_path))
+    _, deleted_files, _ = vault.index_files(vault_name="test_vault", path=str(temp_docs))
+
+    assert deleted == deleted_files == [str(temp_docs / "file2.txt")]
+
+
+def test_polling_watch_yields_debounced_batches(tmp_path):
+    import threading
+    from ctxvault.core import sync
+
+    (tmp_path / "chroma").mkdir()
+    stop_event = threading.Event()
+    batches = sync.watch(vault_path=tmp_path, exclude_dirs=[tmp_path / "chroma"], debounce_ms=100, poll_interval_ms=20, force_polling=True, stop_event=stop_event)
+
+    def write_files():
+        (tmp_path / "note.md").write_text("memory")
+        (tmp_path / "chroma" / "ignored.txt").write_text("db")
+        (tmp_path / "image.png").write_bytes(b"png")
+    threading.Timer(0.1, write_files).start()
+
+    batch = next(batches)
+    stop_event.set()
+
+    assert batch == {str(tmp_path / "note.md")}
+
+
+def test_watch_filter_keeps_watchfiles_defaults(tmp_path):
+    from watchfiles import Change
+    from ctxvault.core import sync
+
+    watch_filter = sync._make_watch_filter(exclude_dirs=[tmp_path / "chroma"])
+    (tmp_path / "note.md").write_text("memory")
+
+    assert watch_filter(Change.modified, str(tmp_path / "note.md"))
+    assert not watch_filter(Change.modified, str(tmp_path / "chroma" / "x.txt"))
+    assert not watch_filter(Change.deleted, str(tmp_path / ".git" / "index.lock"))
+    assert not watch_filter(Change.added, str(tmp_path / "__pycache__" / "gone.txt"))
+    assert not watch_filter(Change.added, str(tmp_path / ".note.md.swp"))
+
+def test_sync_files_indexes_changed_and_deletes_removed(mock_vault_config, temp_docs, monkeypatch):
+    vault.index_files(vault_name="test_vault", path=str(temp_docs))
+
+    (temp_docs / "file1.txt").write_text("Updated content of file 1")
+    (temp_docs / "file2.txt").unlink()
+    monkeypatch.setattr("ctxvault.core.indexer.delete_file", lambda file_path, config: None)
+
+    indexed, deleted, skipped = vault.sync_files(vault_name="test_vault", paths=[str(temp_docs / "file1.txt"), str(temp_docs / "file2.txt")])
+
+    assert indexed == [str(temp_docs / "file1.txt")]
+    assert deleted == [str(temp_docs / "file2.txt")]
+    assert skipped == []
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path):
+    import numpy as np
+    from ctxvault.storage.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path=tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put_many(model="m", vectors={"a": np.ones(3), "b": np.zeros(3)})
+    cache.get_many(model="m", chunk_hashes=["a"])
+    cache.put_many(model="m", vectors={"c": np.ones(3)})
+
+    assert set(cache.get_many(model="m", chunk_hashes=["a", "b", "c"])) == {"a", "c"}
+    assert cache.get_many(model="other", chunk_hashes=["a"]) == {}
+    cache.close()
+
+
+def test_embedding_cache_reads_do_not_write_and_eviction_is_amortized(tmp_path):
+    import numpy as np
+    from ctxvault.storage.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path=tmp_path / "cache.sqlite3", max_entries=10)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    cache.put_many(model="m", vectors={str(i): np.ones(3) for i in range(10)})
+    changes = cache._conn.total_changes
+    cache.get_many(model="m", chunk_hashes=["0", "1"])
+    assert cache._conn.total_changes == changes and not [sql for sql in statements if sql.startswith("UPDATE")]
+
+    # Going over max_entries trims to 90%, keeping the rows just read.
+    cache.put_many(model="m", vectors={"10": np.ones(3)})
+    assert len(cache) == 9 and set(cache.get_many(model="m", chunk_hashes=["0", "1", "10"])) == {"0", "1", "10"}
+    statements.clear()
+    cache.put_many(model="m", vectors={"11": np.ones(3)})
+    assert not [sql for sql in statements if "COUNT" in sql]
+    cache.close()
+
+def test_embed_list_only_encodes_uncached_chunks(tmp_path, monkeypatch):
+    import numpy as np
+    from unittest.mock import MagicMock
+    from ctxvault.core import embedding
+    from ctxvault.storage.embedding_cache import EmbeddingCache
+
+    backend = MagicMock(model_id="fake")
+    backend.encode = MagicMock(side_effect=lambda texts: np.array([[float(len(s))] * 4 for s in texts]))
+    monkeypatch.setattr(embedding, "get_backend", lambda vault_config=None: backend)
+    monkeypatch.setattr(embedding, "CACHE", EmbeddingCache(path=tmp_path / "cache.sqlite3", max_entries=100))
+
+    first = real_embed_list(chunks=["alpha", "beta", "alpha"])
+    second = real_embed_list(chunks=["beta", "gamma!"])
+
+    assert backend.encode.call_args_list[0].args[0] == ["alpha", "beta"]
+    assert backend.encode.call_args_list[1].args[0] == ["gamma!"]
+    assert first.shape == (3, 4) and first[2][0] == 5.0
+    assert second[0][0] == 4.0 and second[1][0] == 6.0
+
+
+def test_query_embeddings_skip_the_persistent_cache(monkeypatch):
+    import numpy as np
+    from unittest.mock import MagicMock
+    from ctxvault.core import embedding, querying
+
+    backend = MagicMock(model_id="fake")
+    backend.encode = MagicMock(side_effect=lambda texts: np.ones((len(texts), 4)))
+    cache = MagicMock()
+    monkeypatch.setattr(embedding, "get_backend", lambda vault_config=None: backend)
+    monkeypatch.setattr(embedding, "CACHE", cache)
+    monkeypatch.setattr(embedding, "embed_list", real_embed_list)
+
+    querying.embed_query(query_txt="where is the config?")
+    querying.embed_queries(query_txts=["first", "second"])
+
+    assert backend.encode.call_count == 2
+    assert not cache.get_many.called and not cache.put_many.called
+
+
+def test_ttl_cache_counts_hits_and_expires_entries(monkeypatch):
+    from ctxvault.utils import cache as cache_module
+
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = cache_module.TTLCache(max_size=2, ttl=10)
+
+    assert cache.get_or_compute("q", lambda: 1) == 1
+    assert cache.get_or_compute("q", lambda: 2) == 1
+    now[0] += 11
+    assert cache.get_or_compute("q", lambda: 3) == 3
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2, "coalesced": 0}
+
+
+def test_ttl_cache_coalesces_concurrent_misses():
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from ctxvault.utils.cache import TTLCache
+
+    cache = TTLCache(max_size=10, ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "vector"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get_or_compute, "same query", compute) for _ in range(4)]
+        while cache.stats()["coalesced"] < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["vector"] * 4
+    assert len(calls) == 1
+
+
+def test_ttl_cache_computes_missing_keys_in_one_call():
+    from ctxvault.utils.cache import TTLCache
+
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.get_or_compute("b", lambda: "B")
+    calls = []
+
+    def compute_many(keys):
+        calls.append(keys)
+        return [key.upper() for key in keys]
+
+    assert cache.get_many_or_compute(["a", "b", "c", "a"], compute_many) == ["A", "B", "C", "A"]
+    assert calls == [["a", "c"]]
+    assert cache.get_many_or_compute(["c"], compute_many) == ["C"] and len(calls) == 1
+
+
+def test_embedding_batcher_encodes_concurrent_texts_together():
+    from ctxvault.core.batching import EmbeddingBatcher
+
+    calls = []
+    def embed(texts):
+        calls.append(list(texts))
+        return [f"vector:{text}" for text in texts]
+
+    batcher = EmbeddingBatcher(embed=embed, window_ms=200, max_batch_size=3)
+    futures = [batcher.submit(text) for text in ["a", "b", "c", "d"]]
+    results = [future.result(timeout=5) for future in futures]
+    batcher.stop()
+
+    assert results == ["vector:a", "vector:b", "vector:c", "vector:d"]
+    assert calls == [["a", "b", "c"], ["d"]]
+
+
+def test_token_chunker_respects_sentences_and_limits():
+    from ctxvault.utils.chuncking import iter_token_chunks
+
+    count_tokens = lambda texts: [len(text.split()) for text in texts]
+    text = "One two three. Four five six seven.\n\nNew\tparagraph here.\n\n" + " ".join(f"w{i}" for i in range(12))
+
+    chunks = list(iter_token_chunks(text, count_tokens=count_tokens, chunk_size=8, overlap=3))
+
+    assert chunks[0] == "One two three. Four five six seven."
+    assert chunks[1].startswith("New paragraph here.\n\nw0")
+    assert all(len(chunk.split()) <= 8 for chunk in chunks)
+    assert chunks[-1].endswith("w11")
+    # Word windows of the over-long sentence overlap by up to 3 tokens.
+    assert chunks[2].split()[:3] == chunks[1].split()[-3:]
+
+
+def test_token_chunker_is_lazy_and_handles_empty_text():
+    from ctxvault.utils.chuncking import iter_token_chunks
+
+    count_tokens = lambda texts: [len(text.split()) for text in texts]
+    assert list(iter_token_chunks("  \n\n ", count_tokens=count_tokens)) == []
+    assert next(iter_token_chunks("Hello world.", count_tokens=count_tokens)) == "Hello world."
+
+
+def test_chunk_text_dispatches_on_strategy():
+    from ctxvault.utils.chuncking import chunk_text
+
+    count_tokens = lambda texts: [len(text.split()) for text in texts]
+    text = "First one. Second one. Third one."
+
+    assert list(chunk_text(text, filetype=".txt", chunk_strategy="sentences", chunk_size=2, chunk_overlap=1, count_tokens=count_tokens)) == ["First one. Second one.", "Second one. Third one."]
+    assert list(chunk_text(text, filetype=".txt", chunk_strategy="words", chunk_size=4, chunk_overlap=0, count_tokens=count_tokens)) == ["First one. Second one.", "Third one."]
+
+    markdown = "# Intro\nHello there.\n\n## Details\nMore text."
+    assert list(chunk_text(markdown, filetype=".md", chunk_strategy="markdown", chunk_size=50, chunk_overlap=0, count_tokens=count_tokens)) == ["Intro Hello there.", "Details More text."]
+
+
+def test_invalid_chunking_is_rejected(mock_global_config):
+    from ctxvault.core.exceptions import InvalidChunkingConfigError
+
+    with pytest.raises(InvalidChunkingConfigError):
+        vault.init_vault(vault_name="bad_vault", chunking={"chunk_strategy": "paragraphs"})
+    with pytest.raises(InvalidChunkingConfigError):
+        vault.init_vault(vault_name="bad_vault", chunking={"chunk_size": 10, "chunk_overlap": 10})
+
+
+def test_chunking_defaults_follow_the_strategy(mock_global_config):
+    from ctxvault.utils.config import create_vault, get_chunking, get_vault_config
+
+    create_vault(vault_name="sentences_vault", vault_path=None, chunking={"chunk_strategy": "sentences"})
+    assert get_chunking(vault_config=get_vault_config("sentences_vault")) == {"chunk_strategy": "sentences", "chunk_size": 5, "chunk_overlap": 1}
+
+    # Size and overlap follow a strategy change unless given, and stay otherwise.
+    assert vault.set_chunking(vault_name="sentences_vault", chunking={"chunk_strategy": "words"})[0] == {"chunk_strategy": "words", "chunk_size": 150, "chunk_overlap": 20}
+    assert vault.set_chunking(vault_name="sentences_vault", chunking={"chunk_size": 100})[0] == {"chunk_strategy": "words", "chunk_size": 100, "chunk_overlap": 20}
+    assert vault.set_chunking(vault_name="sentences_vault", chunking={"chunk_strategy": "sentences", "chunk_overlap": 2})[0] == {"chunk_strategy": "sentences", "chunk_size": 5, "chunk_overlap": 2}
+
+def test_changed_chunking_rechunks_indexed_files(mock_vault_config, temp_docs, monkeypatch):
+    vault.index_files(vault_name="test_vault", path=str(temp_docs))
+
+    settings, outdated = vault.set_chunking(vault_name="test_vault", chunking={"chunk_strategy": "words", "chunk_size": 50})
+    assert settings == {"chunk_strategy": "words", "chunk_size": 50, "chunk_overlap": 20}
+    assert outdated == 2
+
+    replaced = []
+    monkeypatch.setattr("ctxvault.storage.chroma_store.replace_document", lambda doc_id, ids, embeddings, metadatas, chunks, config: replaced.append(doc_id))
+    indexed, _, skipped = vault.index_files(vault_name="test_vault", path=str(temp_docs))
+
+    assert sorted(indexed) == [str(temp_docs / "file1.txt"), str(temp_docs / "file2.txt")]
+    assert len(replaced) == 2
+    assert vault.set_chunking(vault_name="test_vault", chunking={}) == (settings, 0)
+
+
+def test_hash_backend_is_deterministic_and_normalized():
+    import numpy as np
+    from ctxvault.core.embedding_backends import get_backend
+
+    backend = get_backend(name="hash", model_name="64")
+    vectors = backend.encode(["the quick brown fox", "the quick brown fox", "lorem ipsum"])
+
+    assert backend is get_backend(name="hash", model_name="64")
+    assert backend.model_id == "hash:64" and vectors.shape == (3, 64) and vectors.dtype == np.float32
+    assert np.array_equal(vectors[0], vectors[1])
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+
+def test_vault_records_its_embedding_backend(mock_global_config, monkeypatch):
+    from ctxvault.core import embedding, embedding_backends
+    from ctxvault.core.exceptions import InvalidEmbeddingConfigError
+    from ctxvault.utils.config import get_vault_config
+
+    vault.init_vault(vault_name="hashed", embedding={"embedding_backend": "hash"})
+    vault_config = get_vault_config("hashed")
+
+    assert vault_config["embedding_backend"] == "hash" and vault_config["embedding_model"] == "384"
+    assert embedding.get_backend(vault_config=vault_config).model_id == "hash:384"
+    assert embedding.get_backend(vault_config={}).model_id == embedding_backends.SentenceTransformerBackend.default_model
+    with pytest.raises(InvalidEmbeddingConfigError):
+        vault.init_vault(vault_name="bad_vault", embedding={"embedding_backend": "tensorflow"})
+
+
+def test_lexical_index_matches_identifiers_and_updates(tmp_path):
+    from ctxvault.storage.lexical_index import LexicalIndex
+
+    index = LexicalIndex(db_path=tmp_path)
+    index.add(chunk_ids=["a::0", "b::0"], doc_ids=["a", "b"], chunks=["Raised ERR_CONN_RESET on close", "The connection was reset"])
+
+    assert [chunk_id for chunk_id, _ in index.search(query_txt="why ERR_CONN_RESET?", limit=5)] == ["a::0"]
+    assert index.search(query_txt="...", limit=5) == []
+
+    index.add(chunk_ids=["a::0"], doc_ids=["a"], chunks=["Now about parse_config"])
+    assert index.search(query_txt="ERR_CONN_RESET", limit=5) == []
+    assert len(index) == 2
+
+    index.delete_document(doc_id="b")
+    assert not index.backfilled
+    index.mark_backfilled()
+    index.close()
+
+    reopened = LexicalIndex(db_path=tmp_path)
+    assert reopened.backfilled and len(reopened) == 1
+    assert [chunk_id for chunk_id, _ in reopened.search(query_txt="parse_config", limit=5)] == ["a::0"]
+
+
+def test_lexical_backfill_is_resumable_and_does_not_block_the_pool(tmp_path, monkeypatch):
+    import threading
+    from unittest.mock import MagicMock
+    from ctxvault.storage import chroma_store
+
+    vault_a, vault_b = str(tmp_path / "a"), str(tmp_path / "b")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    def get_page(include, limit, offset):
+        calls.append(offset)
+        if len(calls) == 1:
+            raise RuntimeError("interrupted")
+        started.set()
+        release.wait(timeout=5)
+        return {"ids": ["a::0"], "metadatas": [{"doc_id": "a"}], "documents": ["backfilled text"]}
+    collection = MagicMock()
+    collection.count.return_value = 1
+    collection.get.side_effect = get_page
+    client = MagicMock()
+    client.get_or_create_collection.side_effect = lambda name: collection if client.path == vault_a else MagicMock()
+    def make_client(path):
+        client.path = path
+        return client
+    monkeypatch.setattr("ctxvault.storage.chroma_store.PersistentClient", make_client)
+
+    def lease_lexical():
+        with pool.lease_lexical(vault_a):
+            pass
+
+    pool = chroma_store.CollectionPool()
+    with pytest.raises(RuntimeError):
+        lease_lexical()
+
+    # The interrupted backfill is redone, while other vaults stay available.
+    backfill = threading.Thread(target=lease_lexical)
+    backfill.start()
+    assert started.wait(timeout=5)
+    with pool.lease(vault_b):
+        pass
+    release.set()
+    backfill.join(timeout=5)
+
+    with pool.lease_lexical(vault_a) as lexical:
+        assert lexical.backfilled and [chunk_id for chunk_id, _ in lexical.search(query_txt="backfilled", limit=5)] == ["a::0"]
+    assert len(calls) == 2
+    pool.close()
+
+def test_hybrid_query_fuses_lexical_matches(mock_vault_config, monkeypatch):
+    from ctxvault.storage import chroma_store
+    from ctxvault.utils.config import get_vault_config
+
+    vault_config = get_vault_config("test_vault")
+    with chroma_store.lease_lexical_index(config=vault_config) as lexical:
+        lexical.add(chunk_ids=["z::0", "y::0"], doc_ids=["z", "y"], chunks=["ERR_CONN_RESET", "y text with ERR_CONN_RESET inside"])
+
+    def fake_query(query_embeddings, config, filters=None, n_results=5, include=None):
+        return {
+            "ids": [["x::0", "y::0"]],
+            "documents": [["x text", "y text"]],
+            "metadatas": [[{"chunk_id": "x::0", "chunk_index": 0, "doc_id": "x", "source": "x.txt"}, {"chunk_id": "y::0", "chunk_index": 0, "doc_id": "y", "source": "y.txt"}]],
+            "distances": [[0.5, 0.7]]
+        }
+    def fake_get_chunks(ids, config, filters=None, include=None):
+        assert ids == ["z::0"] and "embeddings" in include
+        return {
+            "ids": ["z::0"],
+            "documents": ["ERR_CONN_RESET"],
+            "metadatas": [{"chunk_id": "z::0", "chunk_index": 0, "doc_id": "z", "source": "z.txt"}],
+            "embeddings": [[0.1] * 383 + [1.1]]
+        }
+    monkeypatch.setattr(chroma_store, "query", fake_query)
+    monkeypatch.setattr(chroma_store, "get_chunks", fake_get_chunks)
+
+    vector = vault.query(text="ERR_CONN_RESET", vault_name="test_vault", top_k=3)
+    hybrid = vault.query(text="ERR_CONN_RESET", vault_name="test_vault", top_k=3, mode="hybrid")
+
+    assert [c.source for c in vector.results] == ["x.txt", "y.txt"]
+    # y is in both rankings, z only matches lexically and gets its distance from the stored embedding.
+    assert [c.source for c in hybrid.results] == ["y.txt", "x.txt", "z.txt"]
+    assert hybrid.results[2].score == pytest.approx(1.0)
+
+
+def test_rerank_reorders_truncates_and_caches_scores(mock_vault_config, monkeypatch):
+    from ctxvault.core import reranking
+    from ctxvault.storage import chroma_store
+
+    requested = []
+    def fake_query(query_embeddings, config, filters=None, n_results=5, include=None):
+        requested.append(n_results)
+        assert "documents" in include
+        ids = [f"d{i}::0" for i in range(8)]
+        return {
+            "ids": [ids],
+            "documents": [[f"text {i}" for i in range(8)]],
+            "metadatas": [[{"chunk_id": chunk_id, "chunk_index": 0, "doc_id": chunk_id[:2], "source": f"{chunk_id[:2]}.txt"} for chunk_id in ids]],
+            "distances": [[0.1 * i for i in range(8)]]
+        }
+    scored = []
+    class FakeReranker:
+        def score(self, query_txt, texts):
+            scored.append(texts)
+            return [float(text.split()[1]) for text in texts]
+    monkeypatch.setattr(chroma_store, "query", fake_query)
+    monkeypatch.setattr(reranking, "get_reranker", lambda model_name: FakeReranker())
+
+    result = vault.query(text="q", vault_name="test_vault", top_k=2, rerank=True)
+    again = vault.query(text="q", vault_name="test_vault", top_k=2, rerank=True)
+
+    assert [c.source for c in result.results] == ["d7.txt", "d6.txt"]
+    assert [c.rerank_score for c in result.results] == [7.0, 6.0]
+    assert again.results == result.results
+    assert requested == [8, 8]
+    assert len(scored) == 1 and len(scored[0]) == 8
+
+
+def test_rerank_over_budget_keeps_vector_order(mock_vault_config, monkeypatch):
+    import threading
+    from ctxvault.core import reranking
+
+    release = threading.Event()
+    class SlowReranker:
+        def score(self, query_txt, texts):
+            release.wait(timeout=5)
+            return [1.0] * len(texts)
+    monkeypatch.setattr(reranking, "get_reranker", lambda model_name: SlowReranker())
+    monkeypatch.setattr(vault, "get_settings", lambda: {"rerank_model": "m", "rerank_oversampling": 4, "rerank_budget_ms": 10})
+
+    result = vault.query(text="q", vault_name="test_vault", rerank=True)
+    release.set()
+    reranking.shutdown_reranker()
+
+    assert [c.chunk_id for c in result.results] == ["1"]
+    assert result.results[0].rerank_score is None
+
+
+def test_failing_reranker_keeps_vector_order(mock_vault_config, monkeypatch, caplog):
+    from ctxvault.core import reranking
+
+    class MissingReranker:
+        def score(self, query_txt, texts):
+            raise OSError("model not found in the offline cache")
+    monkeypatch.setattr(reranking, "get_reranker", lambda model_name: MissingReranker())
+    monkeypatch.setattr(reranking, "_failed_models", set())
+    monkeypatch.setattr(vault, "get_settings", lambda: {"rerank_model": "m", "rerank_oversampling": 4, "rerank_budget_ms": 5000})
+
+    with caplog.at_level("WARNING", logger="ctxvault.core.reranking"):
+        results = [vault.query(text=f"q{i}", vault_name="test_vault", rerank=True) for i in range(2)]
+    reranking.shutdown_reranker()
+
+    assert [[c.chunk_id for c in result.results] for result in results] == [["1"], ["1"]]
+    assert results[0].results[0].rerank_score is None
+    assert [record.getMessage() for record in caplog.records] == ["Reranking with m failed, keeping the vector order: model not found in the offline cache"]
+
+
+def test_timed_out_reranks_do_not_queue_up(monkeypatch):
+    import threading
+    from ctxvault.core import reranking
+
+    release = threading.Event()
+    scored = []
+    def slow_score(query_txt, chunk_ids, texts, model_name):
+        scored.append(query_txt)
+        release.wait(timeout=5)
+        return [1.0] * len(texts)
+    monkeypatch.setattr(reranking, "score_chunks", slow_score)
+
+    assert [reranking.rerank(query_txt=f"q{i}", chunk_ids=["1"], texts=["t"], model_name="m", budget_ms=10) for i in range(3)] == [None] * 3
+    release.set()
+    reranking.shutdown_reranker()
+
+    # The first scoring was running and completed; the queued ones were cancelled.
+    assert scored == ["q0"]
+
+
+def _write_pdf(path, pages):
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = DictionaryObject({NameObject("/Type"): NameObject("/Font"), NameObject("/Subtype"): NameObject("/Type1"), NameObject("/BaseFont"): NameObject("/Helvetica")})
+    for text in pages:
+        page = writer.add_blank_page(width=612, height=792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+    writer.write(str(path))
+
+
+def test_pdf_pages_are_chunked_separately_with_page_metadata(mock_vault_config, tmp_path, monkeypatch):
+    from pypdf import PageObject
+    from ctxvault.core import indexer
+    from ctxvault.utils.config import get_vault_config
+    from ctxvault.utils.text_extraction import extract_texts
+
+    pdf = tmp_path / "manual.pdf"
+    _write_pdf(pdf, pages=["First page ends", "broken page", "", "Last page."])
+
+    extract = PageObject.extract_text
+    def flaky_extract(page, *args, **kwargs):
+        text = extract(page, *args, **kwargs)
+        if "broken" in text:
+            raise ValueError("bad content stream")
+        return text
+    monkeypatch.setattr(PageObject, "extract_text", flaky_extract)
+
+    stored = []
+    monkeypatch.setattr("ctxvault.storage.chroma_store.replace_document", lambda doc_id, ids, embeddings, metadatas, chunks, config: stored.extend(zip(chunks, metadatas)))
+
+    assert indexer.index_file(file_path=str(pdf), config=get_vault_config("test_vault")) == 2
+    assert [(chunk, metadata["page"]) for chunk, metadata in stored] == [("First page ends", 1), ("Last page.", 4)]
+
+    indexed, skipped = indexer.index_files(file_paths=[str(pdf)], config=get_vault_config("test_vault"))
+    assert indexed == [str(pdf)] and skipped == [f"{pdf} (page 2: bad content stream)"]
+
+    # Worker processes return the pages read up front, not a joined string.
+    monkeypatch.setattr(PageObject, "extract_text", extract)
+    results = list(extract_texts(paths=[str(pdf), str(pdf)], max_workers=2))
+    assert list(results[0][1]) == [(1, "First page ends"), (2, "broken page"), (4, "Last page.")]
+
+    # Large PDFs are streamed in process instead.
+    monkeypatch.setattr("ctxvault.utils.text_extraction.STREAM_PDF_MIN_SIZE", 0)
+    results = list(extract_texts(paths=[str(pdf), str(pdf)], max_workers=2))
+    assert not isinstance(results[0][1]._pages, list)
+    assert list(results[1][1]) == [(1, "First page ends"), (2, "broken page"), (4, "Last page.")]
+
+
+def _create_vault_in_process(vault_name):
+    from ctxvault.utils.config import create_vault
+    create_vault(vault_name, "")
+
+
+def test_global_config_is_cached_until_the_file_changes(mock_vault_config, monkeypatch):
+    import json, os
+    from ctxvault.utils import config
+
+    reads = []
+    read_config_file = config._read_config_file
+    monkeypatch.setattr(config, "_read_config_file", lambda path: reads.append(path) or read_config_file(path=path))
+    monkeypatch.setattr(config, "CONFIG_CHECK_INTERVAL", 0)
+
+    for _ in range(10):
+        assert config.get_vault_config("test_vault")["chunk_size"] == 200
+    assert reads == []
+
+    # Another process replacing the file is picked up on the next check.
+    data = json.loads(config.CONFIG_FILE.read_text())
+    data["settings"] = {"hybrid_candidates": 7}
+    tmp = config.CONFIG_FILE.with_name("other.tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, config.CONFIG_FILE)
+
+    assert config.get_settings()["hybrid_candidates"] == 7
+    assert len(reads) == 1
+
+
+def test_concurrent_vault_creation_keeps_every_vault(mock_global_config, monkeypatch):
+    import multiprocessing
+    from concurrent.futures import ThreadPoolExecutor
+    from ctxvault.utils import config
+
+    names = [f"vault_{i}" for i in range(8)]
+    processes = [multiprocessing.get_context("fork").Process(target=_create_vault_in_process, args=(name,)) for name in names[:4]]
+    for process in processes:
+        process.start()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_create_vault_in_process, names[4:]))
+    for process in processes:
+        process.join()
+
+    monkeypatch.setattr(config, "CONFIG_CHECK_INTERVAL", 0)
+    assert sorted(config.get_vaults()) == names
+    assert not list(mock_global_config.glob("*.tmp"))
+
+
+def test_document_catalog_lists_pages_sorted_and_filtered(mock_vault_config, temp_docs, monkeypatch):
+    from ctxvault.core.exceptions import InvalidQueryError
+    from ctxvault.storage import chroma_store
+
+    (temp_docs / "sub").mkdir()
+    (temp_docs / "sub" / "big.txt").write_text("A much longer document. " * 20)
+    vault.index_files(vault_name="test_vault", path=str(temp_docs))
+    with monkeypatch.context() as m:
+        m.setattr(chroma_store, "lease_collection", lambda config: pytest.fail("the catalog must not read Chroma"))
+
+        docs = vault.list_documents(vault_name="test_vault")
+        assert [Path(doc.source).name for doc in docs] == ["file1.txt", "file2.txt", "big.txt"]
+        assert docs[0].filetype == ".txt" and docs[0].size == len("Content of file 1") and docs[0].indexed_at is not None
+
+        by_size = vault.list_documents(vault_name="test_vault", sort="size", descending=True, limit=2)
+        assert [Path(doc.source).name for doc in by_size] == ["big.txt", "file2.txt"]
+        assert [Path(doc.source).name for doc in vault.list_documents(vault_name="test_vault", limit=2, offset=2)] == ["big.txt"]
+
+        assert [Path(doc.source).name for doc in vault.list_documents(vault_name="test_vault", prefix="docs/file")] == ["file1.txt", "file2.txt"]
+        assert vault.count_documents(vault_name="test_vault", prefix=str(temp_docs / "sub")) == 1
+
+    vault.delete_file(file_path=temp_docs / "file1.txt", vault_config=vault.get_vault_config("test_vault"))
+    assert vault.count_documents(vault_name="test_vault") == 2
+
+    with pytest.raises(InvalidQueryError):
+        vault.list_documents(vault_name="test_vault", sort="name")
+
+
+def test_manifest_backfills_catalog_columns(tmp_path):
+    import sqlite3
+    from ctxvault.core.identifiers import get_doc_id
+    from ctxvault.storage.manifest import MANIFEST_FILE, Manifest
+
+    conn = sqlite3.connect(tmp_path / MANIFEST_FILE)
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, content_hash TEXT NOT NULL, chunks_count INTEGER NOT NULL, embedding_model TEXT NOT NULL)")
+    conn.execute("INSERT INTO files VALUES ('/vault/a.md', 1, 1, 'h', 3, 'm')")
+    conn.commit()
+    conn.close()
+
+    with Manifest(db_path=tmp_path) as manifest:
+        [entry] = manifest.list_documents()
+
+    assert (entry.doc_id, entry.filetype, entry.chunks_count, entry.indexed_at) == (get_doc_id(path="/vault/a.md"), ".md", 3, 0)
+
+
+def test_catalog_is_seeded_once_from_chroma_metadata(mock_vault_config, temp_docs, monkeypatch):
+    from contextlib import nullcontext
+    from unittest.mock import MagicMock
+    from ctxvault.storage import chroma_store
+
+    # A vault indexed before the manifest existed: chunks in Chroma, no manifest rows.
+    vault_config = vault.get_vault_config("test_vault")
+    (Path(vault_config["db_path"]) / vault.CHROMA_DB_FILE).touch()
+    sources = [str(temp_docs / "file1.txt"), str(temp_docs / "file1.txt"), str(temp_docs / "file2.txt")]
+    collection = MagicMock()
+    collection.count.return_value = len(sources)
+    collection.get.side_effect = lambda include, limit, offset: {"ids": [str(i) for i in range(len(sources))][offset:offset + limit], "metadatas": [{"source": source} for source in sources][offset:offset + limit]}
+    monkeypatch.setattr(chroma_store, "lease_collection", lambda config: nullcontext(collection))
+    chunk_counts = chroma_store.get_document_chunk_counts
+    monkeypatch.setattr(chroma_store, "get_document_chunk_counts", lambda config: chunk_counts(config=config, page_size=2))
+
+    documents = vault.list_documents(vault_name="test_vault")
+    assert [(document.source, document.chunks_count) for document in documents] == [(str(temp_docs / "file1.txt"), 2), (str(temp_docs / "file2.txt"), 1)]
+    assert vault.count_documents(vault_name="test_vault") == 2
+    assert collection.get.call_count == 2
+
+    # Seeded documents have no model recorded, so the next index run re-embeds them.
+    assert vault.set_chunking(vault_name="test_vault", chunking={})[1] == 2
+
+def test_document_pages_follow_cursors(mock_vault_config, temp_docs):
+    from ctxvault.core.exceptions import InvalidQueryError
+
+    for i in range(3):
+        (temp_docs / f"extra{i}.txt").write_text("x" * (i + 1))
+    vault.index_files(vault_name="test_vault", path=str(temp_docs))
+
+    pages = []
+    cursor = None
+    while True:
+        documents, cursor = vault.list_documents_page(vault_name="test_vault", sort="size", descending=True, limit=2, cursor=cursor)
+        pages.append([Path(doc.source).name for doc in documents])
+        if cursor is None:
+            break
+
+    # Equal sizes are ordered by path, in the same direction.
+    assert pages == [["file2.txt", "file1.txt"], ["extra2.txt", "extra1.txt"], ["extra0.txt"]]
+    assert [Path(doc.source).name for doc in vault.iter_documents(vault_name="test_vault", page_size=2)] == ["extra0.txt", "extra1.txt", "extra2.txt", "file1.txt", "file2.txt"]
+
+    _, cursor = vault.list_documents_page(vault_name="test_vault", limit=2)
+    with pytest.raises(InvalidQueryError):
+        vault.list_documents_page(vault_name="test_vault", sort="size", cursor=cursor)
+    with pytest.raises(InvalidQueryError):
+        vault.list_documents_page(vault_name="test_vault", cursor="not-a-cursor")
+
+
+def test_walk_files_prunes_filters_and_honours_ignore_files(tmp_path):
+    from ctxvault.utils.file_walker import walk_files
+
+    files = ["a.md", "b.bin", "drafts/c.txt", "docs/d.txt", "docs/keep.log.txt", "docs/build/e.txt", "docs/sub/f.pdf", ".git/g.txt", "chroma/h.txt"]
+    for file in files:
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text("x")
+    (tmp_path / ".ctxvaultignore").write_text("# drafts stay local\n/drafts/\n*.log.txt\n")
+    (tmp_path / "docs" / ".ctxvaultignore").write_text("build/\nsub/*.pdf\n!keep.log.txt\n")
+
+    def walk(path, **kwargs):
+        return sorted(file.relative_to(tmp_path).as_posix() for file, _ in walk_files(path=path, exclude_dirs=[tmp_path / "chroma"], **kwargs))
+
+    assert walk(tmp_path) == ["a.md", "docs/d.txt", "docs/keep.log.txt"]
+    # Walking a subfolder still applies the ignore files above it, down from ignore_root.
+    assert walk(tmp_path / "docs", ignore_root=tmp_path) == ["docs/d.txt", "docs/keep.log.txt"]
+    assert walk(tmp_path / "drafts", ignore_root=tmp_path) == []
+    assert walk(tmp_path / "drafts") == ["drafts/c.txt"]
+    assert walk(tmp_path / "b.bin") == ["b.bin"]
+
+    [(_, stat)] = walk_files(path=tmp_path / "docs" / "d.txt")
+    assert stat.st_size == 1
+
+
+class _FakeCollection:
+    """In-memory stand-in for the chunk operations of a Chroma collection."""
+
+    def __init__(self):
+        self.rows = {}
+        self.deleted = []
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.rows.update((chunk_id, (embedding, metadata)) for chunk_id, embedding, metadata in zip(ids, embeddings, metadatas))
+
+    def get(self, where, include):
+        ids = [chunk_id for chunk_id, (_, metadata) in self.rows.items() if metadata["doc_id"] == where["doc_id"]]
+        return {"ids": ids, "embeddings": [self.rows[chunk_id][0] for chunk_id in ids] if "embeddings" in include else None}
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for chunk_id in ids:
+            del self.rows[chunk_id]
+
+
+def test_reindex_only_embeds_changed_chunks_and_deletes_vanished_ones(mock_vault_config, temp_docs, monkeypatch):
+    from contextlib import nullcontext
+    from ctxvault.storage import chroma_store
+
+    collection = _FakeCollection()
+    monkeypatch.setattr(chroma_store, "lease_collection", lambda config: nullcontext(collection))
+    embedded = []
+    monkeypatch.setattr("ctxvault.core.embedding.embed_list", lambda chunks, vault_config=None: embedded.extend(chunks) or [[0.1] * 384] * len(chunks))
+
+    vault.set_chunking(vault_name="test_vault", chunking={"chunk_strategy": "words", "chunk_size": 3, "chunk_overlap": 0})
+    file = temp_docs / "notes.txt"
+    file.write_text("one two three four five six seven eight nine")
+    vault.index_files(vault_name="test_vault", path=str(file))
+    assert embedded == ["one two three", "four five six", "seven eight nine"]
+    kept = {chunk_id for chunk_id, (_, metadata) in collection.rows.items() if metadata["chunk_index"] == 0}
+
+    embedded.clear()
+    file.write_text("one two three FOUR five six")
+    indexed, _, _ = vault.index_files(vault_name="test_vault", path=str(file))
+
+    assert indexed == [str(file)]
+    assert embedded == ["FOUR five six"]
+    assert len(collection.deleted) == 2 and not kept & set(collection.deleted)
+    assert sorted(metadata["chunk_index"] for _, metadata in collection.rows.values()) == [0, 1]
+
+    embedded.clear()
+    vault.reindex_file(file_path=file, vault_config=vault.get_vault_config("test_vault"))
+    assert embedded == []
+    with chroma_store.lease_lexical_index(config=vault.get_vault_config("test_vault")) as lexical:
+        hits = lexical.search(query_txt="four", limit=5)
+    assert [chunk_id for chunk_id, _ in hits] == [
+        chunk_id for chunk_id, (_, metadata) in collection.rows.items() if metadata["chunk_index"] == 1
+    ]
+
+
+def test_index_replaces_legacy_positional_chunk_ids(mock_vault_config, temp_docs, monkeypatch):
+    from contextlib import nullcontext
+    import hashlib
+    from ctxvault.core.identifiers import get_doc_id
+    from ctxvault.storage import chroma_store
+
+    collection = _FakeCollection()
+    monkeypatch.setattr(chroma_store, "lease_collection", lambda config: nullcontext(collection))
+
+    # A vault indexed by an older release: positional chunk ids and no manifest rows.
+    file = temp_docs / "file1.txt"
+    doc_id = get_doc_id(path=str(file))
+    legacy_ids = [f"{doc_id}::{hashlib.sha256(i.to_bytes(8, 'big')).hexdigest()}" for i in range(2)]
+    collection.upsert(ids=legacy_ids, embeddings=[[0.1] * 384] * 2, metadatas=[{"doc_id": doc_id, "chunk_index": i} for i in range(2)], documents=["old", "old"])
+
+    indexed, _, _ = vault.index_files(vault_name="test_vault", path=str(file))
+
+    assert indexed == [str(file)]
+    assert sorted(collection.deleted) == sorted(legacy_ids)
+    assert collection.rows and not set(legacy_ids) & set(collection.rows)
+    assert all(metadata["doc_id"] == doc_id for _, metadata in collection.rows.values())